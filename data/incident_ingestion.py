@@ -0,0 +1,223 @@
+import os
+import json
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from scipy.spatial import cKDTree
+from pyproj import Transformer
+
+logger = logging.getLogger(__name__)
+
+# Default column names in the exported call logs
+DEFAULT_COLUMNS = {"timestamp": "timestamp", "lat": "lat", "lon": "lon", "priority": "priority"}
+DEFAULT_PRIORITIES = (1, 2, 3)
+
+class IncidentAggregator:
+    """
+    Streams historical incident records into per-cell call counts.
+
+    Each call is snapped to its nearest demand node (KD-tree over UTM coordinates)
+    and counted in a fixed (n_cells, 24, n_priorities) array, so memory depends on
+    the number of demand cells and never on the number of records read.
+    """
+    def __init__(self, demand_gdf: gpd.GeoDataFrame, priorities=DEFAULT_PRIORITIES,
+                 max_snap_m: float = 10000.0, chunksize: int = 1_000_000, columns: dict = None):
+        demand_utm = demand_gdf.to_crs("EPSG:32640")
+        coords = np.column_stack([demand_utm.geometry.x.values, demand_utm.geometry.y.values])
+
+        self.n_cells = len(coords)
+        self.priorities = tuple(priorities)
+        self.max_snap_m = max_snap_m
+        self.chunksize = chunksize
+        self.columns = {**DEFAULT_COLUMNS, **(columns or {})}
+
+        self._tree = cKDTree(coords)
+        self._to_utm = Transformer.from_crs("EPSG:4326", "EPSG:32640", always_xy=True)
+        self._priority_index = {p: k for k, p in enumerate(self.priorities)}
+
+        # Aggregates (all bounded by n_cells, not by record count)
+        self.counts = np.zeros((self.n_cells, 24, len(self.priorities)), dtype=np.int64)
+        self.days = set()
+        self.ingested_files = {}
+        self.n_records = 0
+        self.n_dropped = 0
+
+    def ingest_frame(self, df: pd.DataFrame) -> int:
+        """
+        Add one chunk of records to the aggregates. Returns the number of calls counted.
+        Records with unknown priority or further than max_snap_m from any cell are dropped.
+        """
+        cols = self.columns
+        ts = pd.to_datetime(df[cols["timestamp"]], errors="coerce")
+        prio = df[cols["priority"]].map(self._priority_index)
+        lon = df[cols["lon"]].to_numpy(dtype=np.float64)
+        lat = df[cols["lat"]].to_numpy(dtype=np.float64)
+
+        valid = ts.notna().to_numpy() & prio.notna().to_numpy() & np.isfinite(lon) & np.isfinite(lat)
+
+        x, y = self._to_utm.transform(lon[valid], lat[valid])
+        _, cell = self._tree.query(np.column_stack([x, y]), distance_upper_bound=self.max_snap_m)
+        snapped = cell < self.n_cells
+
+        hour = ts.dt.hour.to_numpy()[valid][snapped]
+        p_idx = prio.to_numpy()[valid][snapped].astype(np.int64)
+        cell = cell[snapped]
+
+        # Flat index into counts: ((cell * 24) + hour) * n_priorities + priority
+        n_prio = len(self.priorities)
+        flat = (cell * 24 + hour) * n_prio + p_idx
+        if len(flat):
+            # bincount over the touched range only, not a full-size array per chunk
+            lo = int(flat.min())
+            touched = np.bincount(flat - lo)
+            self.counts.reshape(-1)[lo:lo + len(touched)] += touched
+
+        day_ordinals = ts[valid].to_numpy()[snapped].astype("datetime64[D]").astype(np.int64)
+        self.days.update(np.unique(day_ordinals).tolist())
+
+        n_counted = int(len(cell))
+        self.n_records += len(df)
+        self.n_dropped += len(df) - n_counted
+        return n_counted
+
+    def _iter_chunks(self, path):
+        """Yield DataFrame chunks from a CSV or Parquet file."""
+        usecols = list(self.columns.values())
+        path = str(path)
+        if path.endswith(".parquet") or path.endswith(".pq"):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError(f"Reading Parquet incident files ({path}) requires pyarrow: "
+                                  "pip install pyarrow") from e
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=self.chunksize, columns=usecols):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, usecols=usecols, chunksize=self.chunksize)
+
+    def ingest_file(self, path: str) -> int:
+        """
+        Stream a single incident file into the aggregates.
+        Files already ingested (same size and modification time) are skipped, so re-running
+        over a directory only picks up newly arrived days. The aggregates keep no per-file
+        counts, so a file that changed since it was ingested raises ValueError: reset() and
+        re-ingest all files instead of counting its calls twice.
+        """
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        key = os.path.abspath(path)
+        if key in self.ingested_files:
+            if self.ingested_files[key] == signature:
+                logger.info(f"Skipping {path} (already ingested).")
+                return 0
+            raise ValueError(f"{path} changed since it was ingested; reset() the aggregates and "
+                             "re-ingest all files to replace its calls")
+
+        n_counted = 0
+        for chunk in self._iter_chunks(path):
+            n_counted += self.ingest_frame(chunk)
+
+        self.ingested_files[key] = signature
+        logger.info(f"Ingested {n_counted:,} calls from {path}")
+        return n_counted
+
+    def ingest_files(self, paths) -> int:
+        """Stream several incident files (in order) into the aggregates."""
+        return sum(self.ingest_file(p) for p in paths)
+
+    def reset(self) -> None:
+        """Clear all aggregates and the record of ingested files."""
+        self.counts[:] = 0
+        self.days = set()
+        self.ingested_files = {}
+        self.n_records = 0
+        self.n_dropped = 0
+
+    @property
+    def n_days(self) -> int:
+        return len(self.days)
+
+    def hourly_rates(self) -> np.ndarray:
+        """Mean calls per day for each (cell, hour, priority)."""
+        return self.counts / max(self.n_days, 1)
+
+    def demand_weights(self, hours=None, priority_weights=None) -> np.ndarray:
+        """
+        Collapse the aggregates into a (n_cells,) weights vector for MCLPModel.
+        hours: optional subset of hours of day to include (default: all 24).
+        priority_weights: optional per-priority multipliers, e.g. to up-weight critical calls.
+        """
+        rates = self.hourly_rates()
+        if hours is not None:
+            rates = rates[:, list(hours), :]
+        if priority_weights is None:
+            priority_weights = np.ones(len(self.priorities))
+        return rates.sum(axis=1) @ np.asarray(priority_weights, dtype=np.float64)
+
+    def demand_profiles(self, priority_weights=None) -> np.ndarray:
+        """
+        Hourly demand profiles as a compact (n_cells, 24) float32 array,
+        one column per hour of day, for multi-profile optimization.
+        """
+        if priority_weights is None:
+            priority_weights = np.ones(len(self.priorities))
+        return (self.hourly_rates() @ np.asarray(priority_weights, dtype=np.float64)).astype(np.float32)
+
+    def save(self, path: str) -> None:
+        """Persist the aggregates so later runs can ingest only new files."""
+        np.savez_compressed(
+            path,
+            counts=self.counts,
+            days=np.array(sorted(self.days), dtype=np.int64),
+            priorities=np.array(self.priorities),
+            meta=json.dumps({
+                "ingested_files": self.ingested_files,
+                "n_records": self.n_records,
+                "n_dropped": self.n_dropped,
+            }),
+        )
+
+    @classmethod
+    def load(cls, path: str, demand_gdf: gpd.GeoDataFrame, **kwargs) -> "IncidentAggregator":
+        """Restore aggregates saved with save() for the same demand cells."""
+        with np.load(path) as state:
+            agg = cls(demand_gdf, priorities=state["priorities"].tolist(), **kwargs)
+            if state["counts"].shape != agg.counts.shape:
+                raise ValueError(
+                    f"Saved aggregates have shape {state['counts'].shape}, "
+                    f"expected {agg.counts.shape} for the given demand cells"
+                )
+            agg.counts = state["counts"].copy()
+            agg.days = set(state["days"].tolist())
+            meta = json.loads(str(state["meta"]))
+        agg.ingested_files = meta["ingested_files"]
+        agg.n_records = meta["n_records"]
+        agg.n_dropped = meta["n_dropped"]
+        return agg
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    parser = argparse.ArgumentParser(description="Aggregate incident call logs into demand weights")
+    parser.add_argument("files", nargs="+", help="Incident CSV/Parquet files")
+    parser.add_argument("--demand", default=os.path.join(os.path.dirname(__file__), "synthetic", "demand_nodes.geojson"))
+    parser.add_argument("--state", help="Aggregate state (.npz) to resume from and update")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the saved state and re-ingest from scratch")
+    parser.add_argument("--out", default="incident_weights.npy", help="Output weights array")
+    args = parser.parse_args()
+
+    demand_gdf = gpd.read_file(args.demand)
+    if args.state and os.path.exists(args.state) and not args.rebuild:
+        aggregator = IncidentAggregator.load(args.state, demand_gdf)
+    else:
+        aggregator = IncidentAggregator(demand_gdf)
+
+    aggregator.ingest_files(args.files)
+    if args.state:
+        aggregator.save(args.state)
+
+    np.save(args.out, aggregator.demand_weights())
+    logger.info(f"{aggregator.n_days} days, {aggregator.n_records:,} records "
+                f"({aggregator.n_dropped:,} dropped). Weights saved to {args.out}")
@@ -1,4 +1,39 @@
-from .mclp_model import MCLPModel, run_mclp
-from .coverage_matrix import build_coverage_matrix, compute_travel_time_matrix
+import importlib
 
-__all__ = ["MCLPModel", "run_mclp", "build_coverage_matrix", "compute_travel_time_matrix"]
+# Public API -> defining submodule. Imported on first attribute access, so importing
+# a light submodule does not pay for gurobipy/PuLP, geopandas or pandas.
+_EXPORTS = {
+    "MCLPModel": ".mclp_model",
+    "run_mclp": ".mclp_model",
+    "build_coverage_matrix": ".coverage_matrix",
+    "compute_travel_time_matrix": ".coverage_matrix",
+    "coverage_equity_frontier": ".pareto",
+    "station_budget_sweep": ".pareto",
+    "RelocationModel": ".relocation",
+    "PMedianModel": ".pmedian",
+    "KNearest": ".pmedian",
+    "allocate_vehicles": ".vehicle_allocation",
+    "solve_portfolio": ".portfolio",
+    "solve_decomposed": ".decomposition",
+    "coverage_components": ".decomposition",
+    "solve_saa": ".stochastic",
+    "sample_demand_scenarios": ".stochastic",
+    "out_of_sample_coverage": ".stochastic",
+    "detect_solver": ".backends",
+    "register_backend": ".backends",
+    "available_backends": ".backends",
+    "SharedArrays": ".shared_arrays",
+    "attach_shared": ".shared_arrays",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,83 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Registered MIP backends: name -> (availability probe, priority); higher priority wins under "auto"
+_BACKENDS = {}
+# Probe results, cached for the lifetime of the process
+_AVAILABLE = {}
+
+def register_backend(name: str, priority: int = 0):
+    """
+    Register a solver backend's availability probe (used as a decorator).
+    The probe returns True if the backend can solve models in this process;
+    it runs at most once per process.
+    """
+    def decorator(probe):
+        _BACKENDS[name] = (probe, priority)
+        _AVAILABLE.pop(name, None)
+        return probe
+    return decorator
+
+def is_available(name: str) -> bool:
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown solver backend '{name}', expected one of {sorted(_BACKENDS)}")
+    if name not in _AVAILABLE:
+        try:
+            _AVAILABLE[name] = bool(_BACKENDS[name][0]())
+        except Exception as e:
+            logger.debug(f"Solver backend '{name}' unavailable: {e}")
+            _AVAILABLE[name] = False
+    return _AVAILABLE[name]
+
+def available_backends() -> list:
+    """Available backends, best first."""
+    names = sorted(_BACKENDS, key=lambda n: -_BACKENDS[n][1])
+    return [n for n in names if is_available(n)]
+
+def detect_solver(solver_type: str = "auto") -> str:
+    """
+    Resolve the backend to use. `solver_type` is "auto" (best available) or a
+    registered backend name, e.g. from the `optimization.solver_type` config key.
+    USE_PULP=1 makes "auto" resolve to PuLP/CBC (CI override); an explicitly requested
+    backend is kept. Falls back to automatic detection, with a warning, if the
+    requested backend is unavailable.
+    """
+    if solver_type not in (None, "auto"):
+        if is_available(solver_type):
+            return solver_type
+        logger.warning(f"Solver backend '{solver_type}' is not available; detecting automatically.")
+
+    if os.environ.get("USE_PULP") == "1":
+        return "pulp"
+
+    available = available_backends()
+    if not available:
+        raise RuntimeError(f"No MIP solver backend available (registered: {sorted(_BACKENDS)})")
+    return available[0]
+
+def clear_solver_cache() -> None:
+    """Forget cached probe results (e.g. after installing a license)."""
+    _AVAILABLE.clear()
+
+@register_backend("gurobi", priority=10)
+def _probe_gurobi() -> bool:
+    import gurobipy
+    # Check if license is active
+    with gurobipy.Env(empty=True) as env:
+        env.setParam('OutputFlag', 0)
+        env.start()
+    return True
+
+@register_backend("pulp", priority=0)
+def _probe_pulp() -> bool:
+    import pulp
+    return pulp.PULP_CBC_CMD(msg=False).available()
+
+# In-memory HiGHS via SciPy: no LP file or CBC process per solve, but no MIP starts. Opt in with
+# solver_type "highs"; under "auto" it is the fallback when neither Gurobi nor CBC is available.
+@register_backend("highs", priority=-10)
+def _probe_highs() -> bool:
+    from scipy.optimize import milp
+    return True
@@ -1,11 +1,15 @@
 import geopandas as gpd
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from scipy.spatial.distance import cdist
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Average ambulance speed of the general model
+AVERAGE_SPEED_KMH = 65.0
+
 def project_to_utm(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """Project GeoDataFrame to UTM Zone 40N (Abu Dhabi)."""
     return gdf.to_crs("EPSG:32640")
@@ -28,8 +32,7 @@ def compute_travel_time_matrix(demand_gdf, stations_gdf) -> np.ndarray:
     dist_km = dist_m / 1000.0
     
     # Time in minutes = (distance in km / speed in km/h) * 60
-    # Average speed 65 km/h
-    time_min = (dist_km / 65.0) * 60.0
+    time_min = (dist_km / AVERAGE_SPEED_KMH) * 60.0
     
     return time_min.astype(np.float32)
 
@@ -37,12 +40,18 @@ def build_coverage_matrix(travel_time_matrix, threshold_min=8.0) -> np.ndarray:
     """Generate boolean matrix for coverage within threshold."""
     return (travel_time_matrix <= threshold_min)
 
+def covered_nodes(coverage_matrix, station_idx) -> np.ndarray:
+    """(n_demand,) mask of nodes covered by any of the stations; dense or scipy sparse coverage."""
+    subset = coverage_matrix[:, station_idx]
+    if sparse.issparse(subset):
+        return np.asarray(subset.sum(axis=1)).ravel() > 0
+    return np.any(subset, axis=1)
+
 def baseline_coverage_stats(existing_station_idx, coverage_matrix, demand_weights) -> dict:
     """Compute coverage statistics for a subset of stations."""
     # coverage_matrix is (n_demand, n_candidates)
     # subset coverage is True if any existing station covers the node
-    subset_matrix = coverage_matrix[:, existing_station_idx]
-    is_covered = np.any(subset_matrix, axis=1)
+    is_covered = covered_nodes(coverage_matrix, existing_station_idx)
     
     covered_population = np.sum(demand_weights[is_covered])
     total_population = np.sum(demand_weights)
@@ -53,3 +62,22 @@ def baseline_coverage_stats(existing_station_idx, coverage_matrix, demand_weight
         "covered_population": float(covered_population),
         "total_population": float(total_population)
     }
+
+def profile_coverage_stats(station_idx, coverage_matrix, demand_profiles) -> dict:
+    """
+    Compute coverage statistics for every demand profile at once.
+    demand_profiles: (n_demand, n_profiles) weights, e.g. 24 hourly profiles.
+    Returns (n_profiles,) arrays.
+    """
+    is_covered = covered_nodes(coverage_matrix, station_idx)
+    profiles = np.asarray(demand_profiles, dtype=np.float32)
+    
+    # One matrix-vector product scores all profiles
+    covered_population = is_covered.astype(np.float32) @ profiles
+    total_population = profiles.sum(axis=0)
+    
+    return {
+        "coverage_pct": covered_population / total_population,
+        "covered_population": covered_population,
+        "total_population": total_population
+    }
@@ -0,0 +1,144 @@
+import os
+import time
+import logging
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .mclp_model import MCLPModel
+    from .portfolio import spread_vehicles
+except ImportError:  # run as a script, e.g. python optimization/solver.py
+    from mclp_model import MCLPModel
+    from portfolio import spread_vehicles
+
+logger = logging.getLogger(__name__)
+
+PROVEN = ("OPTIMAL", "Optimal")
+
+def coverage_components(coverage_matrix) -> list:
+    """
+    Connected components of the bipartite demand-candidate coverage graph, as
+    (demand_idx, candidate_idx) pairs, largest first. Components without demand or
+    without candidates cannot contribute coverage and are left out.
+    """
+    csr = sparse.csr_matrix(coverage_matrix, dtype=bool)
+    n_demand = csr.shape[0]
+    graph = sparse.bmat([[None, csr], [csr.T, None]], format="csr")
+    n, labels = connected_components(graph, directed=False)
+
+    demand_groups = np.split(np.argsort(labels[:n_demand], kind="stable"),
+                             np.cumsum(np.bincount(labels[:n_demand], minlength=n))[:-1])
+    cand_groups = np.split(np.argsort(labels[n_demand:], kind="stable"),
+                           np.cumsum(np.bincount(labels[n_demand:], minlength=n))[:-1])
+    components = [(d, c) for d, c in zip(demand_groups, cand_groups) if len(d) and len(c)]
+    return sorted(components, key=lambda dc: -len(dc[1]))
+
+def _component_curve(coverage_matrix, weights, max_budget, time_limit, solver_type):
+    """
+    Best coverage of one component for station budgets 0..max_budget: one model,
+    budgets changed in place and warm-started (as in station_budget_sweep). Stops once
+    all coverable demand is covered; larger budgets cannot improve on that.
+    """
+    coverable = weights[np.asarray(coverage_matrix.sum(axis=1)).ravel() > 0].sum()
+    if coverage_matrix.shape[1] == 1:
+        return [0.0, float(coverable)], [[], [0]], ["OPTIMAL"]
+
+    model = MCLPModel(coverage_matrix, weights, 1, 0, solver_type=solver_type)
+    values, stations, statuses = [0.0], [[]], []
+    for b in range(1, max_budget + 1):
+        model.set_station_budget(b)
+        res = model.solve(time_limit=time_limit, warm_start=b > 1)
+        statuses.append(res["status"])
+        if res["obj_value"] >= values[-1]:
+            values.append(res["obj_value"])
+            stations.append(res["open_stations"])
+        else:
+            # No (better) incumbent within the time limit: one station fewer is still feasible
+            values.append(values[-1])
+            stations.append(stations[-1])
+        if values[-1] >= coverable * (1 - 1e-9):
+            break
+    return values, stations, statuses
+
+def combine_budget_curves(curves, p_stations) -> tuple:
+    """
+    Exact budget split over components: dp[b] = best total with at most b stations,
+    adding one component's curve at a time (a multiple-choice knapsack, O(C * p^2)).
+    Returns (best value, budget per component).
+    """
+    dp = np.zeros(p_stations + 1)
+    choices = []
+    for values in curves:
+        best = dp.copy()
+        arg = np.zeros(p_stations + 1, dtype=int)
+        for k in range(1, min(len(values), p_stations + 1)):
+            cand = np.full(p_stations + 1, -np.inf)
+            cand[k:] = dp[:p_stations + 1 - k] + values[k]
+            better = cand > best
+            best[better] = cand[better]
+            arg[better] = k
+        dp = best
+        choices.append(arg)
+
+    budgets, b = [], p_stations
+    for arg in reversed(choices):
+        budgets.append(int(arg[b]))
+        b -= arg[b]
+    return float(dp[p_stations]), budgets[::-1]
+
+def solve_decomposed(coverage_matrix, demand_weights, p_stations, p_vehicles=24, time_limit=300, n_jobs=1,
+                     solver_type="auto", profile_weights=None) -> dict:
+    """
+    Solve the weighted MCLP by decomposition into independent geographic components.
+
+    Regions far apart (Abu Dhabi Island, Al Ain, the Western Region) share no coverage,
+    so the coverage matrix is block-diagonal up to permutation. Each component's best
+    coverage is computed for every budget 0..p (n_jobs processes, -1 = all cores) and
+    an exact dynamic program splits the budget, giving the monolithic optimum. Vehicles
+    only require one per open station, so they cap the station budget and are spread
+    over the chosen stations afterwards.
+
+    Returns MCLPModel-style results plus "components": per component its candidates,
+    number of demand nodes, coverage curve and allocated budget.
+    """
+    t0 = time.time()
+    full = MCLPModel(coverage_matrix, demand_weights, p_stations, p_vehicles, solver_type=solver_type,
+                     profile_weights=profile_weights)
+    weights = full._obj_weights
+    csr = sparse.csr_matrix(coverage_matrix, dtype=np.float64)
+    budget = min(p_stations, p_vehicles) if p_vehicles else p_stations
+
+    components = coverage_components(csr)
+    tasks = [(csr[d][:, c], weights[d], min(budget, len(c)), time_limit, full.solver_type) for d, c in components]
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            outputs = list(pool.map(_component_curve, *zip(*tasks)))
+    else:
+        outputs = [_component_curve(*task) for task in tasks]
+    logger.info(f"Solved {len(components)} components for budgets up to {budget} in {time.time() - t0:.2f} sec.")
+
+    _, budgets = combine_budget_curves([values for values, _, _ in outputs], budget)
+    x = np.zeros(full.n_candidates)
+    statuses = []
+    summary = []
+    for (d, c), (values, stations, comp_statuses), b in zip(components, outputs, budgets):
+        x[c[stations[b]]] = 1
+        statuses.extend(comp_statuses)
+        summary.append({
+            "candidates": [int(j) for j in c],
+            "n_demand": int(len(d)),
+            "coverage_curve": [float(v) for v in values],
+            "budget": b,
+        })
+
+    proven = all(s in PROVEN for s in statuses)
+    results = full.set_solution(x, spread_vehicles(x, p_vehicles), status="OPTIMAL" if proven else "TIME_LIMIT",
+                                solve_time=time.time() - t0)
+    results["optimality_gap"] = 0.0 if proven else float("nan")
+    results["n_components"] = len(components)
+    results["components"] = summary
+    return results
@@ -1,43 +1,111 @@
 import os
+import re
+import json
 import time
+import hashlib
 import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
-def _detect_solver() -> str:
-    """Detect available MIP solver. Checks for Gurobi and CI overrides."""
-    if os.environ.get("USE_PULP") == "1":
-        logger.info("USE_PULP=1 env variable detected. Initializing PuLP solver.")
-        return "pulp"
-    
+def _detect_solver(solver_type: str = "auto") -> str:
+    """Resolve the MIP backend (cached per process, see backends.detect_solver)."""
+    try:
+        from .backends import detect_solver
+    except ImportError:  # run as a script, e.g. python optimization/solver.py
+        from backends import detect_solver
+    return detect_solver(solver_type)
+
+def _cbc_log_bound(log_path, echo=False):
+    """Best bound reported in a CBC log (its "Upper/Lower bound" result line), or None."""
+    with open(log_path) as f:
+        log = f.read()
+    if echo:
+        logger.info(log)
+    match = re.search(r"^(?:Upper|Lower) bound:\s+(\S+)", log, re.MULTILINE)
     try:
-        import gurobipy
-        # Check if license is active
-        with gurobipy.Env(empty=True) as env:
-            env.setParam('OutputFlag', 0)
-            env.start()
-            logger.info("Gurobi license detected. Initializing Gurobi solver.")
-            return "gurobi"
-    except Exception:
-        logger.info("Gurobi not detected or not licensed. Falling back to PuLP/CBC.")
-        return "pulp"
+        return float(match.group(1)) if match else None
+    except ValueError:
+        return None
+
+class _HighsModel:
+    """
+    MILP in array form for scipy.optimize.milp (HiGHS, in memory): maximize c @ x
+    subject to lb <= A @ x <= ub, lo <= x <= hi and integrality. Constraints are
+    referenced by row index; coefficient edits are buffered and applied on the next
+    matrix() call.
+    """
+    def __init__(self, c, lo, hi, integrality, A, lb, ub):
+        from scipy import sparse
+        self.c, self.lo, self.hi, self.integrality = c, lo, hi, integrality
+        self.A = sparse.csr_matrix(A, dtype=np.float64)
+        self.lb, self.ub = np.asarray(lb, dtype=np.float64), np.asarray(ub, dtype=np.float64)
+        self._edits = {}
+
+    def add_row(self, cols, vals, lb=-np.inf, ub=np.inf) -> int:
+        from scipy import sparse
+        row = sparse.csr_matrix((np.asarray(vals, dtype=np.float64), (np.zeros(len(cols), dtype=int), cols)),
+                                shape=(1, self.A.shape[1]))
+        self.A = sparse.vstack([self.matrix(), row], format="csr")
+        self.lb, self.ub = np.append(self.lb, lb), np.append(self.ub, ub)
+        return self.A.shape[0] - 1
+
+    def set_rhs(self, row, value):
+        """Set the finite side of a one-sided constraint."""
+        side = self.ub if np.isfinite(self.ub[row]) else self.lb
+        side[row] = value
+
+    def set_coeff(self, row, col, value):
+        self._edits[(row, col)] = value
+
+    def matrix(self):
+        if self._edits:
+            A = self.A.tolil()
+            for (row, col), value in self._edits.items():
+                A[row, col] = value
+            self.A = A.tocsr()
+            self.A.eliminate_zeros()
+            self._edits = {}
+        return self.A
+
+# "weighted": maximize profile-weighted covered demand
+# "worst_profile": maximize the coverage fraction of the worst-served demand profile
+# "cvar": maximize the mean coverage fraction of the worst cvar_alpha share of profiles (scenarios)
+OBJECTIVES = ("weighted", "worst_profile", "cvar")
 
 class MCLPModel:
     """
     Maximum Coverage Location Problem (MCLP) formulation.
     Calculates optimal station placement to maximize population coverage.
+
+    demand_weights may be a (n_demand,) vector or a (n_demand, n_profiles) array of
+    time-varying demand profiles (e.g. 24 hourly profiles). coverage_matrix may be a
+    dense array (including read-only shared-memory views) or a scipy sparse matrix. With profiles, `objective`
+    selects between profile-weighted coverage (using `profile_weights`, default equal),
+    worst-profile coverage and the CVaR of coverage at level `cvar_alpha` (profiles as
+    demand scenarios with probabilities `profile_weights`). `solver_type` forces a registered backend ("auto" = best available).
+    With "highs" the model is passed to scipy.optimize.milp as sparse arrays, without LP files or a subprocess.
     """
     def __init__(self, coverage_matrix, demand_weights, p_stations, 
-                 p_vehicles=24, verbose=False):
+                 p_vehicles=24, verbose=False, objective="weighted", profile_weights=None, solver_type="auto",
+                 cvar_alpha=0.1):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{objective}', expected one of {OBJECTIVES}")
+        if not 0 < cvar_alpha <= 1:
+            raise ValueError(f"cvar_alpha must be in (0, 1], got {cvar_alpha}")
+        self.cvar_alpha = cvar_alpha
+        
         self.coverage_matrix = coverage_matrix
         self.demand_weights = demand_weights
         self.p_stations = p_stations
         self.p_vehicles = p_vehicles
         self.verbose = verbose
+        self.objective = objective
         self.n_demand, self.n_candidates = coverage_matrix.shape
         
-        self.solver_type = _detect_solver()
+        self._init_weights(demand_weights, profile_weights)
+        
+        self.solver_type = _detect_solver(solver_type)
         self.model = None
         
         # Solution attributes
@@ -46,14 +114,45 @@ class MCLPModel:
         self.v = None
         self.obj_value = None
         self.coverage_pct = None
+        self.profile_coverage_pct = None
+        self._type_nodes = {}
         self.solve_time = None
         self.optimality_gap = 0.0
+        self.obj_bound = None
         self.status = "UNDEFINED"
+        self._checkpoint_elapsed = 0.0
+
+    def _init_weights(self, demand_weights, profile_weights):
+        """Set demand profiles as (n_demand, n_profiles); a static vector is a single profile."""
+        profiles = np.asarray(demand_weights, dtype=np.float64)
+        if len(profiles) != self.n_demand:
+            raise ValueError(f"demand_weights ({len(profiles)}) must match n_demand ({self.n_demand})")
+        self.demand_weights = demand_weights
+        self._profiles = profiles[:, None] if profiles.ndim == 1 else profiles
+        self.n_profiles = self._profiles.shape[1]
+        if profile_weights is None:
+            profile_weights = np.full(self.n_profiles, 1.0 / self.n_profiles) if profiles.ndim == 2 else [1.0]
+        self.profile_weights = np.asarray(profile_weights, dtype=np.float64)
+        if len(self.profile_weights) != self.n_profiles:
+            raise ValueError(f"profile_weights ({len(self.profile_weights)}) must match n_profiles ({self.n_profiles})")
+        self._obj_weights = self._profiles @ self.profile_weights
+
+    def _covering_lists(self) -> list:
+        """Covering candidate indices of each demand node, from a dense or scipy sparse coverage matrix."""
+        from scipy import sparse
+        if sparse.issparse(self.coverage_matrix):
+            csr = sparse.csr_matrix(self.coverage_matrix, dtype=bool)
+            csr.eliminate_zeros()
+            return np.split(csr.indices, csr.indptr[1:-1])
+        rows, cols = np.nonzero(np.asarray(self.coverage_matrix))
+        return np.split(cols, np.cumsum(np.bincount(rows, minlength=self.n_demand))[:-1])
 
     def build(self):
         """Build the model for the detected solver."""
         if self.solver_type == "gurobi":
             self._build_gurobi()
+        elif self.solver_type == "highs":
+            self._build_highs()
         else:
             self._build_pulp()
 
@@ -75,28 +174,55 @@ class MCLPModel:
         if self.p_vehicles:
             v = m.addVars(self.n_candidates, vtype=GRB.INTEGER, lb=0, ub=4, name="vehicles")
         
-        # Objective: Maximize weighted coverage
-        m.setObjective(
-            gp.quicksum(float(self.demand_weights[i]) * y[i] for i in range(self.n_demand)),
-            GRB.MAXIMIZE
-        )
+        # Objective: Maximize weighted coverage (or the worst profile's coverage)
+        if self.objective == "worst_profile":
+            z = m.addVar(lb=0, ub=1, name="worst_coverage")
+            shares = self._profile_shares()
+            for k in np.flatnonzero(shares.any(axis=0)):
+                m.addConstr(
+                    z <= gp.quicksum(float(shares[i, k]) * y[i] for i in np.flatnonzero(shares[:, k])),
+                    name=f"profile_{k}"
+                )
+            m.setObjective(z, GRB.MAXIMIZE)
+        elif self.objective == "cvar":
+            # max eta - 1/alpha * sum_k p_k * u_k,  u_k >= eta - coverage_k,  u_k >= 0
+            eta = m.addVar(lb=0, ub=1, name="coverage_var")
+            u = m.addVars(self.n_profiles, lb=0, name="shortfall")
+            shares = self._profile_shares()
+            for k in np.flatnonzero(shares.any(axis=0)):
+                m.addConstr(
+                    u[k] >= eta - gp.quicksum(float(shares[i, k]) * y[i] for i in np.flatnonzero(shares[:, k])),
+                    name=f"cvar_{k}"
+                )
+            probs = self._scenario_probs() / self.cvar_alpha
+            m.setObjective(eta - gp.quicksum(float(probs[k]) * u[k] for k in range(self.n_profiles)), GRB.MAXIMIZE)
+        else:
+            m.setObjective(
+                gp.quicksum(float(self._obj_weights[i]) * y[i] for i in range(self.n_demand)),
+                GRB.MAXIMIZE
+            )
         
         # Constraint 1: Coverage logic
         # sum_j a_ij * x_j >= y_i
         # demand node i is covered only if at least one station covering it is open
-        for i in range(self.n_demand):
-            covering_j = [j for j in range(self.n_candidates) if self.coverage_matrix[i, j]]
-            if covering_j:
-                m.addConstr(gp.quicksum(x[j] for j in covering_j) >= y[i], name=f"cov_{i}")
-            else:
-                m.addConstr(y[i] == 0, name=f"unreachable_{i}")
+        # (an unreachable node gets 0 >= y_i, so later coverage changes only edit coefficients)
+        self._cov_constrs = []
+        for i, covering_j in enumerate(self._covering_lists()):
+            self._cov_constrs.append(
+                m.addConstr(gp.quicksum(x[int(j)] for j in covering_j) >= y[i], name=f"cov_{i}")
+            )
                 
         # Constraint 2: Station budget
-        m.addConstr(gp.quicksum(x[j] for j in range(self.n_candidates)) <= self.p_stations, name="budget")
+        self._budget_constr = m.addConstr(
+            gp.quicksum(x[j] for j in range(self.n_candidates)) <= self.p_stations, name="budget"
+        )
         
         # Constraint 3: Vehicle constraints
+        self._v_budget_constr = None
         if self.p_vehicles:
-            m.addConstr(gp.quicksum(v[j] for j in range(self.n_candidates)) <= self.p_vehicles, name="v_budget")
+            self._v_budget_constr = m.addConstr(
+                gp.quicksum(v[j] for j in range(self.n_candidates)) <= self.p_vehicles, name="v_budget"
+            )
             for j in range(self.n_candidates):
                 m.addConstr(v[j] <= 4 * x[j], name=f"v_max_{j}")
                 m.addConstr(v[j] >= 1 * x[j], name=f"v_min_{j}")
@@ -121,20 +247,37 @@ class MCLPModel:
             v = [pulp.LpVariable(f"v_{j}", lowBound=0, upBound=4, cat="Integer") for j in range(self.n_candidates)]
             
         # Objective
-        prob += pulp.lpSum(float(self.demand_weights[i]) * y[i] for i in range(self.n_demand))
+        if self.objective == "worst_profile":
+            z = pulp.LpVariable("worst_coverage", lowBound=0, upBound=1)
+            prob += z
+            shares = self._profile_shares()
+            for k in np.flatnonzero(shares.any(axis=0)):
+                prob += z <= pulp.lpSum(float(shares[i, k]) * y[i] for i in np.flatnonzero(shares[:, k]))
+        elif self.objective == "cvar":
+            eta = pulp.LpVariable("coverage_var", lowBound=0, upBound=1)
+            u = [pulp.LpVariable(f"shortfall_{k}", lowBound=0) for k in range(self.n_profiles)]
+            probs = self._scenario_probs() / self.cvar_alpha
+            prob += eta - pulp.lpSum(float(probs[k]) * u[k] for k in range(self.n_profiles))
+            shares = self._profile_shares()
+            for k in np.flatnonzero(shares.any(axis=0)):
+                prob += u[k] >= eta - pulp.lpSum(float(shares[i, k]) * y[i] for i in np.flatnonzero(shares[:, k]))
+        else:
+            prob += pulp.lpSum(float(self._obj_weights[i]) * y[i] for i in range(self.n_demand))
         
         # Constraints
-        for i in range(self.n_demand):
-            covering_j = [j for j in range(self.n_candidates) if self.coverage_matrix[i, j]]
-            if covering_j:
-                prob += pulp.lpSum(x[j] for j in covering_j) >= y[i]
-            else:
-                prob += y[i] == 0
+        self._cov_constrs = []
+        for i, covering_j in enumerate(self._covering_lists()):
+            constr = pulp.lpSum(x[j] for j in covering_j) >= y[i]
+            prob.addConstraint(constr, f"cov_{i}")
+            self._cov_constrs.append(constr)
                 
-        prob += pulp.lpSum(x[j] for j in range(self.n_candidates)) <= self.p_stations
+        self._budget_constr = pulp.lpSum(x[j] for j in range(self.n_candidates)) <= self.p_stations
+        prob.addConstraint(self._budget_constr, "budget")
         
+        self._v_budget_constr = None
         if self.p_vehicles:
-            prob += pulp.lpSum(v[j] for j in range(self.n_candidates)) <= self.p_vehicles
+            self._v_budget_constr = pulp.lpSum(v[j] for j in range(self.n_candidates)) <= self.p_vehicles
+            prob.addConstraint(self._v_budget_constr, "v_budget")
             for j in range(self.n_candidates):
                 prob += v[j] <= 4 * x[j]
                 prob += v[j] >= 1 * x[j]
@@ -144,16 +287,284 @@ class MCLPModel:
         self._y_vars = y
         self._v_vars = v
 
-    def solve(self, time_limit=300):
-        """Solve the model."""
+    def _build_highs(self):
+        """
+        Build the constraint matrix, bounds and integrality arrays directly (no modelling
+        layer) for scipy.optimize.milp. Variables are ordered x, y, v, then the objective
+        auxiliaries; the variable handles are column ranges and constraints row indices.
+        """
+        from scipy import sparse
+        n_c, n_d = self.n_candidates, self.n_demand
+        n_v = n_c if self.p_vehicles else 0
+        self._x_vars = range(0, n_c)
+        self._y_vars = range(n_c, n_c + n_d)
+        self._v_vars = range(n_c + n_d, n_c + n_d + n_v) if n_v else None
+        n_base = n_c + n_d + n_v
+
+        # Coverage rows: sum_j a_ij * x_j - y_i >= 0 (rows 0..n_demand-1)
+        lists = self._covering_lists()
+        counts = np.array([len(c) for c in lists])
+        rows = [np.repeat(np.arange(n_d), counts), np.arange(n_d)]
+        cols = [np.concatenate(lists).astype(int) if n_d else np.zeros(0, dtype=int), n_c + np.arange(n_d)]
+        vals = [np.ones(counts.sum()), -np.ones(n_d)]
+        lb, ub = [np.zeros(n_d)], [np.full(n_d, np.inf)]
+        n_rows = n_d
+
+        def add_rows(r, c, v, lower, upper):
+            nonlocal n_rows
+            rows.append(n_rows + np.asarray(r))
+            cols.append(np.asarray(c))
+            vals.append(np.asarray(v, dtype=float))
+            lb.append(np.asarray(lower, dtype=float)); ub.append(np.asarray(upper, dtype=float))
+            n_rows += len(lb[-1])
+            return n_rows - len(lb[-1])
+
+        c = np.zeros(n_base)
+        lo, hi = np.zeros(n_base), np.ones(n_base)
+        if n_v:
+            hi[n_base - n_v:] = 4
+        integrality = np.ones(n_base)
+
+        if self.objective in ("worst_profile", "cvar"):
+            shares = self._profile_shares()
+            profiles = np.flatnonzero(shares.any(axis=0))
+            node, prof = np.nonzero(shares[:, profiles])
+            if self.objective == "worst_profile":
+                # z - sum_i s_ik * y_i <= 0
+                z = n_base
+                c = np.append(c, 1.0)
+                lo, hi, integrality = np.append(lo, 0), np.append(hi, 1), np.append(integrality, 0)
+                add_rows(np.concatenate([prof, np.arange(len(profiles))]),
+                         np.concatenate([n_c + node, np.full(len(profiles), z)]),
+                         np.concatenate([-shares[node, profiles[prof]], np.ones(len(profiles))]),
+                         np.full(len(profiles), -np.inf), np.zeros(len(profiles)))
+            else:
+                # max eta - 1/alpha * sum_k p_k * u_k;  u_k - eta + sum_i s_ik * y_i >= 0
+                eta, u = n_base, n_base + 1 + np.arange(self.n_profiles)
+                c = np.concatenate([c, [1.0], -self._scenario_probs() / self.cvar_alpha])
+                lo = np.concatenate([lo, np.zeros(1 + self.n_profiles)])
+                hi = np.concatenate([hi, [1.0], np.full(self.n_profiles, np.inf)])
+                integrality = np.concatenate([integrality, np.zeros(1 + self.n_profiles)])
+                k, ones = np.arange(len(profiles)), np.ones(len(profiles))
+                add_rows(np.concatenate([prof, k, k]),
+                         np.concatenate([n_c + node, u[profiles], np.full(len(profiles), eta)]),
+                         np.concatenate([shares[node, profiles[prof]], ones, -ones]),
+                         np.zeros(len(profiles)), np.full(len(profiles), np.inf))
+        else:
+            c[n_c:n_c + n_d] = self._obj_weights
+
+        self._cov_constrs = list(range(n_d))
+        self._budget_constr = add_rows(np.zeros(n_c), np.arange(n_c), np.ones(n_c), [-np.inf], [self.p_stations])
+        self._v_budget_constr = None
+        if n_v:
+            v = np.arange(n_base - n_v, n_base)
+            self._v_budget_constr = add_rows(np.zeros(n_v), v, np.ones(n_v), [-np.inf], [self.p_vehicles])
+            j = np.arange(n_c)
+            # v_j - 4 x_j <= 0 and v_j - x_j >= 0
+            add_rows(np.concatenate([j, j]), np.concatenate([v, j]), np.concatenate([np.ones(n_c), np.full(n_c, -4.0)]),
+                     np.full(n_c, -np.inf), np.zeros(n_c))
+            add_rows(np.concatenate([j, j]), np.concatenate([v, j]), np.concatenate([np.ones(n_c), -np.ones(n_c)]),
+                     np.zeros(n_c), np.full(n_c, np.inf))
+
+        A = sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                              shape=(n_rows, len(c)))
+        self.model = _HighsModel(c, lo, hi, integrality, A, np.concatenate(lb), np.concatenate(ub))
+
+    def add_zone_type_constraints(self, zone_types, min_coverage=0.0):
+        """
+        Add one minimum-coverage constraint per zone type to the built model:
+        sum_{i in type t} w_i * y_i >= eps_t * W_t.
+        zone_types: (n_demand,) labels, e.g. demand nodes' zone_type.
+        The right-hand sides can later be changed in place with set_zone_type_minimum().
+        """
+        if self.model is None:
+            self.build()
+        
+        zone_types = np.asarray(zone_types)
+        self.zone_type_labels = sorted(np.unique(zone_types).tolist())
+        self._type_nodes = {}
+        self._type_constrs = {}
+        
+        for k, t in enumerate(self.zone_type_labels):
+            idx = np.flatnonzero(zone_types == t)
+            w = self._obj_weights[idx]
+            self._type_nodes[t] = (idx, float(w.sum()))
+            
+            if self.solver_type == "highs":
+                self._type_constrs[t] = self.model.add_row([self._y_vars[int(i)] for i in idx], w, lb=0.0)
+            elif self.solver_type == "gurobi":
+                import gurobipy as gp
+                self._type_constrs[t] = self.model.addConstr(
+                    gp.quicksum(float(w_i) * self._y_vars[int(i)] for i, w_i in zip(idx, w)) >= 0.0,
+                    name=f"ztype_{k}"
+                )
+            else:
+                import pulp
+                constr = pulp.lpSum(float(w_i) * self._y_vars[int(i)] for i, w_i in zip(idx, w)) >= 0.0
+                self.model.addConstraint(constr, f"ztype_{k}")
+                self._type_constrs[t] = constr
+        
+        self.set_zone_type_minimum(min_coverage)
+
+    def set_zone_type_minimum(self, min_coverage):
+        """
+        Change the zone-type minimum coverage (fraction of the type's demand) in place.
+        min_coverage: a single fraction for every type, or {zone_type: fraction}.
+        """
+        self._type_min = min_coverage
+        for t, constr in self._type_constrs.items():
+            eps = min_coverage.get(t, 0.0) if isinstance(min_coverage, dict) else min_coverage
+            self._set_rhs(constr, eps * self._type_nodes[t][1])
+
+    def _set_rhs(self, constr, value):
+        """Modify a constraint's right-hand side without rebuilding the model."""
+        if self.solver_type == "gurobi":
+            constr.RHS = value
+        elif self.solver_type == "highs":
+            self.model.set_rhs(constr, value)
+        else:
+            constr.changeRHS(value)
+
+    def _set_coeff(self, constr, var, value):
+        """Modify (or, with value 0, remove) one coefficient of a built constraint."""
+        if self.solver_type == "gurobi":
+            self.model.chgCoeff(constr, var, value)
+        elif self.solver_type == "highs":
+            self.model.set_coeff(constr, var, value)
+        else:
+            # PuLP >= 3 keeps the coefficients on constr.expr; older versions on the constraint itself
+            expr = getattr(constr, "expr", constr)
+            if value:
+                expr[var] = value
+            else:
+                expr.pop(var, None)
+
+    # Incremental updates: change parameters of the built model, then solve(warm_start=True)
+
+    def set_station_budget(self, p_stations):
+        """Change the station budget (budget constraint right-hand side)."""
+        self.p_stations = p_stations
+        if self.model is not None:
+            self._set_rhs(self._budget_constr, p_stations)
+
+    def set_vehicle_budget(self, p_vehicles):
+        """Change the vehicle budget (vehicle budget right-hand side)."""
+        if self.model is not None:
+            if self._v_budget_constr is None:
+                raise ValueError("Model was built without vehicle allocation (p_vehicles=0); rebuild instead.")
+            self._set_rhs(self._v_budget_constr, p_vehicles)
+        self.p_vehicles = p_vehicles
+
+    def set_coverage_matrix(self, coverage_matrix) -> int:
+        """
+        Replace the coverage matrix, editing only the coverage-constraint coefficients
+        that differ from the current matrix. Returns the number of changed coefficients.
+        """
+        from scipy import sparse
+        new, old = coverage_matrix, self.coverage_matrix
+        if new.shape != (self.n_demand, self.n_candidates):
+            raise ValueError(f"Coverage matrix shape {new.shape} must stay {(self.n_demand, self.n_candidates)}")
+        if sparse.issparse(new) or sparse.issparse(old):
+            diff = sparse.csr_matrix(new, dtype=np.int8) - sparse.csr_matrix(old, dtype=np.int8)
+            diff.eliminate_zeros()
+            diff = diff.tocoo()
+            rows, cols, added = diff.row, diff.col, diff.data > 0
+        else:
+            new = np.asarray(new, dtype=bool)
+            rows, cols = np.nonzero(new != np.asarray(old, dtype=bool))
+            added = new[rows, cols]
+        if self.model is not None:
+            for i, j, a in zip(rows, cols, added):
+                self._set_coeff(self._cov_constrs[int(i)], self._x_vars[int(j)], 1.0 if a else 0.0)
+        self.coverage_matrix = new
+        return len(rows)
+
+    def set_threshold(self, travel_time_matrix, threshold_min) -> int:
+        """Change the response-time threshold, given the (n_demand, n_candidates) travel times."""
+        return self.set_coverage_matrix(np.asarray(travel_time_matrix) <= threshold_min)
+
+    def set_demand_weights(self, demand_weights, profile_weights=None):
+        """
+        Change demand weights (or profiles) through objective coefficients, and
+        zone-type constraint coefficients if present. Only for the "weighted" objective.
+        """
+        if self.model is not None and self.objective != "weighted":
+            raise ValueError(f"Weights of a built '{self.objective}' model cannot be updated; rebuild instead.")
+        self._init_weights(demand_weights, profile_weights)
+        if self.model is None:
+            return
+
+        for i in range(self.n_demand):
+            w = float(self._obj_weights[i])
+            if self.solver_type == "gurobi":
+                self._y_vars[i].Obj = w
+            elif self.solver_type == "highs":
+                self.model.c[self._y_vars[i]] = w
+            else:
+                self.model.objective[self._y_vars[i]] = w
+
+        for t, (idx, _) in self._type_nodes.items():
+            w = self._obj_weights[idx]
+            for i, w_i in zip(idx, w):
+                self._set_coeff(self._type_constrs[t], self._y_vars[int(i)], float(w_i))
+            self._type_nodes[t] = (idx, float(w.sum()))
+        if self._type_nodes:
+            self.set_zone_type_minimum(self._type_min)
+
+    def zone_type_coverage(self) -> dict:
+        """Weighted coverage share of each zone type in the current solution."""
+        return {
+            t: (float(self.y[idx] @ self._obj_weights[idx] / total) if total > 0 else 1.0)
+            for t, (idx, total) in self._type_nodes.items()
+        }
+
+    def _scenario_probs(self):
+        """Profile weights normalized to scenario probabilities."""
+        return self.profile_weights / self.profile_weights.sum()
+
+    def _profile_shares(self):
+        """Each node's share of its profile's total demand, (n_demand, n_profiles)."""
+        totals = self._profiles.sum(axis=0)
+        return self._profiles / np.where(totals > 0, totals, 1.0)
+
+    def solve(self, time_limit=300, warm_start=False, checkpoint_path=None, checkpoint_interval=30.0, resume=False,
+              threads=None, checkpoint_slices=False):
+        """
+        Solve the model.
+        warm_start: start from the previous solution when re-solving a modified model.
+        threads: solver threads (None = backend default: all cores for Gurobi, 1 for CBC;
+        not settable for HiGHS, which also ignores warm_start).
+        checkpoint_path: periodically (every checkpoint_interval seconds) save the best
+        incumbent and bound to this small JSON file, tied to input_hash(). CBC and HiGHS
+        only write it when the solve ends; checkpoint_slices makes CBC checkpoint every
+        interval by solving in restarted slices, at the cost of its bound progress.
+        resume: if checkpoint_path exists, warm start from it and spend time_limit more
+        seconds, e.g. to continue an interrupted run or extend a TIME_LIMIT result.
+        A checkpoint written for different inputs raises ValueError.
+        """
         if self.model is None:
             self.build()
+        if checkpoint_path and resume and os.path.exists(checkpoint_path):
+            self.load_checkpoint(checkpoint_path)
+            warm_start = True
+        elif checkpoint_path:
+            self._checkpoint_hash = self.input_hash()
+            self._checkpoint_elapsed = 0.0
             
         t0 = time.time()
+        has_solution = True
         
         if self.solver_type == "gurobi":
+            if warm_start and self.x is not None:
+                self._set_start()
+            
             self.model.setParam("TimeLimit", time_limit)
-            self.model.optimize()
+            if threads is not None:
+                self.model.setParam("Threads", threads)
+            if checkpoint_path:
+                self.model.optimize(self._gurobi_checkpoint_callback(checkpoint_path, checkpoint_interval, t0))
+            else:
+                self.model.optimize()
             
             # Extract status
             from gurobipy import GRB
@@ -161,35 +572,254 @@ class MCLPModel:
                 self.status = "OPTIMAL"
             elif self.model.status == GRB.TIME_LIMIT:
                 self.status = "TIME_LIMIT"
+            elif self.model.status == GRB.INFEASIBLE:
+                self.status = "INFEASIBLE"
             else:
                 self.status = str(self.model.status)
             
             # Extract values
-            self.x = np.array([self._x_vars[j].X for j in range(self.n_candidates)])
-            self.y = np.array([self._y_vars[i].X for i in range(self.n_demand)])
-            if self._v_vars:
-                self.v = np.array([self._v_vars[j].X for j in range(self.n_candidates)])
-            self.obj_value = self.model.objVal
-            self.optimality_gap = self.model.mipGap
+            has_solution = self.model.SolCount > 0
+            if has_solution:
+                self.x = np.array([self._x_vars[j].X for j in range(self.n_candidates)])
+                self.y = np.array([self._y_vars[i].X for i in range(self.n_demand)])
+                if self._v_vars:
+                    self.v = np.array([self._v_vars[j].X for j in range(self.n_candidates)])
+                self.obj_value = self.model.objVal
+                self.optimality_gap = self.model.mipGap
+                self.obj_bound = self.model.ObjBound
+            
+        elif self.solver_type == "highs":
+            from scipy.optimize import milp, Bounds, LinearConstraint
+            # threads and warm_start do not apply: scipy.optimize.milp exposes neither
+            m = self.model
+            res = milp(-m.c, integrality=m.integrality, bounds=Bounds(m.lo, m.hi),
+                       constraints=LinearConstraint(m.matrix(), m.lb, m.ub),
+                       options={"time_limit": time_limit, "disp": self.verbose})
+            # status 1 is the time (or node) limit, with or without an incumbent
+            self.status = {0: "OPTIMAL", 1: "TIME_LIMIT", 2: "INFEASIBLE"}.get(res.status, res.message)
+            has_solution = res.x is not None
+            if has_solution:
+                self.x = res.x[self._x_vars.start:self._x_vars.stop]
+                self.y = res.x[self._y_vars.start:self._y_vars.stop]
+                if self._v_vars:
+                    self.v = res.x[self._v_vars.start:self._v_vars.stop]
+                self.obj_value = -res.fun
+                self.optimality_gap = res.mip_gap if res.mip_gap is not None else 0.0
+                self.obj_bound = -res.mip_dual_bound if res.mip_dual_bound is not None else None
             
         else:
             import pulp
-            solver = pulp.PULP_CBC_CMD(timeLimit=time_limit, msg=self.verbose)
-            self.model.solve(solver)
-            
-            self.status = pulp.LpStatus[self.model.status]
-            
-            self.x = np.array([pulp.value(self._x_vars[j]) for j in range(self.n_candidates)])
-            self.y = np.array([pulp.value(self._y_vars[i]) for i in range(self.n_demand)])
-            if self._v_vars:
-                self.v = np.array([pulp.value(self._v_vars[j]) for j in range(self.n_candidates)])
-            self.obj_value = pulp.value(self.model.objective)
-            
+            import tempfile
+            # CBC has no incumbent callbacks, so a solve is checkpointed when it ends. With
+            # checkpoint_slices, it runs in slices of checkpoint_interval seconds instead, each
+            # warm-started from the previous incumbent; a cold weighted solve is then seeded with
+            # the greedy solution so the first slice is short too, and if CBC rejects the seed
+            # the next slice gets all the remaining time. Every slice restarts branch and bound,
+            # so slicing trades bound progress for regular checkpoints.
+            sliced = bool(checkpoint_path) and checkpoint_slices
+            remaining = time_limit
+            warm = warm_start and self.x is not None
+            if sliced and not warm and self.objective == "weighted":
+                self._seed_greedy()
+                warm = True
+            if warm:
+                self._set_start()
+            log_fd, log_path = tempfile.mkstemp(suffix=".log")
+            os.close(log_fd)
+            self.obj_bound = None
+            self.optimality_gap = 0.0
+            try:
+                while True:
+                    slice_limit = min(remaining, checkpoint_interval) if sliced and warm else remaining
+                    t_slice = time.time()
+                    self.model.solve(pulp.PULP_CBC_CMD(timeLimit=slice_limit, msg=self.verbose, warmStart=warm,
+                                                       threads=threads, logPath=log_path))
+                    remaining -= time.time() - t_slice
+                    bound = _cbc_log_bound(log_path, self.verbose)
+                    # Every slice bounds the same (maximization) problem: keep the tightest
+                    if bound is not None:
+                        self.obj_bound = bound if self.obj_bound is None else min(self.obj_bound, bound)
+                    
+                    # A time limit without incumbent is "Not Solved" (values are LP leftovers);
+                    # with an incumbent it is "Optimal" with an integer-feasible solution
+                    has_solution = self.model.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible)
+                    if self.model.sol_status == pulp.LpSolutionIntegerFeasible:
+                        self.status = "TIME_LIMIT"
+                    else:
+                        self.status = pulp.LpStatus[self.model.status]
+                    if has_solution:
+                        self.x = np.array([pulp.value(self._x_vars[j]) for j in range(self.n_candidates)])
+                        self.y = np.array([pulp.value(self._y_vars[i]) for i in range(self.n_demand)])
+                        if self._v_vars:
+                            self.v = np.array([pulp.value(self._v_vars[j]) for j in range(self.n_candidates)])
+                        self.obj_value = pulp.value(self.model.objective)
+                        if self.status == "Optimal":
+                            self.obj_bound = self.obj_value
+                        if self.obj_bound is not None:
+                            self.optimality_gap = abs(self.obj_bound - self.obj_value) / max(abs(self.obj_value), 1e-10)
+                        if checkpoint_path:
+                            self._write_checkpoint(checkpoint_path, self.x, self.v, self.obj_value, self.obj_bound,
+                                                   self.status, time.time() - t0)
+                    if (not sliced or remaining <= 0 or self.status not in ("TIME_LIMIT", "Not Solved")
+                            or not (has_solution or warm)):
+                        break
+                    warm = has_solution
+            finally:
+                os.remove(log_path)
+        
         self.solve_time = time.time() - t0
-        self.coverage_pct = self.obj_value / np.sum(self.demand_weights)
+        if checkpoint_path and has_solution and self.solver_type in ("gurobi", "highs"):
+            self._write_checkpoint(checkpoint_path, self.x, self.v, self.obj_value, self.obj_bound,
+                                   self.status, self.solve_time)
+        if not has_solution:
+            logger.warning(f"No feasible solution found (status: {self.status}).")
+            self.x = np.zeros(self.n_candidates)
+            self.y = np.zeros(self.n_demand)
+            self.v = np.zeros(self.n_candidates) if self._v_vars else None
+            self.obj_value = float("nan")
+            
+        if self.objective in ("worst_profile", "cvar"):
+            self.coverage_pct = self.obj_value
+        else:
+            self.coverage_pct = self.obj_value / np.sum(self._obj_weights)
+        self.profile_coverage_pct = self.y @ self._profile_shares()
+        
+        return self._get_results()
+
+    # Checkpoints: best incumbent and bound of a (possibly interrupted) solve
+
+    def input_hash(self) -> str:
+        """SHA-1 of everything that defines the feasible set and objective of the model."""
+        from scipy import sparse
+        # Hash the coverage structure, so dense and sparse inputs of the same matrix agree
+        csr = sparse.csr_matrix(self.coverage_matrix if sparse.issparse(self.coverage_matrix)
+                                else np.asarray(self.coverage_matrix), dtype=bool)
+        csr.eliminate_zeros()
+        csr.sort_indices()
+        h = hashlib.sha1()
+        h.update(csr.indptr.astype(np.int64).tobytes())
+        h.update(csr.indices.astype(np.int64).tobytes())
+        h.update(np.ascontiguousarray(self._profiles).tobytes())
+        h.update(np.ascontiguousarray(self.profile_weights).tobytes())
+        type_min = getattr(self, "_type_min", None)
+        h.update(repr((self.coverage_matrix.shape, self.p_stations, self.p_vehicles, self.objective,
+                       self.cvar_alpha, sorted(type_min.items()) if isinstance(type_min, dict) else type_min,
+                       [(t, idx.tolist()) for t, (idx, _) in sorted(self._type_nodes.items())])).encode())
+        return h.hexdigest()
+
+    def _write_checkpoint(self, path, x, v, obj_value, obj_bound, status, elapsed):
+        open_idx = np_where_binary(x)
+        checkpoint = {
+            "input_hash": self._checkpoint_hash,
+            "solver": self.solver_type,
+            "status": status,
+            "obj_value": float(obj_value),
+            "obj_bound": None if obj_bound is None else float(obj_bound),
+            "open_stations": [int(j) for j in open_idx],
+            "vehicles_per_station": {} if v is None else {str(int(j)): int(round(v[j])) for j in open_idx},
+            "elapsed_sec": self._checkpoint_elapsed + float(elapsed),
+        }
+        # Write-then-rename so an interrupted write never leaves a truncated checkpoint
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp, path)
+
+    def load_checkpoint(self, path) -> dict:
+        """
+        Load a checkpoint as the warm start of the next solve. Raises ValueError if it was
+        written for different inputs.
+        """
+        if self.model is None:
+            self.build()
+        with open(path) as f:
+            checkpoint = json.load(f)
+        self._checkpoint_hash = self.input_hash()
+        if checkpoint.get("input_hash") != self._checkpoint_hash:
+            raise ValueError(f"Checkpoint {path} was written for different model inputs; refusing to resume")
         
+        self.x = np.zeros(self.n_candidates)
+        self.x[checkpoint["open_stations"]] = 1
+        self.y = self._covered(self.x)
+        if self._v_vars:
+            self.v = np.zeros(self.n_candidates)
+            for j, n in checkpoint["vehicles_per_station"].items():
+                self.v[int(j)] = n
+        self._checkpoint_elapsed = checkpoint["elapsed_sec"]
+        logger.info(f"Resuming from checkpoint {path}: objective {checkpoint['obj_value']:.4f} "
+                    f"after {checkpoint['elapsed_sec']:.1f} sec ({checkpoint['status']})")
+        return checkpoint
+
+    def _covered(self, x) -> np.ndarray:
+        """Coverage indicator y of the demand nodes for station vector x."""
+        from scipy import sparse
+        cov = self.coverage_matrix if sparse.issparse(self.coverage_matrix) else np.asarray(self.coverage_matrix)
+        counts = cov @ (np.asarray(x) > 0.5).astype(np.int32)
+        return (np.asarray(counts).ravel() > 0).astype(float)
+
+    def set_solution(self, x, v=None, status="HEURISTIC", solve_time=0.0) -> dict:
+        """
+        Adopt an externally found solution (e.g. a heuristic incumbent) for the "weighted"
+        objective: results are computed as for a solve and it becomes the warm start.
+        """
+        if self.objective != "weighted":
+            raise ValueError(f"set_solution supports the 'weighted' objective, not '{self.objective}'")
+        self.x = np.asarray(x, dtype=float)
+        self.y = self._covered(self.x)
+        self.v = None if v is None else np.asarray(v, dtype=float)
+        self.obj_value = float(self.y @ self._obj_weights)
+        self.coverage_pct = self.obj_value / np.sum(self._obj_weights)
+        self.profile_coverage_pct = self.y @ self._profile_shares()
+        self.status = status
+        self.solve_time = solve_time
+        self.optimality_gap = float("nan")
         return self._get_results()
 
+    def _seed_greedy(self):
+        """Set the greedy MCLP solution (see portfolio.greedy_mclp) as the current x, y and v."""
+        try:
+            from .portfolio import greedy_mclp
+        except ImportError:  # run as a script, e.g. python optimization/solver.py
+            from portfolio import greedy_mclp
+        self.x, v = greedy_mclp(self.coverage_matrix, self._obj_weights, self.p_stations,
+                                self.p_vehicles if self._v_vars else 0)
+        self.y = self._covered(self.x)
+        self.v = v if self._v_vars else None
+
+    def _set_start(self):
+        """Pass the current solution (self.x, y, v) to the solver as a MIP start."""
+        if self.solver_type == "highs":
+            # scipy.optimize.milp takes no MIP start
+            return
+        starts = [(self._x_vars, self.x), (self._y_vars, self.y)]
+        if self._v_vars and self.v is not None:
+            starts.append((self._v_vars, self.v))
+        for variables, values in starts:
+            for k, value in enumerate(values):
+                if self.solver_type == "gurobi":
+                    variables[k].Start = value
+                else:
+                    variables[k].setInitialValue(round(value))
+
+    def _gurobi_checkpoint_callback(self, path, interval, t0):
+        """Gurobi callback saving the incumbent at most every `interval` seconds (and on exit via solve)."""
+        from gurobipy import GRB
+        state = {"last": t0, "pending": None}
+        
+        def callback(model, where):
+            if where == GRB.Callback.MIPSOL:
+                x = model.cbGetSolution([self._x_vars[j] for j in range(self.n_candidates)])
+                v = model.cbGetSolution([self._v_vars[j] for j in range(self.n_candidates)]) if self._v_vars else None
+                state["pending"] = (np.array(x), None if v is None else np.array(v),
+                                    model.cbGet(GRB.Callback.MIPSOL_OBJ), model.cbGet(GRB.Callback.MIPSOL_OBJBND))
+            elif where != GRB.Callback.MIP:
+                return
+            now = time.time()
+            if state["pending"] is not None and now - state["last"] >= interval:
+                self._write_checkpoint(path, *state["pending"], "RUNNING", now - t0)
+                state["last"], state["pending"] = now, None
+        return callback
+
     def _get_results(self):
         """Build results dictionary."""
         open_stations = np_where_binary(self.x)
@@ -197,8 +827,9 @@ class MCLPModel:
         if self.v is not None:
             vehicles_per_station = {int(j): int(round(self.v[j])) for j in open_stations}
             
-        return {
+        results = {
             "solver": self.solver_type,
+            "objective": self.objective,
             "status": self.status,
             "obj_value": float(self.obj_value),
             "coverage_pct": float(self.coverage_pct),
@@ -208,6 +839,13 @@ class MCLPModel:
             "solve_time_sec": float(self.solve_time),
             "optimality_gap": float(self.optimality_gap)
         }
+        if self._type_nodes:
+            results["zone_type_coverage"] = self.zone_type_coverage()
+        if self.n_profiles > 1:
+            results["profile_coverage_pct"] = [float(c) for c in self.profile_coverage_pct]
+        if self.objective == "cvar":
+            results["cvar_alpha"] = self.cvar_alpha
+        return results
 
     def summary(self):
         """Return a formatted string summary of the solution."""
@@ -229,9 +867,12 @@ def np_where_binary(arr, threshold=0.5):
     """Utility to get indices of binary 1s."""
     return np.where(arr > threshold)[0]
 
-def run_mclp(coverage_matrix, demand_weights, p_stations=12, p_vehicles=24, verbose=False):
+def run_mclp(coverage_matrix, demand_weights, p_stations=12, p_vehicles=24, verbose=False,
+             objective="weighted", profile_weights=None, solver_type="auto", cvar_alpha=0.1):
     """Ease-of-use wrapper for the model."""
-    model = MCLPModel(coverage_matrix, demand_weights, p_stations, p_vehicles, verbose)
+    model = MCLPModel(coverage_matrix, demand_weights, p_stations, p_vehicles, verbose,
+                      objective=objective, profile_weights=profile_weights, solver_type=solver_type,
+                      cvar_alpha=cvar_alpha)
     model.solve()
     return model
 
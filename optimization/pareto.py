@@ -0,0 +1,97 @@
+import time
+import logging
+import numpy as np
+import pandas as pd
+
+from .mclp_model import MCLPModel
+
+logger = logging.getLogger(__name__)
+
+# Statuses proving infeasibility (Gurobi/HiGHS and PuLP spellings)
+INFEASIBLE_STATUSES = ("INFEASIBLE", "Infeasible")
+
+def coverage_equity_frontier(coverage_matrix, demand_weights, zone_types, p_stations, p_vehicles=24,
+                             epsilons=None, time_limit=300, verbose=False) -> pd.DataFrame:
+    """
+    Epsilon-constraint trade-off curve between total coverage and zone-type equity.
+
+    For each epsilon, maximizes total weighted coverage subject to every zone type
+    covering at least epsilon of its own demand. The model is built once; each
+    frontier point only changes the zone-type constraint right-hand sides and is
+    warm-started from the previous point. The sweep stops at the first infeasible
+    epsilon, since every larger epsilon is infeasible too; a point that hits the time
+    limit without a solution is recorded with NaN coverage and the sweep continues.
+
+    zone_types: (n_demand,) zone type label per demand node.
+    Returns one row per solved point with total coverage, per-type coverage,
+    the worst type's coverage and solve time.
+    """
+    if epsilons is None:
+        epsilons = np.linspace(0.0, 1.0, 21)
+
+    t0 = time.time()
+    model = MCLPModel(coverage_matrix, demand_weights, p_stations, p_vehicles, verbose=verbose)
+    model.build()
+    model.add_zone_type_constraints(zone_types)
+    logger.info(f"Built frontier model in {time.time() - t0:.2f} sec.")
+
+    rows = []
+    for eps in epsilons:
+        model.set_zone_type_minimum(float(eps))
+        res = model.solve(time_limit=time_limit, warm_start=bool(rows))
+
+        if res["status"] in INFEASIBLE_STATUSES:
+            logger.info(f"Epsilon {eps:.2f} infeasible with p={p_stations}; frontier complete.")
+            break
+        if np.isnan(res["obj_value"]):
+            # Time limit without incumbent: no proof of infeasibility, so keep sweeping
+            logger.warning(f"eps={eps:.2f}: no solution within {time_limit} sec ({res['status']}).")
+            rows.append({"epsilon": float(eps), "status": res["status"], "coverage_pct": np.nan,
+                         "min_type_coverage": np.nan, "open_stations": [], "solve_time_sec": res["solve_time_sec"]})
+            continue
+
+        type_cov = res["zone_type_coverage"]
+        rows.append({
+            "epsilon": float(eps),
+            "status": res["status"],
+            "coverage_pct": res["coverage_pct"],
+            "min_type_coverage": min(type_cov.values()),
+            **{f"coverage_{t}": c for t, c in type_cov.items()},
+            "open_stations": res["open_stations"],
+            "solve_time_sec": res["solve_time_sec"],
+        })
+        logger.info(f"eps={eps:.2f}: coverage {res['coverage_pct']:.2%}, "
+                    f"worst type {rows[-1]['min_type_coverage']:.2%} ({res['solve_time_sec']:.2f} sec)")
+
+    return pd.DataFrame(rows)
+
+def station_budget_sweep(coverage_matrix, demand_weights, budgets, p_vehicles=24, time_limit=300,
+                         verbose=False) -> pd.DataFrame:
+    """
+    Coverage as a function of the station budget. The model is built once; each
+    budget only changes the budget constraint's right-hand side and is warm-started
+    from the previous budget's solution.
+    """
+    budgets = sorted(budgets)
+    t0 = time.time()
+    model = MCLPModel(coverage_matrix, demand_weights, budgets[0], p_vehicles, verbose=verbose)
+    model.build()
+    logger.info(f"Built sweep model in {time.time() - t0:.2f} sec.")
+
+    rows = []
+    for p in budgets:
+        model.set_station_budget(p)
+        if p_vehicles:
+            # Each open station needs at least one vehicle
+            model.set_vehicle_budget(max(p_vehicles, p))
+        res = model.solve(time_limit=time_limit, warm_start=bool(rows))
+        rows.append({
+            "p_stations": p,
+            "status": res["status"],
+            "coverage_pct": res["coverage_pct"],
+            "open_stations": res["open_stations"],
+            "solve_time_sec": res["solve_time_sec"],
+        })
+        logger.info(f"p={p}: coverage {res['coverage_pct']:.2%} ({res['solve_time_sec']:.2f} sec)")
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,333 @@
+import time
+import logging
+import numpy as np
+
+try:
+    from .mclp_model import _detect_solver, np_where_binary
+except ImportError:  # run as a script, e.g. python optimization/solver.py
+    from mclp_model import _detect_solver, np_where_binary
+
+logger = logging.getLogger(__name__)
+
+class KNearest:
+    """
+    k-nearest candidate queries for demand nodes: argpartition over a travel-time matrix,
+    or (from_points) a KD-tree over UTM coordinates, which never forms the dense matrix.
+    """
+    def __init__(self, travel_time_matrix=None, demand_xy=None, station_xy=None, speed_kmh=None):
+        if travel_time_matrix is not None:
+            self._times = np.asarray(travel_time_matrix)
+            self.shape = self._times.shape
+        else:
+            from scipy.spatial import cKDTree
+            self._times = None
+            self._demand_xy = np.asarray(demand_xy, dtype=np.float64)
+            self._station_xy = np.asarray(station_xy, dtype=np.float64)
+            self._tree = cKDTree(self._station_xy)
+            self._min_per_m = 60.0 / (speed_kmh * 1000.0)
+            self.shape = (len(self._demand_xy), len(self._station_xy))
+
+    @classmethod
+    def from_points(cls, demand_gdf, stations_gdf, speed_kmh=None):
+        """KD-tree queries with travel time = UTM distance at the model's average speed."""
+        from .coverage_matrix import AVERAGE_SPEED_KMH, project_to_utm
+        demand, stations = project_to_utm(demand_gdf), project_to_utm(stations_gdf)
+        return cls(demand_xy=np.column_stack([demand.geometry.x, demand.geometry.y]),
+                   station_xy=np.column_stack([stations.geometry.x, stations.geometry.y]),
+                   speed_kmh=speed_kmh or AVERAGE_SPEED_KMH)
+
+    def query(self, rows, k):
+        """(candidate indices, travel times) of the k nearest candidates of `rows`, nearest first."""
+        k = min(k, self.shape[1])
+        if self._times is None:
+            dist, idx = self._tree.query(self._demand_xy[rows], k=k)
+            dist, idx = dist.reshape(len(rows), k), idx.reshape(len(rows), k)
+            return idx, dist * self._min_per_m
+
+        sub = self._times[rows]
+        if k < sub.shape[1]:
+            idx = np.argpartition(sub, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.tile(np.arange(sub.shape[1]), (len(rows), 1))
+        times = np.take_along_axis(sub, idx, axis=1)
+        order = np.argsort(times, axis=1, kind="stable")
+        return np.take_along_axis(idx, order, axis=1), np.take_along_axis(times, order, axis=1)
+
+    def nearest_open(self, open_idx) -> np.ndarray:
+        """Travel time from every demand node to its nearest open station."""
+        open_idx = np.asarray(open_idx, dtype=int)
+        if len(open_idx) == 0:
+            return np.full(self.shape[0], np.inf)
+        if self._times is None:
+            from scipy.spatial import cKDTree
+            dist, _ = cKDTree(self._station_xy[open_idx]).query(self._demand_xy)
+            return dist * self._min_per_m
+        return self._times[:, open_idx].min(axis=1)
+
+class PMedianModel:
+    """
+    p-median: minimize population-weighted response time, each demand node served by its
+    nearest open station.
+
+    Assignment variables exist only for each node's k nearest candidates. A node may
+    instead take a boundary option priced at its (k+1)-th nearest travel time, a lower
+    bound on any farther assignment, so the restricted model is a relaxation of the full
+    p-median: if no node takes the boundary option the solution is optimal, otherwise k
+    is doubled for those nodes and the model re-solved (warm-started). If max_rounds or
+    the time limit end the loop first, the status is FEASIBLE or TIME_LIMIT, with the gap
+    to the last restricted model's bound.
+
+    travel_time_matrix: (n_demand, n_candidates) minutes, or a KNearest (e.g.
+    KNearest.from_points) to avoid the dense matrix. Results use the MCLPModel keys;
+    coverage_pct is the weighted share within `threshold_min` (NaN without threshold).
+    """
+    def __init__(self, travel_time_matrix, demand_weights, p_stations, p_vehicles=24, k=8, threshold_min=None,
+                 verbose=False, solver_type="auto"):
+        self.nearest = travel_time_matrix if isinstance(travel_time_matrix, KNearest) else KNearest(travel_time_matrix)
+        self.n_demand, self.n_candidates = self.nearest.shape
+        self.demand_weights = np.asarray(demand_weights, dtype=np.float64)
+        if len(self.demand_weights) != self.n_demand:
+            raise ValueError(f"demand_weights ({len(self.demand_weights)}) must match n_demand ({self.n_demand})")
+        self.p_stations = p_stations
+        self.p_vehicles = p_vehicles
+        self.k = k
+        self.threshold_min = threshold_min
+        self.verbose = verbose
+        self.solver_type = _detect_solver(solver_type)
+
+        self.x = None
+        self.v = None
+        self.response_times = None
+        self.obj_value = None
+        self.status = "UNDEFINED"
+        self.solve_time = None
+        self.optimality_gap = 0.0
+        self.obj_bound = None
+        self.k_per_node = None
+        self.rounds = 0
+
+    def _pairs(self, k_per_node):
+        """Flattened (node, candidate, time) assignment pairs and each node's boundary time (NaN if none)."""
+        nodes, cands, times = [], [], []
+        boundary = np.full(self.n_demand, np.nan)
+        for k in np.unique(k_per_node):
+            rows = np.flatnonzero(k_per_node == k)
+            idx, t = self.nearest.query(rows, k + 1)
+            if idx.shape[1] > k:
+                boundary[rows] = t[:, k]
+            nodes.append(np.repeat(rows, min(k, idx.shape[1])))
+            cands.append(idx[:, :k].ravel())
+            times.append(t[:, :k].ravel())
+        nodes, cands, times = np.concatenate(nodes), np.concatenate(cands), np.concatenate(times)
+        order = np.argsort(nodes, kind="stable")
+        return nodes[order], cands[order], times[order].astype(np.float64), boundary
+
+    def solve(self, time_limit=300, max_rounds=10):
+        """Solve, growing k where the boundary option is used. time_limit covers all rounds."""
+        t0 = time.time()
+        k_per_node = np.full(self.n_demand, min(self.k, self.n_candidates))
+        for self.rounds in range(1, max_rounds + 1):
+            nodes, cands, times, boundary = self._pairs(k_per_node)
+            remaining = max(1.0, time_limit - (time.time() - t0))
+            solve = {"gurobi": self._solve_gurobi, "highs": self._solve_highs}.get(self.solver_type, self._solve_pulp)
+            boundary_used = solve(nodes, cands, times, boundary, remaining)
+            if boundary_used is None or not boundary_used.any() or time.time() - t0 >= time_limit:
+                break
+            grow = np.flatnonzero(boundary_used)
+            k_per_node[grow] = np.minimum(2 * k_per_node[grow], self.n_candidates)
+            logger.info(f"p-median round {self.rounds}: {len(grow)} nodes at the k-nearest boundary, "
+                        f"k up to {k_per_node.max()}")
+        self.k_per_node = k_per_node
+        self.solve_time = time.time() - t0
+
+        if self.x is None:
+            logger.warning(f"No feasible solution found (status: {self.status}).")
+            self.x = np.zeros(self.n_candidates)
+        self.response_times = self.nearest.nearest_open(np_where_binary(self.x))
+        self.obj_value = float(self.demand_weights @ self.response_times)
+        if boundary_used is not None and boundary_used.any():
+            # Out of rounds or time with boundary options still in use: the last restricted
+            # model is only a relaxation, so its bound (not its status) carries over
+            self.status = "TIME_LIMIT" if self.solve_time >= time_limit else "FEASIBLE"
+            self.optimality_gap = ((self.obj_value - self.obj_bound) / max(abs(self.obj_value), 1e-10)
+                                   if self.obj_bound is not None else float("nan"))
+            logger.warning(f"p-median stopped after {self.rounds} round(s) with {int(boundary_used.sum())} nodes "
+                           f"at the k-nearest boundary (gap {self.optimality_gap:.2%}).")
+        return self._get_results()
+
+    def _solve_gurobi(self, nodes, cands, times, boundary, time_limit):
+        import gurobipy as gp
+        from gurobipy import GRB
+
+        m = gp.Model("AmbulancePMedian")
+        if not self.verbose:
+            m.setParam("OutputFlag", 0)
+        w = self.demand_weights
+        x = m.addVars(self.n_candidates, vtype=GRB.BINARY, name="station")
+        z = m.addVars(len(nodes), lb=0, ub=1, obj=(w[nodes] * times).tolist(), name="assign")
+        has_boundary = np.flatnonzero(~np.isnan(boundary))
+        d = m.addVars(has_boundary.tolist(), lb=0, ub=1, obj={int(i): float(w[i] * boundary[i]) for i in has_boundary},
+                      name="boundary")
+        m.ModelSense = GRB.MINIMIZE
+
+        starts = np.searchsorted(nodes, np.arange(self.n_demand + 1))
+        for i in range(self.n_demand):
+            m.addConstr(gp.quicksum(z[p] for p in range(starts[i], starts[i + 1])) + (d[i] if i in d else 0) == 1)
+        for p, j in enumerate(cands):
+            m.addConstr(z[p] <= x[int(j)])
+        m.addConstr(x.sum() <= self.p_stations, name="budget")
+        if self.p_vehicles:
+            v = m.addVars(self.n_candidates, vtype=GRB.INTEGER, lb=0, ub=4, name="vehicles")
+            m.addConstr(v.sum() <= self.p_vehicles, name="v_budget")
+            m.addConstrs(v[j] <= 4 * x[j] for j in range(self.n_candidates))
+            m.addConstrs(v[j] >= x[j] for j in range(self.n_candidates))
+        if self.x is not None:
+            for j in range(self.n_candidates):
+                x[j].Start = self.x[j]
+
+        m.setParam("TimeLimit", time_limit)
+        m.optimize()
+        self.status = {GRB.OPTIMAL: "OPTIMAL", GRB.TIME_LIMIT: "TIME_LIMIT",
+                       GRB.INFEASIBLE: "INFEASIBLE"}.get(m.status, str(m.status))
+        if m.SolCount == 0:
+            return None
+        self.x = np.array([x[j].X for j in range(self.n_candidates)])
+        self.v = np.array([v[j].X for j in range(self.n_candidates)]) if self.p_vehicles else None
+        self.optimality_gap = m.MIPGap
+        self.obj_bound = m.ObjBound
+        used = np.zeros(self.n_demand, dtype=bool)
+        used[[i for i in d if d[i].X > 1e-6]] = True
+        return used
+
+    def _solve_highs(self, nodes, cands, times, boundary, time_limit):
+        from scipy import sparse
+        from scipy.optimize import milp, Bounds, LinearConstraint
+
+        # Columns: x (stations), z (assignment pairs), d (boundary options), v (vehicles)
+        w = self.demand_weights
+        n_c, n_p = self.n_candidates, len(nodes)
+        has_boundary = np.flatnonzero(~np.isnan(boundary))
+        n_b, n_v = len(has_boundary), self.n_candidates if self.p_vehicles else 0
+        z0, d0, v0 = n_c, n_c + n_p, n_c + n_p + n_b
+        c = np.concatenate([np.zeros(n_c), w[nodes] * times, w[has_boundary] * boundary[has_boundary], np.zeros(n_v)])
+        integrality = np.concatenate([np.ones(n_c), np.zeros(n_p + n_b), np.ones(n_v)])
+        hi = np.concatenate([np.ones(n_c + n_p + n_b), np.full(n_v, 4.0)])
+
+        # Rows: each node assigned once, z <= x, station budget, then the vehicle rows
+        pairs = np.arange(n_p)
+        rows = [nodes, has_boundary, self.n_demand + pairs, self.n_demand + pairs,
+                np.full(n_c, self.n_demand + n_p)]
+        cols = [z0 + pairs, d0 + np.arange(n_b), z0 + pairs, cands, np.arange(n_c)]
+        vals = [np.ones(n_p), np.ones(n_b), np.ones(n_p), -np.ones(n_p), np.ones(n_c)]
+        lb = np.concatenate([np.ones(self.n_demand), np.full(n_p + 1, -np.inf)])
+        ub = np.concatenate([np.ones(self.n_demand), np.zeros(n_p), [self.p_stations]])
+        if n_v:
+            r0, stations = self.n_demand + n_p + 1, np.arange(n_c)
+            # sum v <= p_vehicles, v - 4x <= 0, v - x >= 0
+            rows += [np.full(n_c, r0), r0 + 1 + stations, r0 + 1 + stations, r0 + 1 + n_c + stations,
+                     r0 + 1 + n_c + stations]
+            cols += [v0 + stations, v0 + stations, stations, v0 + stations, stations]
+            vals += [np.ones(n_c), np.ones(n_c), np.full(n_c, -4.0), np.ones(n_c), -np.ones(n_c)]
+            lb = np.concatenate([lb, np.full(n_c + 1, -np.inf), np.zeros(n_c)])
+            ub = np.concatenate([ub, [self.p_vehicles], np.zeros(n_c), np.full(n_c, np.inf)])
+        A = sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                              shape=(len(lb), len(c)))
+
+        # scipy.optimize.milp takes no MIP start, so later rounds are solved cold
+        res = milp(c, integrality=integrality, bounds=Bounds(np.zeros(len(c)), hi),
+                   constraints=LinearConstraint(A, lb, ub), options={"time_limit": time_limit, "disp": self.verbose})
+        self.status = {0: "OPTIMAL", 1: "TIME_LIMIT", 2: "INFEASIBLE"}.get(res.status, res.message)
+        if res.x is None:
+            return None
+        self.x = res.x[:n_c]
+        self.v = res.x[v0:] if n_v else None
+        self.optimality_gap = res.mip_gap if res.mip_gap is not None else 0.0
+        self.obj_bound = res.mip_dual_bound if res.mip_dual_bound is not None else None
+        used = np.zeros(self.n_demand, dtype=bool)
+        used[has_boundary[res.x[d0:v0] > 1e-6]] = True
+        return used
+
+    def _solve_pulp(self, nodes, cands, times, boundary, time_limit):
+        import pulp
+
+        prob = pulp.LpProblem("AmbulancePMedian", pulp.LpMinimize)
+        w = self.demand_weights
+        x = [pulp.LpVariable(f"x_{j}", cat="Binary") for j in range(self.n_candidates)]
+        z = [pulp.LpVariable(f"z_{p}", lowBound=0, upBound=1) for p in range(len(nodes))]
+        d = {int(i): pulp.LpVariable(f"d_{i}", lowBound=0, upBound=1) for i in np.flatnonzero(~np.isnan(boundary))}
+
+        prob += (pulp.lpSum(float(c) * z[p] for p, c in enumerate(w[nodes] * times))
+                 + pulp.lpSum(float(w[i] * boundary[i]) * d[i] for i in d))
+        starts = np.searchsorted(nodes, np.arange(self.n_demand + 1))
+        for i in range(self.n_demand):
+            prob += pulp.lpSum(z[p] for p in range(starts[i], starts[i + 1])) + (d[i] if i in d else 0) == 1
+        for p, j in enumerate(cands):
+            prob += z[p] <= x[int(j)]
+        prob += pulp.lpSum(x) <= self.p_stations
+        v = None
+        if self.p_vehicles:
+            v = [pulp.LpVariable(f"v_{j}", lowBound=0, upBound=4, cat="Integer") for j in range(self.n_candidates)]
+            prob += pulp.lpSum(v) <= self.p_vehicles
+            for j in range(self.n_candidates):
+                prob += v[j] <= 4 * x[j]
+                prob += v[j] >= x[j]
+        warm = self.x is not None
+        if warm:
+            for j in range(self.n_candidates):
+                x[j].setInitialValue(round(self.x[j]))
+                if v is not None:
+                    v[j].setInitialValue(round(self.v[j]))
+
+        prob.solve(pulp.PULP_CBC_CMD(timeLimit=time_limit, msg=self.verbose, warmStart=warm))
+        if prob.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            self.status = pulp.LpStatus[prob.status]
+            return None
+        self.status = "TIME_LIMIT" if prob.sol_status == pulp.LpSolutionIntegerFeasible else "Optimal"
+        self.obj_bound = pulp.value(prob.objective) if self.status == "Optimal" else None
+        self.x = np.array([pulp.value(x[j]) for j in range(self.n_candidates)])
+        self.v = np.array([pulp.value(v[j]) for j in range(self.n_candidates)]) if v is not None else None
+        used = np.zeros(self.n_demand, dtype=bool)
+        used[[i for i, var in d.items() if (pulp.value(var) or 0) > 1e-6]] = True
+        return used
+
+    def _get_results(self):
+        open_stations = np_where_binary(self.x)
+        vehicles_per_station = {}
+        if self.v is not None:
+            vehicles_per_station = {int(j): int(round(self.v[j])) for j in open_stations}
+        total = self.demand_weights.sum()
+        coverage = (float(self.demand_weights[self.response_times <= self.threshold_min].sum() / total)
+                    if self.threshold_min is not None else float("nan"))
+        return {
+            "solver": self.solver_type,
+            "objective": "p_median",
+            "status": self.status,
+            "obj_value": float(self.obj_value),
+            "coverage_pct": coverage,
+            "open_stations": [int(j) for j in open_stations],
+            "n_stations_used": int(len(open_stations)),
+            "vehicles_per_station": vehicles_per_station,
+            "solve_time_sec": float(self.solve_time),
+            "optimality_gap": float(self.optimality_gap),
+            "mean_response_time_min": float(self.obj_value / total),
+            "max_response_time_min": float(self.response_times.max()),
+            "k_max": int(self.k_per_node.max()),
+            "k_rounds": int(self.rounds),
+        }
+
+    def summary(self):
+        """Return a formatted string summary of the solution."""
+        res = self._get_results()
+        lines = [
+            "=" * 40,
+            "P-MEDIAN OPTIMIZATION SUMMARY",
+            "=" * 40,
+            f"Solver: {self.solver_type.upper()}",
+            f"Status: {self.status}",
+            f"Stations Opened: {res['n_stations_used']} / {self.p_stations}",
+            f"Mean Response Time: {res['mean_response_time_min']:.2f} min (max {res['max_response_time_min']:.2f})",
+            f"k-nearest: up to {res['k_max']} after {res['k_rounds']} round(s)",
+            f"Solve Time: {self.solve_time:.2f} sec",
+            "=" * 40,
+        ]
+        return "\n".join(lines)
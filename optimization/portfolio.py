@@ -0,0 +1,185 @@
+import os
+import time
+import queue
+import signal
+import logging
+import multiprocessing
+import numpy as np
+from scipy import sparse
+
+try:
+    from .mclp_model import MCLPModel
+    from .backends import is_available
+    from .shared_arrays import SharedArrays, attach_shared
+except ImportError:  # run as a script, e.g. python optimization/solver.py
+    from mclp_model import MCLPModel
+    from backends import is_available
+    from shared_arrays import SharedArrays, attach_shared
+
+logger = logging.getLogger(__name__)
+
+# Statuses proving optimality (Gurobi and PuLP spellings)
+PROVEN = ("OPTIMAL", "Optimal")
+# Seconds past the time limit that strategies get to report their incumbent
+REPORT_GRACE_SEC = 10.0
+
+def greedy_mclp(coverage_matrix, weights, p_stations, p_vehicles=0):
+    """
+    Greedy MCLP heuristic: repeatedly open the station adding the most uncovered demand
+    weight, updating the gains only for newly covered nodes. Returns (x, v) with v from
+    spread_vehicles().
+    """
+    csr = sparse.csr_matrix(coverage_matrix, dtype=np.float64)
+    csc = csr.tocsc()
+    weights = np.asarray(weights, dtype=np.float64)
+    n_open = min(p_stations, p_vehicles) if p_vehicles else p_stations
+
+    x = np.zeros(csr.shape[1])
+    uncovered = np.ones(csr.shape[0], dtype=bool)
+    gains = csc.T @ weights
+    for _ in range(n_open):
+        j = int(np.argmax(gains))
+        if gains[j] <= 0:
+            break
+        x[j] = 1
+        rows = csc.indices[csc.indptr[j]:csc.indptr[j + 1]]
+        new = rows[uncovered[rows]]
+        uncovered[new] = False
+        gains -= csr[new].T @ weights[new]
+        gains[j] = -np.inf
+
+    return x, spread_vehicles(x, p_vehicles)
+
+def spread_vehicles(x, p_vehicles):
+    """
+    Vehicles spread evenly over the open stations of x (1 to 4 each, as in the model);
+    None without vehicle allocation. Vehicles do not change coverage, so any feasible
+    spread preserves the objective.
+    """
+    if not p_vehicles:
+        return None
+    open_idx = np.flatnonzero(np.asarray(x) > 0.5)
+    v = np.zeros(len(x))
+    if len(open_idx):
+        total = min(p_vehicles, 4 * len(open_idx))
+        v[open_idx] = total // len(open_idx) + (np.arange(len(open_idx)) < total % len(open_idx))
+    return v
+
+def default_strategies(core_budget=None, threads=None) -> list:
+    """
+    Default portfolio: the greedy heuristic (which seeds every MIP strategy) plus each
+    available MIP backend, splitting `core_budget` (default: all cores) evenly between
+    them unless `threads` ({backend: n}, e.g. from the YAML config) says otherwise.
+    """
+    core_budget = core_budget or os.cpu_count() or 1
+    threads = threads or {}
+    backends = [b for b in ("gurobi", "highs", "pulp") if is_available(b)]
+    share = max(1, core_budget // max(1, len(backends)))
+    return [{"name": "greedy"}] + [
+        {"name": "cbc" if b == "pulp" else b, "solver_type": b, "threads": threads.get(b) or share}
+        for b in backends
+    ]
+
+def _run_strategy(spec, model_kwargs, strategy, time_limit, start, results):
+    """Solve one MIP strategy in its own process and report (name, results) on the queue."""
+    if hasattr(os, "setsid"):
+        # Own process group, so a losing strategy is stopped together with its CBC child
+        os.setsid()
+    t0 = time.time()
+    try:
+        arrays = attach_shared(spec)
+        model = MCLPModel(arrays["coverage"], arrays["weights"], solver_type=strategy["solver_type"], **model_kwargs)
+        if start is not None:
+            model.build()
+            model.x, model.v = start
+            model.y = model._covered(model.x)
+        res = model.solve(time_limit=time_limit, warm_start=start is not None, threads=strategy.get("threads"))
+    except Exception as e:
+        res = {"status": "ERROR", "error": repr(e), "solve_time_sec": time.time() - t0}
+    results.put((strategy["name"], res))
+
+def _stop(process):
+    if process.is_alive() and hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    if process.is_alive():
+        process.terminate()
+    process.join()
+
+def solve_portfolio(coverage_matrix, demand_weights, p_stations, p_vehicles=24, time_limit=300, strategies=None,
+                    core_budget=None, threads=None, **model_kwargs) -> dict:
+    """
+    Race several solution strategies on the same MCLP instance.
+
+    The greedy heuristic runs first (milliseconds) and its incumbent warm-starts every
+    MIP strategy; MIP strategies (default: each available backend, see default_strategies)
+    then run concurrently in separate processes sharing the inputs via shared memory.
+    Returns as soon as a strategy proves optimality, otherwise the best incumbent when
+    the time limit expires. The results of the winner carry "strategy" and a
+    "portfolio" list with every strategy's outcome.
+    """
+    t0 = time.time()
+    model = MCLPModel(coverage_matrix, demand_weights, p_stations, p_vehicles, **model_kwargs)
+    strategies = strategies or default_strategies(core_budget, threads)
+    mip = [s for s in strategies if s["name"] != "greedy"]
+    if core_budget and sum(s.get("threads") or 1 for s in mip) > core_budget:
+        logger.warning(f"Portfolio threads exceed the core budget of {core_budget}")
+
+    reports, best, start = [], None, None
+
+    def _consider(name, res):
+        nonlocal best
+        res["strategy"] = name
+        reports.append({k: res.get(k) for k in ("strategy", "status", "obj_value", "solve_time_sec")})
+        if res.get("status") in PROVEN:
+            best = res
+            return True
+        if res.get("obj_value") is not None and not np.isnan(res["obj_value"]) and \
+                (best is None or res["obj_value"] > best["obj_value"]):
+            best = res
+        return False
+
+    if len(strategies) > len(mip) and model.objective == "weighted":
+        x, v = greedy_mclp(coverage_matrix, model._obj_weights, p_stations, p_vehicles)
+        # Greedy is optimal if it covers every coverable node
+        coverable = sparse.csr_matrix(coverage_matrix, dtype=bool).getnnz(axis=1) > 0
+        res = model.set_solution(x, v, solve_time=time.time() - t0)
+        if res["obj_value"] >= model._obj_weights[coverable].sum() * (1 - 1e-9):
+            res["status"] = "OPTIMAL"
+        start = (model.x, model.v)
+        proven = _consider("greedy", res)
+    else:
+        proven = False
+
+    if mip and not proven:
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        kwargs = {"p_stations": p_stations, "p_vehicles": p_vehicles, **model_kwargs}
+        remaining = max(1.0, time_limit - (time.time() - t0))
+        with SharedArrays({"coverage": coverage_matrix, "weights": np.asarray(demand_weights)}) as shared:
+            processes = [ctx.Process(target=_run_strategy, args=(shared.spec, kwargs, s, remaining, start, results),
+                                     daemon=True) for s in mip]
+            for p in processes:
+                p.start()
+            deadline = time.time() + remaining + REPORT_GRACE_SEC
+            try:
+                for _ in processes:
+                    try:
+                        name, res = results.get(timeout=max(0.0, deadline - time.time()))
+                    except queue.Empty:
+                        break
+                    if _consider(name, res):
+                        break
+            finally:
+                for p in processes:
+                    _stop(p)
+
+    if best is None:
+        raise RuntimeError(f"No portfolio strategy found a feasible solution: {reports}")
+    best["portfolio"] = reports
+    best["portfolio_time_sec"] = time.time() - t0
+    logger.info(f"Portfolio: '{best['strategy']}' won ({best['status']}, objective {best['obj_value']:.4f}) "
+                f"after {best['portfolio_time_sec']:.2f} sec")
+    return best
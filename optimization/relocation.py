@@ -0,0 +1,226 @@
+import time
+import numpy as np
+import logging
+
+from .mclp_model import _detect_solver
+
+logger = logging.getLogger(__name__)
+
+class RelocationModel:
+    """
+    Move-up / relocation of idle ambulances across the current station set.
+
+    When units are busy on calls, recommends which idle units to move to which
+    stations so that coverage by the remaining fleet is restored, moving only along
+    station pairs within `max_relocation_min` of travel time. Relocation time enters
+    the objective with a small penalty, so among equally good plans the one with the
+    least driving is chosen (and units stay put when moving gains nothing).
+
+    The model is reduced to what a dispatch decision needs: only the current
+    stations, demand nodes aggregated by identical coverage pattern, and integer unit
+    flows between stations instead of per-unit assignments. It is warm-started from
+    the stay-put plan.
+
+    coverage_matrix: (n_demand, n_stations) coverage of the current stations.
+    travel_time: (n_stations, n_stations) station-to-station travel time in minutes.
+    """
+    def __init__(self, coverage_matrix, demand_weights, travel_time, max_relocation_min=10.0,
+                 max_per_station=4, move_penalty=1e-4, verbose=False, solver_type="auto"):
+        if hasattr(coverage_matrix, "toarray"):
+            coverage_matrix = coverage_matrix.toarray()
+        coverage_matrix = np.asarray(coverage_matrix, dtype=bool)
+        self.demand_weights = np.asarray(demand_weights, dtype=np.float64)
+        self.total_weight = self.demand_weights.sum()
+        self.n_stations = coverage_matrix.shape[1]
+        self.travel_time = np.asarray(travel_time, dtype=np.float64)
+        self.max_relocation_min = max_relocation_min
+        self.max_per_station = max_per_station
+        self.verbose = verbose
+        # Per-minute relocation penalty, relative to total demand so coverage dominates
+        self.move_cost = move_penalty * self.total_weight
+
+        # Demand nodes with the same covering stations are interchangeable
+        reachable = coverage_matrix.any(axis=1)
+        self._patterns, inv = np.unique(coverage_matrix[reachable], axis=0, return_inverse=True)
+        self._group_weights = np.bincount(inv.ravel(), weights=self.demand_weights[reachable])
+        self._group_stations = [np.flatnonzero(row) for row in self._patterns]
+
+        # Feasible relocation arcs (staying put is always allowed)
+        self._arcs = self.travel_time <= max_relocation_min
+        np.fill_diagonal(self._arcs, True)
+
+        self.solver_type = _detect_solver(solver_type)
+
+    def coverage(self, staffed) -> float:
+        """Demand share covered by stations with at least one idle unit."""
+        staffed = np.asarray(staffed, dtype=bool)
+        covered = self._patterns[:, staffed].any(axis=1)
+        return float(self._group_weights[covered].sum() / self.total_weight)
+
+    def recommend(self, vehicle_station, busy=(), time_limit=1.0) -> dict:
+        """
+        Recommend moves for the idle units.
+
+        vehicle_station: (n_units,) station index where each unit is positioned.
+        busy: indices of units currently out on calls (they neither cover nor move).
+        Returns coverage before/after and a list of moves {"unit", "from", "to", "travel_min"}.
+        """
+        vehicle_station = np.asarray(vehicle_station, dtype=int)
+        idle_mask = np.ones(len(vehicle_station), dtype=bool)
+        idle_mask[list(busy)] = False
+        idle = np.bincount(vehicle_station[idle_mask], minlength=self.n_stations)
+        before = self.coverage(idle > 0)
+
+        t0 = time.time()
+        sources = np.flatnonzero(idle)
+        arcs = [(int(s), int(t)) for s in sources for t in np.flatnonzero(self._arcs[s])]
+        capacity = np.maximum(self.max_per_station, idle)
+
+        if self.solver_type == "gurobi":
+            flows, status = self._solve_gurobi(idle, arcs, capacity, time_limit)
+        elif self.solver_type == "highs":
+            flows, status = self._solve_highs(idle, arcs, capacity, time_limit)
+        else:
+            flows, status = self._solve_pulp(idle, arcs, capacity, time_limit)
+
+        if flows is None:
+            logger.warning(f"No relocation plan found (status: {status}); keeping units in place.")
+            flows = {(int(s), int(s)): int(idle[s]) for s in sources}
+
+        # Map station-to-station flows back onto individual idle units
+        moves = []
+        units_at = {int(s): list(np.flatnonzero(idle_mask & (vehicle_station == s))) for s in sources}
+        staffed = np.zeros(self.n_stations, dtype=bool)
+        for (s, t), n in sorted(flows.items()):
+            if n <= 0:
+                continue
+            staffed[t] = True
+            if s == t:
+                continue
+            for _ in range(n):
+                moves.append({"unit": int(units_at[s].pop()), "from": s, "to": t,
+                              "travel_min": float(self.travel_time[s, t])})
+
+        return {
+            "solver": self.solver_type,
+            "status": status,
+            "coverage_before": before,
+            "coverage_after": self.coverage(staffed),
+            "moves": moves,
+            "n_moves": len(moves),
+            "relocation_min": float(sum(m["travel_min"] for m in moves)),
+            "solve_time_sec": time.time() - t0,
+        }
+
+    def _solve_gurobi(self, idle, arcs, capacity, time_limit):
+        import gurobipy as gp
+        from gurobipy import GRB
+
+        m = gp.Model("AmbulanceRelocation")
+        if not self.verbose:
+            m.setParam("OutputFlag", 0)
+
+        f = m.addVars(arcs, vtype=GRB.INTEGER, lb=0, name="flow")
+        u = m.addVars(self.n_stations, vtype=GRB.BINARY, name="staffed")
+        y = m.addVars(len(self._group_weights), lb=0, ub=1, name="covered")
+
+        m.setObjective(
+            gp.quicksum(float(w) * y[g] for g, w in enumerate(self._group_weights))
+            - gp.quicksum(self.move_cost * float(self.travel_time[s, t]) * f[s, t] for s, t in arcs if s != t),
+            GRB.MAXIMIZE
+        )
+        for s in np.flatnonzero(idle):
+            m.addConstr(f.sum(int(s), "*") == int(idle[s]), name=f"idle_{s}")
+        for t in range(self.n_stations):
+            m.addConstr(f.sum("*", t) <= int(capacity[t]), name=f"cap_{t}")
+            m.addConstr(u[t] <= f.sum("*", t), name=f"staff_{t}")
+        for g, stations in enumerate(self._group_stations):
+            m.addConstr(y[g] <= gp.quicksum(u[int(t)] for t in stations), name=f"cov_{g}")
+
+        # Warm start: every unit stays where it is
+        for s, t in arcs:
+            f[s, t].Start = idle[s] if s == t else 0
+        for t in range(self.n_stations):
+            u[t].Start = int(idle[t] > 0)
+
+        m.setParam("TimeLimit", time_limit)
+        m.optimize()
+
+        status = {GRB.OPTIMAL: "OPTIMAL", GRB.TIME_LIMIT: "TIME_LIMIT"}.get(m.status, str(m.status))
+        if m.SolCount == 0:
+            return None, status
+        return {a: int(round(f[a].X)) for a in arcs}, status
+
+    def _solve_highs(self, idle, arcs, capacity, time_limit):
+        from scipy import sparse
+        from scipy.optimize import milp, Bounds, LinearConstraint
+
+        # Columns: f (arc flows), u (staffed stations), y (covered groups)
+        src, dst = np.array(arcs, dtype=int).reshape(-1, 2).T
+        n_a, n_s, n_g = len(arcs), self.n_stations, len(self._group_weights)
+        u0, y0 = n_a, n_a + n_s
+        move = np.where(src != dst, self.move_cost * self.travel_time[src, dst], 0.0)
+        c = np.concatenate([move, np.zeros(n_s), -self._group_weights])  # milp minimizes
+        integrality = np.concatenate([np.ones(n_a + n_s), np.zeros(n_g)])
+        hi = np.concatenate([idle[src], np.ones(n_s + n_g)])
+
+        # Rows: outflow == idle, inflow <= capacity, u <= inflow, y <= covering u
+        sources = np.flatnonzero(idle)
+        out_row = np.searchsorted(sources, src)
+        group_rows = np.repeat(np.arange(n_g), [len(st) for st in self._group_stations])
+        group_cols = np.concatenate(self._group_stations) if n_g else np.zeros(0, dtype=int)
+        r_in, r_staff, r_cov = len(sources), len(sources) + n_s, len(sources) + 2 * n_s
+        rows = [out_row, r_in + dst, r_staff + np.arange(n_s), r_staff + dst, r_cov + np.arange(n_g), r_cov + group_rows]
+        cols = [np.arange(n_a), np.arange(n_a), u0 + np.arange(n_s), np.arange(n_a), y0 + np.arange(n_g),
+                u0 + group_cols]
+        vals = [np.ones(n_a), np.ones(n_a), np.ones(n_s), -np.ones(n_a), np.ones(n_g), -np.ones(len(group_rows))]
+        lb = np.concatenate([idle[sources], np.full(2 * n_s + n_g, -np.inf)])
+        ub = np.concatenate([idle[sources], capacity, np.zeros(n_s + n_g)])
+        A = sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                              shape=(len(lb), len(c)))
+
+        # scipy.optimize.milp takes no MIP start; the stay-put plan is not passed
+        res = milp(c, integrality=integrality, bounds=Bounds(np.zeros(len(c)), hi),
+                   constraints=LinearConstraint(A, lb, ub), options={"time_limit": time_limit, "disp": self.verbose})
+        status = {0: "OPTIMAL", 1: "TIME_LIMIT", 2: "INFEASIBLE"}.get(res.status, res.message)
+        if res.x is None:
+            return None, status
+        return {a: int(round(res.x[k])) for k, a in enumerate(arcs)}, status
+
+    def _solve_pulp(self, idle, arcs, capacity, time_limit):
+        import pulp
+
+        prob = pulp.LpProblem("AmbulanceRelocation", pulp.LpMaximize)
+        f = {(s, t): pulp.LpVariable(f"f_{s}_{t}", lowBound=0, upBound=int(idle[s]), cat="Integer") for s, t in arcs}
+        u = [pulp.LpVariable(f"u_{t}", cat="Binary") for t in range(self.n_stations)]
+        y = [pulp.LpVariable(f"y_{g}", lowBound=0, upBound=1) for g in range(len(self._group_weights))]
+
+        prob += (pulp.lpSum(float(w) * y[g] for g, w in enumerate(self._group_weights))
+                 - pulp.lpSum(self.move_cost * float(self.travel_time[s, t]) * f[s, t] for s, t in arcs if s != t))
+
+        inflow = {t: [] for t in range(self.n_stations)}
+        outflow = {}
+        for s, t in arcs:
+            inflow[t].append(f[s, t])
+            outflow.setdefault(s, []).append(f[s, t])
+        for s, out in outflow.items():
+            prob += pulp.lpSum(out) == int(idle[s])
+        for t in range(self.n_stations):
+            prob += pulp.lpSum(inflow[t]) <= int(capacity[t])
+            prob += u[t] <= pulp.lpSum(inflow[t])
+        for g, stations in enumerate(self._group_stations):
+            prob += y[g] <= pulp.lpSum(u[int(t)] for t in stations)
+
+        # Warm start: every unit stays where it is
+        for (s, t), var in f.items():
+            var.setInitialValue(int(idle[s]) if s == t else 0)
+        for t in range(self.n_stations):
+            u[t].setInitialValue(int(idle[t] > 0))
+
+        prob.solve(pulp.PULP_CBC_CMD(timeLimit=time_limit, msg=self.verbose, warmStart=True))
+        # A time limit without incumbent is "Not Solved" (values are LP leftovers);
+        # with an incumbent it is "Optimal" with an integer-feasible solution
+        if prob.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            return None, pulp.LpStatus[prob.status]
+        status = "TIME_LIMIT" if prob.sol_status == pulp.LpSolutionIntegerFeasible else pulp.LpStatus[prob.status]
+        return {a: int(round(var.value() or 0)) for a, var in f.items()}, status
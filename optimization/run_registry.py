@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import sqlite3
+import contextlib
+import hashlib
+import logging
+import subprocess
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_key TEXT NOT NULL,
+    input_key TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    data_hash TEXT NOT NULL,
+    config_hash TEXT,
+    code_hash TEXT NOT NULL,
+    git_commit TEXT,
+    params TEXT NOT NULL,
+    cached_from INTEGER REFERENCES runs(id),
+    status TEXT,
+    solver TEXT,
+    coverage_pct REAL,
+    gap_closure_pct REAL,
+    solve_time_sec REAL,
+    total_time_sec REAL,
+    timings TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_key ON runs(run_key);
+CREATE INDEX IF NOT EXISTS idx_runs_input ON runs(input_key);
+"""
+
+# Solver statuses (Gurobi and PuLP spellings) whose solutions can be served from the registry;
+# a time-limited run is reused because re-solving with the same limit gives no guarantee either,
+# unless the solve can resume from a checkpoint (then only PROVEN_STATUSES are reused)
+PROVEN_STATUSES = ("OPTIMAL", "Optimal")
+REUSABLE_STATUSES = PROVEN_STATUSES + ("TIME_LIMIT",)
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-1 of a file's contents."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def json_hash(obj) -> str:
+    """SHA-1 of a canonical JSON encoding (key order does not matter)."""
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+def code_hash(package_dir: str = None) -> str:
+    """SHA-1 over the optimization package sources, so any code change invalidates cached runs."""
+    package_dir = package_dir or os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.sha1()
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith(".py"):
+            h.update(name.encode())
+            h.update(file_hash(os.path.join(package_dir, name)).encode())
+    return h.hexdigest()
+
+def git_commit(repo_dir: str) -> str:
+    """Current commit (with '-dirty' for uncommitted changes), or None outside a git checkout."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo_dir, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo_dir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+class RunRegistry:
+    """
+    SQLite registry of optimization runs (default: results/runs.sqlite).
+
+    Every run records the hashes of its inputs (data files, config, code), the effective
+    parameters, timings, solver status and full solution. A request whose run key
+    (data + parameters + code) matches an earlier successful run is answered from the
+    registry instead of re-solving; the cache hit is itself recorded with `cached_from`.
+
+        registry = RunRegistry("results/runs.sqlite")
+        key = registry.make_key(data_files, params, config_path)
+        cached = registry.lookup(key)
+        if cached is None:
+            run_id = registry.record(key, result, timings)
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection committed on success and always closed (sqlite3's own context manager does not close)."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def make_key(self, data_files, params: dict, config_path: str = None) -> dict:
+        """
+        Hash the inputs of a run. `params` are the effective (defaulted) parameters, so a
+        config that only reformats or restates defaults maps to the same run key.
+        """
+        data_hash = json_hash({os.path.basename(p): file_hash(p) for p in sorted(data_files)})
+        input_key = json_hash({"data": data_hash, "params": params})
+        code = code_hash()
+        return {
+            "run_key": json_hash({"input": input_key, "code": code}),
+            "input_key": input_key,
+            "data_hash": data_hash,
+            "config_hash": file_hash(config_path) if config_path and os.path.exists(config_path) else None,
+            "code_hash": code,
+            "git_commit": git_commit(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            "params": params,
+        }
+
+    def lookup(self, key: dict, statuses=REUSABLE_STATUSES):
+        """Most recent solved run with the same run key and one of `statuses`, as a dict (or None)."""
+        placeholders = ",".join("?" * len(statuses))
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT * FROM runs WHERE run_key = ? AND cached_from IS NULL AND status IN ({placeholders}) "
+                "ORDER BY id DESC LIMIT 1", (key["run_key"], *statuses)).fetchone()
+        return self._row_dict(row) if row else None
+
+    def record(self, key: dict, result: dict, timings: dict = None, cached_from: int = None) -> int:
+        """Insert a run; returns its id."""
+        timings = timings or {}
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO runs (run_key, input_key, started_at, data_hash, config_hash, code_hash, git_commit, "
+                "params, cached_from, status, solver, coverage_pct, gap_closure_pct, solve_time_sec, total_time_sec, "
+                "timings, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key["run_key"], key["input_key"], datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                 key["data_hash"], key["config_hash"], key["code_hash"], key["git_commit"],
+                 json.dumps(key["params"], sort_keys=True), cached_from, result.get("status"), result.get("solver"),
+                 result.get("coverage_pct"), result.get("gap_closure_pct"), result.get("solve_time_sec"),
+                 timings.get("total_sec"), json.dumps(timings), json.dumps(result)))
+            return cur.lastrowid
+
+    @staticmethod
+    def _row_dict(row: sqlite3.Row) -> dict:
+        out = dict(row)
+        for col in ("params", "timings", "result"):
+            if out.get(col) is not None:
+                out[col] = json.loads(out[col])
+        return out
+
+    def get(self, run_id: int) -> dict:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No run with id {run_id}")
+        return self._row_dict(row)
+
+    def history(self, include_cached: bool = False, since: str = None):
+        """
+        Runs as a DataFrame (one row per run, oldest first) with the key metrics and
+        parameters expanded into param_* columns, e.g. for plotting coverage over time.
+        """
+        import pandas as pd
+
+        query = ("SELECT id, started_at, input_key, code_hash, git_commit, params, cached_from, status, solver, "
+                 "coverage_pct, gap_closure_pct, solve_time_sec, total_time_sec FROM runs WHERE 1 = 1")
+        args = []
+        if not include_cached:
+            query += " AND cached_from IS NULL"
+        if since is not None:
+            query += " AND started_at >= ?"
+            args.append(since)
+        with self._connect() as conn:
+            df = pd.read_sql_query(query + " ORDER BY id", conn, params=args)
+        params = pd.json_normalize(df.pop("params").map(json.loads).tolist()).add_prefix("param_")
+        return pd.concat([df, params.set_index(df.index)], axis=1)
+
+    def solve_time_regressions(self, window: int = 5, factor: float = 1.5):
+        """
+        Solved runs whose solve time exceeds `factor` x the median of the previous
+        `window` runs on the same inputs (data + parameters), i.e. slowdowns caused by
+        code or environment changes rather than by a harder instance.
+        """
+        df = self.history()
+        if df.empty:
+            return df
+        baseline = (df.groupby("input_key")["solve_time_sec"]
+                    .transform(lambda s: s.shift(1).rolling(window, min_periods=1).median()))
+        df = df.assign(baseline_solve_time_sec=baseline, slowdown=df["solve_time_sec"] / baseline)
+        return df[df["slowdown"] > factor].reset_index(drop=True)
+
+@contextlib.contextmanager
+def timed(timings: dict, name: str):
+    """Add the elapsed seconds of the enclosed block to timings[name]."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - t0
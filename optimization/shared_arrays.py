@@ -0,0 +1,133 @@
+import os
+import sys
+import uuid
+import logging
+import numpy as np
+from scipy import sparse
+from multiprocessing import shared_memory
+
+logger = logging.getLogger(__name__)
+
+# Arrays attached in this process: part spec -> (handles, view); handles keep the views valid
+_ATTACHED = {}
+# Arrays published to this worker by init_worker()
+_WORKER_ARRAYS = {}
+
+class SharedArrays:
+    """
+    Publish large read-only inputs (travel-time matrix, coverage matrix, demand
+    weights, spatial weights...) once for all worker processes.
+
+    Dense arrays and scipy CSR matrices (as data/indices/indptr) are copied into
+    `multiprocessing.shared_memory` blocks, or into .npy files under `directory`
+    with backend="memmap". Workers receive only the small picklable `spec` and
+    attach zero-copy with attach_shared(). The publishing process owns the memory:
+    use it as a context manager (or call close()) to release it.
+
+        with SharedArrays({"coverage": cov, "weights": w}) as shared:
+            with ProcessPoolExecutor(initializer=init_worker, initargs=(shared.spec,)) as pool:
+                ...  # in workers: worker_arrays()["coverage"]
+    """
+    def __init__(self, arrays: dict, backend: str = "shm", directory: str = None):
+        if backend not in ("shm", "memmap"):
+            raise ValueError(f"Unknown backend '{backend}', expected 'shm' or 'memmap'")
+        if backend == "memmap" and directory is None:
+            raise ValueError("backend='memmap' requires a directory")
+
+        self.backend = backend
+        self._blocks = []
+        self._files = []
+        self.spec = {}
+        try:
+            for name, arr in arrays.items():
+                if sparse.issparse(arr):
+                    csr = arr.tocsr()
+                    self.spec[name] = {
+                        "format": "csr", "shape": csr.shape,
+                        "parts": {part: self._publish(getattr(csr, part), directory)
+                                  for part in ("data", "indices", "indptr")},
+                    }
+                else:
+                    self.spec[name] = {"format": "dense", "parts": {"array": self._publish(np.asarray(arr), directory)}}
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"Published {len(self.spec)} arrays ({self.nbytes / 1e6:.1f} MB) via {backend}.")
+
+    @property
+    def nbytes(self) -> int:
+        return sum(int(np.prod(p["shape"])) * np.dtype(p["dtype"]).itemsize
+                   for entry in self.spec.values() for p in entry["parts"].values())
+
+    def _publish(self, arr: np.ndarray, directory: str) -> dict:
+        arr = np.ascontiguousarray(arr)
+        if self.backend == "memmap":
+            path = os.path.join(directory, f"shared_{uuid.uuid4().hex}.npy")
+            np.save(path, arr)
+            self._files.append(path)
+            return {"path": path, "shape": arr.shape, "dtype": arr.dtype.str}
+
+        block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        self._blocks.append(block)
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+        return {"shm": block.name, "shape": arr.shape, "dtype": arr.dtype.str}
+
+    def close(self):
+        """Release the published memory (workers must be done with it)."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        for path in self._files:
+            if os.path.exists(path):
+                os.remove(path)
+        self._blocks, self._files = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _attach_part(part: dict, handles: list) -> np.ndarray:
+    if "path" in part:
+        return np.load(part["path"], mmap_mode="r")
+
+    if sys.version_info >= (3, 13):
+        block = shared_memory.SharedMemory(name=part["shm"], track=False)
+    else:
+        # Pool workers share the publisher's resource tracker, which already tracks this
+        # block (registration is idempotent), so attaching never transfers ownership
+        block = shared_memory.SharedMemory(name=part["shm"])
+    handles.append(block)
+    view = np.ndarray(part["shape"], dtype=np.dtype(part["dtype"]), buffer=block.buf)
+    view.flags.writeable = False
+    return view
+
+def attach_shared(spec: dict) -> dict:
+    """
+    Zero-copy views of published arrays: numpy arrays for dense inputs, CSR matrices
+    (sharing data/indices/indptr) for sparse ones. Views are read-only and stay valid
+    for the lifetime of this process.
+    """
+    out = {}
+    for name, entry in spec.items():
+        key = repr(sorted((k, sorted(p.items())) for k, p in entry["parts"].items()))
+        if key not in _ATTACHED:
+            handles = []
+            parts = {k: _attach_part(p, handles) for k, p in entry["parts"].items()}
+            if entry["format"] == "csr":
+                view = sparse.csr_matrix((parts["data"], parts["indices"], parts["indptr"]), shape=entry["shape"], copy=False)
+            else:
+                view = parts["array"]
+            _ATTACHED[key] = (handles, view)
+        out[name] = _ATTACHED[key][1]
+    return out
+
+def init_worker(spec: dict):
+    """Pool initializer: attach the published arrays once per worker process."""
+    _WORKER_ARRAYS.clear()
+    _WORKER_ARRAYS.update(attach_shared(spec))
+
+def worker_arrays() -> dict:
+    """Arrays attached by init_worker() in this worker."""
+    return _WORKER_ARRAYS
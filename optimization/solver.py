@@ -1,4 +1,5 @@
 import os
+import time
 import argparse
 import json
 import logging
@@ -9,6 +10,12 @@ import numpy as np
 from mclp_model import MCLPModel
 from coverage_matrix import compute_travel_time_matrix, build_coverage_matrix, baseline_coverage_stats
 from constraints import validate_inputs, compute_gap_closure
+from backends import detect_solver
+from run_registry import RunRegistry, timed, PROVEN_STATUSES, REUSABLE_STATUSES
+from portfolio import solve_portfolio
+from decomposition import solve_decomposed
+from pmedian import PMedianModel
+from vehicle_allocation import allocate_vehicles
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -22,7 +29,7 @@ def load_config(config_path):
     with open(config_path, "r") as f:
         return yaml.safe_load(f)
 
-def run_full_optimization(config_path=None, verbose=False):
+def run_full_optimization(config_path=None, verbose=False, use_cache=True):
     """
     Orchestrate the full optimization workflow:
     1. Load data
@@ -30,7 +37,15 @@ def run_full_optimization(config_path=None, verbose=False):
     3. Run MCLP model (Gurobi or PuLP)
     4. Compute gap closure
     5. Save results
+
+    Every run is recorded in the run registry (results/runs.sqlite). If an earlier run had
+    identical data files, parameters and code, its solution is returned without re-solving
+    (use_cache=False forces a fresh solve). Single MCLP solves checkpoint their incumbent
+    under results/checkpoints/; for them only proven optimal runs are reused, so a re-run
+    continues an interrupted or TIME_LIMIT solve with another time_limit_sec instead of
+    starting over.
     """
+    t_start = time.perf_counter()
     # Load parameters
     params = {}
     if config_path:
@@ -41,28 +56,84 @@ def run_full_optimization(config_path=None, verbose=False):
     p_stations = opt_params.get("p_stations", 12)
     p_vehicles = opt_params.get("p_vehicles", 24)
     threshold = opt_params.get("response_threshold_min", 8.0)
+    solver_type = opt_params.get("solver_type", "auto")
+    time_limit = opt_params.get("time_limit_sec", 300)
+    checkpoint_interval = opt_params.get("checkpoint_interval_sec", 30)
+    checkpoint_slices = opt_params.get("checkpoint_slices", False)
+    threads = opt_params.get("threads") or {}
+    portfolio = opt_params.get("portfolio", False)
+    core_budget = opt_params.get("core_budget")
+    decompose = opt_params.get("decompose", False)
+    n_jobs = opt_params.get("n_jobs", 1)
+    model_type = opt_params.get("model", "mclp")
+    k_nearest = opt_params.get("k_nearest", 8)
+    vehicle_allocation = opt_params.get("vehicle_allocation", "marginal")
+    calls_per_1000 = opt_params.get("calls_per_1000_per_year", 60.0)
+    service_time = opt_params.get("service_time_min", 45.0)
+    if model_type not in ("mclp", "p_median"):
+        raise ValueError(f"Unknown model '{model_type}', expected 'mclp' or 'p_median'")
     
     # Paths
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_dir = os.path.join(project_root, "data", "synthetic")
     results_dir = os.path.join(project_root, "results")
     os.makedirs(results_dir, exist_ok=True)
+    output_path = os.path.join(results_dir, "optimization_results.json")
+    data_files = [os.path.join(data_dir, f"{name}.geojson")
+                  for name in ("zones", "demand_nodes", "candidate_stations", "existing_stations")]
+    
+    # Look up identical earlier runs. The resolved backend is part of the key, so
+    # "auto" runs on machines with and without Gurobi are kept apart.
+    registry = RunRegistry(os.path.join(results_dir, "runs.sqlite"))
+    run_params = {
+        "model": model_type,
+        "p_stations": p_stations,
+        "p_vehicles": p_vehicles,
+        "threshold_min": threshold,
+        "time_limit_sec": time_limit,
+        "solver": "portfolio" if portfolio else detect_solver(solver_type),
+        "decompose": decompose,
+        "threads": threads,
+    }
+    if model_type == "p_median":
+        run_params["k_nearest"] = k_nearest
+    if p_vehicles and vehicle_allocation == "marginal":
+        run_params["vehicle_allocation"] = {"calls_per_1000_per_year": calls_per_1000, "service_time_min": service_time}
+    try:
+        key = registry.make_key(data_files, run_params, config_path)
+    except FileNotFoundError:
+        logger.error(f"Failed to load data from {data_dir}. Run generate_synthetic_data.py first.")
+        raise
+    # A time-limited single MCLP solve is not reused: re-running it resumes from its checkpoint
+    checkpoint_dir = os.path.join(results_dir, "checkpoints")
+    resumable = model_type == "mclp" and not portfolio and not decompose
+    statuses = PROVEN_STATUSES if resumable else REUSABLE_STATUSES
+    cached = registry.lookup(key, statuses) if use_cache else None
+    if cached is not None:
+        final_output = {**cached["result"], "cached_from": cached["id"]}
+        final_output["run_id"] = registry.record(key, final_output, {"total_sec": time.perf_counter() - t_start},
+                                                 cached_from=cached["id"])
+        with open(output_path, "w") as f:
+            json.dump(final_output, f, indent=4)
+        logger.info(f"Identical inputs already solved in run {cached['id']} ({cached['started_at']}); "
+                    f"reused its solution. Results saved to {output_path}")
+        return final_output
+    timings = {}
     
     # 1. Load Synthetic Data
     logger.info("Loading synthetic data...")
     try:
-        zones_gdf = gpd.read_file(os.path.join(data_dir, "zones.geojson"))
-        demand_gdf = gpd.read_file(os.path.join(data_dir, "demand_nodes.geojson"))
-        candidates_gdf = gpd.read_file(os.path.join(data_dir, "candidate_stations.geojson"))
-        existing_gdf = gpd.read_file(os.path.join(data_dir, "existing_stations.geojson"))
+        with timed(timings, "load_sec"):
+            zones_gdf, demand_gdf, candidates_gdf, existing_gdf = (gpd.read_file(path) for path in data_files)
     except Exception as e:
         logger.error(f"Failed to load data from {data_dir}. Run generate_synthetic_data.py first.")
         raise e
         
     # 2. Compute Coverage Matrix
     logger.info(f"Computing travel time matrix (threshold: {threshold} min)...")
-    time_matrix = compute_travel_time_matrix(demand_gdf, candidates_gdf)
-    cov_matrix = build_coverage_matrix(time_matrix, threshold)
+    with timed(timings, "coverage_sec"):
+        time_matrix = compute_travel_time_matrix(demand_gdf, candidates_gdf)
+        cov_matrix = build_coverage_matrix(time_matrix, threshold)
     
     weights = demand_gdf.weight.values
     
@@ -71,8 +142,9 @@ def run_full_optimization(config_path=None, verbose=False):
     # In our synthetic generator, existing stations are often a subset or close to candidates
     # For baseline, we just use the existing_gdf directly against demand
     logger.info("Computing baseline coverage...")
-    base_time_matrix = compute_travel_time_matrix(demand_gdf, existing_gdf)
-    base_cov_matrix = build_coverage_matrix(base_time_matrix, threshold)
+    with timed(timings, "baseline_sec"):
+        base_time_matrix = compute_travel_time_matrix(demand_gdf, existing_gdf)
+        base_cov_matrix = build_coverage_matrix(base_time_matrix, threshold)
     
     # Baseline stats
     is_covered_base = np.any(base_cov_matrix, axis=1)
@@ -83,11 +155,42 @@ def run_full_optimization(config_path=None, verbose=False):
     logger.info(f"Baseline Coverage: {base_pct:.2%}")
     
     # 4. Run Optimization
-    logger.info(f"Running MCLP optimization (p={p_stations})...")
+    logger.info(f"Running {'p-median' if model_type == 'p_median' else 'MCLP'} optimization (p={p_stations})...")
     validate_inputs(cov_matrix, weights, p_stations)
     
-    model = MCLPModel(cov_matrix, weights, p_stations, p_vehicles, verbose=verbose)
-    results = model.solve()
+    with timed(timings, "model_sec"):
+        if model_type == "p_median":
+            model = PMedianModel(time_matrix, weights, p_stations, p_vehicles, k=k_nearest, threshold_min=threshold,
+                                 verbose=verbose, solver_type=solver_type)
+            results = model.solve(time_limit=time_limit)
+        elif portfolio:
+            results = solve_portfolio(cov_matrix, weights, p_stations, p_vehicles, time_limit=time_limit,
+                                      core_budget=core_budget, threads=threads, verbose=verbose)
+            model = None
+        elif decompose:
+            results = solve_decomposed(cov_matrix, weights, p_stations, p_vehicles, time_limit=time_limit,
+                                       n_jobs=n_jobs, solver_type=solver_type)
+            model = None
+        else:
+            model = MCLPModel(cov_matrix, weights, p_stations, p_vehicles, verbose=verbose, solver_type=solver_type)
+            # An interrupted or time-limited solve of the same model resumes from its checkpoint
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            checkpoint_path = os.path.join(checkpoint_dir, f"mclp_{model.input_hash()[:16]}.json")
+            results = model.solve(time_limit=time_limit, checkpoint_path=checkpoint_path,
+                                  checkpoint_interval=checkpoint_interval, checkpoint_slices=checkpoint_slices,
+                                  resume=True, threads=threads.get(model.solver_type))
+    
+        # The models only require 1-4 units per open station, so the MIP's split of the fleet is
+        # arbitrary; re-allocate it by marginal analysis on station workload and availability
+        if p_vehicles and vehicle_allocation == "marginal" and results["open_stations"]:
+            allocation = allocate_vehicles(cov_matrix, weights, results["open_stations"], p_vehicles,
+                                           travel_time_matrix=time_matrix, calls_per_1000_per_year=calls_per_1000,
+                                           service_time_min=service_time)
+            results["vehicles_per_station"] = allocation.pop("vehicles_per_station")
+            results["vehicle_allocation"] = allocation
+            if model is not None:  # keep model.summary() in line with the allocation
+                model.v = np.zeros(model.n_candidates)
+                model.v[list(results["vehicles_per_station"])] = list(results["vehicles_per_station"].values())
     
     # 5. Post-process and Calculate Gap Closure
     gap_results = compute_gap_closure(base_pct, results["coverage_pct"])
@@ -105,13 +208,15 @@ def run_full_optimization(config_path=None, verbose=False):
         }
     }
     
-    # 6. Save results
-    output_path = os.path.join(results_dir, "optimization_results.json")
+    # 6. Record the run and save results (the JSON holds the latest run, the registry all of them)
+    timings["total_sec"] = time.perf_counter() - t_start
+    final_output["run_id"] = registry.record(key, final_output, timings)
     with open(output_path, "w") as f:
         json.dump(final_output, f, indent=4)
         
     logger.info(f"Optimization complete. Results saved to {output_path}")
-    logger.info(model.summary())
+    if model is not None:
+        logger.info(model.summary())
     logger.info(f"Gap Closure: {final_output['gap_closure_pct']:.2%}")
     
     return final_output
@@ -120,6 +225,15 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Abu Dhabi Ambulance Optimization Solver")
     parser.add_argument("--config", type=str, help="Path to config YAML")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
+    parser.add_argument("--no-cache", action="store_true", help="Re-solve even if an identical run is registered")
+    parser.add_argument("--history", action="store_true", help="Print the run history and solve-time regressions")
     
     args = parser.parse_args()
-    run_full_optimization(args.config, args.verbose)
+    if args.history:
+        registry = RunRegistry(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                            "results", "runs.sqlite"))
+        print(registry.history().to_string(index=False))
+        print("\nSolve-time regressions:")
+        print(registry.solve_time_regressions().to_string(index=False))
+    else:
+        run_full_optimization(args.config, args.verbose, use_cache=not args.no_cache)
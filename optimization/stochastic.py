@@ -0,0 +1,92 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from .mclp_model import MCLPModel
+from .coverage_matrix import profile_coverage_stats
+
+logger = logging.getLogger(__name__)
+
+# Default coefficient of variation of the population estimates behind demand weights
+DEFAULT_CV = 0.3
+
+def sample_demand_scenarios(demand_weights, n_scenarios: int, cv: float = DEFAULT_CV, zone_ids=None,
+                            zone_cv: float = 0.0, seed=None) -> np.ndarray:
+    """
+    Sample (n_demand, n_scenarios) demand weight scenarios in one vectorized draw.
+
+    Each weight is multiplied by mean-one lognormal noise with coefficient of variation
+    `cv`. With zone_ids and zone_cv > 0, a shared lognormal factor per zone and
+    scenario models correlated estimation error (e.g. a whole district's population
+    being over- or under-estimated). Returns float32 to keep large scenario sets small.
+    """
+    rng = np.random.default_rng(seed)
+    w = np.asarray(demand_weights, dtype=np.float64)
+
+    def _noise(cv_, shape):
+        sigma = np.sqrt(np.log1p(cv_ ** 2))
+        return rng.lognormal(-0.5 * sigma ** 2, sigma, shape)
+
+    factors = _noise(cv, (len(w), n_scenarios)) if cv > 0 else np.ones((len(w), n_scenarios))
+    if zone_ids is not None and zone_cv > 0:
+        _, codes = np.unique(np.asarray(zone_ids), return_inverse=True)
+        factors *= _noise(zone_cv, (codes.max() + 1, n_scenarios))[codes.ravel()]
+    return (w[:, None] * factors).astype(np.float32)
+
+def solve_saa(coverage_matrix, scenarios, p_stations, p_vehicles=24, objective="weighted", cvar_alpha=0.1,
+              time_limit=300, verbose=False, solver_type="auto") -> dict:
+    """
+    Sample average approximation MCLP over demand scenarios (n_demand, n_scenarios).
+
+    objective="weighted" maximizes expected covered demand; "cvar" maximizes the CVaR
+    of the coverage fraction, i.e. the mean coverage of the worst cvar_alpha share of
+    scenarios. Scenarios enter the model as demand profiles: coverage constraints are
+    shared by all scenarios, and "cvar" only adds one constraint per scenario.
+    """
+    scenarios = np.asarray(scenarios)
+    model = MCLPModel(coverage_matrix, scenarios, p_stations, p_vehicles, verbose=verbose,
+                      objective=objective, cvar_alpha=cvar_alpha, solver_type=solver_type)
+    results = model.solve(time_limit=time_limit)
+    logger.info(f"SAA ({objective}, {scenarios.shape[1]} scenarios): in-sample {results['coverage_pct']:.2%} "
+                f"in {results['solve_time_sec']:.2f} sec")
+    return results
+
+def _tail_mean(values: np.ndarray, alpha: float) -> float:
+    """Mean of the lowest ceil(alpha * n) values (empirical CVaR of a reward)."""
+    k = max(1, int(np.ceil(alpha * len(values))))
+    return float(np.partition(values, k - 1)[:k].mean())
+
+def out_of_sample_coverage(coverage_matrix, station_sets: dict, demand_weights, n_scenarios=10000,
+                           chunk_size=1000, cv=DEFAULT_CV, zone_ids=None, zone_cv=0.0, cvar_alpha=0.1,
+                           seed=None) -> pd.DataFrame:
+    """
+    Evaluate station configurations on a large held-out scenario set.
+
+    station_sets: {label: station indices}, e.g. deterministic, SAA and CVaR solutions.
+    Scenarios are generated in chunks from independent seeded streams and scored with
+    the batch evaluator (one matrix product per chunk for all scenarios), so memory
+    stays bounded by chunk_size. Returns per configuration the mean, standard deviation,
+    5th percentile, CVaR at cvar_alpha and minimum of the coverage fraction.
+    """
+    n_chunks = -(-n_scenarios // chunk_size)
+    streams = np.random.SeedSequence(seed).spawn(n_chunks)
+    coverage = {label: [] for label in station_sets}
+    for c, stream in enumerate(streams):
+        size = min(chunk_size, n_scenarios - c * chunk_size)
+        scenarios = sample_demand_scenarios(demand_weights, size, cv=cv, zone_ids=zone_ids, zone_cv=zone_cv,
+                                            seed=stream)
+        for label, idx in station_sets.items():
+            coverage[label].append(profile_coverage_stats(idx, coverage_matrix, scenarios)["coverage_pct"])
+
+    rows = []
+    for label, parts in coverage.items():
+        cov = np.concatenate(parts).astype(np.float64)
+        rows.append({
+            "configuration": label,
+            "mean": float(cov.mean()),
+            "std": float(cov.std()),
+            "p05": float(np.percentile(cov, 5)),
+            f"cvar_{cvar_alpha:g}": _tail_mean(cov, cvar_alpha),
+            "min": float(cov.min()),
+        })
+    return pd.DataFrame(rows).set_index("configuration")
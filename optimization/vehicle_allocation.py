@@ -0,0 +1,90 @@
+import logging
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# Default call volume and unit busy time per call (dispatch to back in service)
+CALLS_PER_1000_PER_YEAR = 60.0
+SERVICE_TIME_MIN = 45.0
+
+def station_workload(coverage_matrix, demand_weights, open_stations, travel_time_matrix=None) -> tuple:
+    """
+    Demand weight served by each open station, as (served, covered_served) arrays over
+    `open_stations`. With travel times every node is dispatched from its nearest open
+    station (so uncovered demand still loads a station); with coverage only, each
+    covered node is split evenly between its covering open stations. covered_served
+    counts only demand the serving station reaches within the threshold.
+    """
+    open_stations = np.asarray(open_stations, dtype=int)
+    weights = np.asarray(demand_weights, dtype=np.float64)
+    cov = sparse.csr_matrix(coverage_matrix, dtype=np.float64)[:, open_stations]
+
+    if travel_time_matrix is not None:
+        nearest = np.asarray(travel_time_matrix)[:, open_stations].argmin(axis=1)
+        assign = sparse.csr_matrix((np.ones(len(weights)), (np.arange(len(weights)), nearest)),
+                                   shape=cov.shape)
+        covered = np.asarray(cov.multiply(assign).sum(axis=1)).ravel() > 0
+    else:
+        n_cover = np.asarray(cov.sum(axis=1)).ravel()
+        assign = sparse.diags(np.divide(1.0, n_cover, out=np.zeros_like(n_cover), where=n_cover > 0)) @ cov
+        covered = n_cover > 0
+    return assign.T @ weights, assign.T @ (weights * covered)
+
+def erlang_b(servers: int, load) -> np.ndarray:
+    """
+    Erlang loss (all units busy) probabilities for 0..servers units at each offered
+    load (Erlangs): an (n_loads, servers + 1) table from the stable recursion
+    B(c) = a B(c-1) / (c + a B(c-1)).
+    """
+    load = np.asarray(load, dtype=np.float64)
+    table = np.ones((len(load), servers + 1))
+    for c in range(1, servers + 1):
+        prev = table[:, c - 1]
+        table[:, c] = load * prev / (c + load * prev)
+    return table
+
+def allocate_vehicles(coverage_matrix, demand_weights, open_stations, p_vehicles, travel_time_matrix=None,
+                      calls_per_1000_per_year=CALLS_PER_1000_PER_YEAR, service_time_min=SERVICE_TIME_MIN,
+                      max_per_station=4) -> dict:
+    """
+    Second-stage vehicle allocation for a fixed station set by greedy marginal analysis.
+
+    Each station's offered load (Erlangs) follows from the demand it serves (see
+    station_workload), the call rate and the service time. A unit is available when
+    not all of the station's units are busy (Erlang loss model), so the value of an
+    allocation is the covered demand reached by an available unit,
+    sum_j covered_j * (1 - B(c_j, a_j)). Every open station gets one unit and the rest
+    go, one at a time, to the largest marginal gain; Erlang B is convex in the number
+    of units, so the greedy allocation is optimal for this separable objective.
+
+    Returns "vehicles_per_station" ({station: units}, as in MCLPModel results), the
+    per-station "workload", "covered_workload", "offered_load" and "busy_probability", and
+    "available_coverage_pct", the availability-weighted coverage share.
+    """
+    open_stations = np.asarray(open_stations, dtype=int)
+    n_open = len(open_stations)
+    if n_open > p_vehicles:
+        raise ValueError(f"{n_open} open stations need at least {n_open} vehicles, got {p_vehicles}")
+    weights = np.asarray(demand_weights, dtype=np.float64)
+    served, covered = station_workload(coverage_matrix, weights, open_stations, travel_time_matrix)
+    calls_per_min = served * calls_per_1000_per_year / 1000.0 / (365.0 * 24 * 60)
+    load = calls_per_min * service_time_min
+
+    busy = erlang_b(max_per_station, load)
+    # gains[j, c] = covered demand gained by the (c+1)-th unit at station j
+    gains = covered[:, None] * (busy[:, :-1] - busy[:, 1:])
+    gains = np.column_stack([gains, np.full(n_open, -np.inf)])  # full stations take no more
+    units = np.ones(n_open, dtype=int)
+    for _ in range(min(p_vehicles, max_per_station * n_open) - n_open):
+        units[np.argmax(gains[np.arange(n_open), units])] += 1
+
+    busy_prob = busy[np.arange(n_open), units]
+    return {
+        "vehicles_per_station": {int(j): int(c) for j, c in zip(open_stations, units)},
+        "workload": {int(j): float(w) for j, w in zip(open_stations, served)},
+        "covered_workload": {int(j): float(w) for j, w in zip(open_stations, covered)},
+        "offered_load": {int(j): float(a) for j, a in zip(open_stations, load)},
+        "busy_probability": {int(j): float(b) for j, b in zip(open_stations, busy_prob)},
+        "available_coverage_pct": float(covered @ (1 - busy_prob) / weights.sum()),
+    }
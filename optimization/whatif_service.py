@@ -0,0 +1,358 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import itertools
+import multiprocessing
+import logging
+import yaml
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from scipy import sparse
+from concurrent.futures import ProcessPoolExecutor
+
+from .coverage_matrix import compute_travel_time_matrix, build_coverage_matrix
+from .mclp_model import MCLPModel
+from spatial_analysis.equity_metrics import weighted_gini
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1_000_000
+
+class CoverageState:
+    """
+    Incrementally maintained coverage of one station configuration.
+
+    Keeps a per-demand-node cover count (number of open stations within the response
+    threshold) plus covered demand per zone, so opening or closing a station only
+    touches the demand nodes that station covers instead of re-evaluating the full
+    coverage matrix.
+
+    coverage_matrix: (n_demand, n_stations) boolean coverage of every station (existing and
+    candidate), dense or scipy sparse.
+    zone_ids: (n_demand,) zone of each demand node; zone_population: {zone_id: population}
+    used to weight the zone-level Gini.
+    """
+    def __init__(self, coverage_matrix, demand_weights, zone_ids, zone_population: dict, open_idx=()):
+        csc = sparse.csc_matrix(coverage_matrix if sparse.issparse(coverage_matrix)
+                                else np.asarray(coverage_matrix), dtype=bool)
+        csc.eliminate_zeros()
+        # Covered demand node indices per station
+        self._station_nodes = np.split(csc.indices, csc.indptr[1:-1])
+        self.n_demand, self.n_stations = csc.shape
+
+        self.weights = np.asarray(demand_weights, dtype=np.float64)
+        self.total_weight = self.weights.sum()
+        self.zone_labels, self._zone_codes = np.unique(np.asarray(zone_ids), return_inverse=True)
+        n_zones = len(self.zone_labels)
+        self._zone_total = np.bincount(self._zone_codes, weights=self.weights, minlength=n_zones)
+        self._zone_pop = np.array([zone_population.get(z, 0.0) for z in self.zone_labels], dtype=np.float64)
+
+        self.cover_count = np.zeros(self.n_demand, dtype=np.int32)
+        self.covered_weight = 0.0
+        self._zone_covered = np.zeros(n_zones)
+        self.is_open = np.zeros(self.n_stations, dtype=bool)
+        for j in open_idx:
+            self.open(j)
+
+    def _check(self, j: int) -> int:
+        if not 0 <= j < self.n_stations:
+            raise ValueError(f"Station index {j} out of range (0..{self.n_stations - 1})")
+        return int(j)
+
+    def open(self, j: int) -> None:
+        j = self._check(j)
+        if self.is_open[j]:
+            raise ValueError(f"Station {j} is already open")
+        nodes = self._station_nodes[j]
+        gained = nodes[self.cover_count[nodes] == 0]
+        self.cover_count[nodes] += 1
+        self._update(gained, 1.0)
+        self.is_open[j] = True
+
+    def close(self, j: int) -> None:
+        j = self._check(j)
+        if not self.is_open[j]:
+            raise ValueError(f"Station {j} is not open")
+        nodes = self._station_nodes[j]
+        self.cover_count[nodes] -= 1
+        lost = nodes[self.cover_count[nodes] == 0]
+        self._update(lost, -1.0)
+        self.is_open[j] = False
+
+    def _update(self, nodes, sign: float) -> None:
+        w = self.weights[nodes]
+        self.covered_weight += sign * w.sum()
+        np.add.at(self._zone_covered, self._zone_codes[nodes], sign * w)
+
+    def marginal_gain(self, j: int) -> float:
+        """Demand newly covered if closed station j were opened."""
+        nodes = self._station_nodes[self._check(j)]
+        return float(self.weights[nodes[self.cover_count[nodes] == 0]].sum())
+
+    def zone_coverage(self) -> np.ndarray:
+        return np.divide(self._zone_covered, self._zone_total, out=np.zeros_like(self._zone_total),
+                         where=self._zone_total > 0)
+
+    def metrics(self) -> dict:
+        zone_cov = np.clip(self.zone_coverage(), 0.0, 1.0)
+        return {
+            "coverage_pct": float(self.covered_weight / self.total_weight),
+            "covered_weight": float(self.covered_weight),
+            "n_open": int(self.is_open.sum()),
+            "gini": float(weighted_gini(zone_cov, self._zone_pop)),
+            "zone_coverage": {str(z): float(c) for z, c in zip(self.zone_labels, zone_cov)},
+        }
+
+    def apply(self, open_idx=(), close_idx=()) -> None:
+        """Close then open stations; on error, every change already made is undone."""
+        done = []
+        try:
+            for j in close_idx:
+                self.close(j)
+                done.append((self.open, j))
+            for j in open_idx:
+                self.open(j)
+                done.append((self.close, j))
+        except ValueError:
+            for undo, j in reversed(done):
+                undo(j)
+            raise
+
+    def what_if(self, open_idx=(), close_idx=(), commit=False) -> dict:
+        """Metrics after opening/closing stations; the change is reverted unless commit."""
+        before = self.metrics()
+        self.apply(open_idx, close_idx)
+        after = self.metrics()
+        if not commit:
+            self.apply(open_idx=close_idx, close_idx=open_idx)
+        return {
+            **after,
+            "delta_coverage_pct": after["coverage_pct"] - before["coverage_pct"],
+            "delta_gini": after["gini"] - before["gini"],
+            "committed": bool(commit),
+        }
+
+def _solve_job(coverage_matrix, demand_weights, p_stations, p_vehicles, time_limit, solver_type="auto"):
+    """Full MCLP re-optimization, run in a worker process."""
+    model = MCLPModel(coverage_matrix, demand_weights, p_stations, p_vehicles, solver_type=solver_type)
+    model.solve(time_limit=time_limit)
+    return model._get_results()
+
+class WhatIfService:
+    """
+    Long-running what-if service over the current station configuration.
+
+    Stations (existing and candidate) are addressed by station_id, or by zone name,
+    which resolves to the zone's closed candidate with the largest marginal gain
+    (for "open") or its open station with the smallest loss (for "close").
+    Full re-optimizations run in a process pool and are polled by job id.
+    """
+    def __init__(self, zones_gdf, demand_gdf, stations_gdf, coverage_matrix, open_station_ids=(),
+                 p_vehicles=24, time_limit=300, n_workers=1, solver_type="auto"):
+        self.stations = stations_gdf.reset_index(drop=True)
+        self._index_of = {int(sid): i for i, sid in enumerate(self.stations.station_id)}
+        is_existing = (self.stations["is_existing"].fillna(False).astype(bool).values
+                       if "is_existing" in self.stations else np.zeros(len(self.stations), dtype=bool))
+        self._candidate_idx = np.flatnonzero(~is_existing)
+        self.coverage_matrix = np.asarray(coverage_matrix, dtype=bool)
+        self.demand_weights = demand_gdf.weight.values
+        self.p_vehicles = p_vehicles
+        self.time_limit = time_limit
+        self.solver_type = solver_type
+
+        population = dict(zip(zones_gdf.zone_id, zones_gdf.population))
+        self.state = CoverageState(self.coverage_matrix, self.demand_weights, demand_gdf.zone_id.values, population,
+                                   [self._index_of[int(sid)] for sid in open_station_ids])
+
+        # Spawned (not forked) workers, so they never inherit open client sockets
+        self._pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._jobs = {}
+        self._job_ids = itertools.count(1)
+
+    def _resolve(self, ref, opening: bool) -> int:
+        if isinstance(ref, (int, np.integer)) and not isinstance(ref, bool):
+            if int(ref) not in self._index_of:
+                raise ValueError(f"Unknown station_id {ref}")
+            j = self._index_of[int(ref)]
+            if self.state.is_open[j] == opening:
+                raise ValueError(f"Station {ref} is already {'open' if opening else 'closed'}")
+            return j
+
+        in_zone = np.flatnonzero((self.stations.zone_name == ref).values)
+        if not len(in_zone):
+            raise ValueError(f"Unknown station reference '{ref}'")
+        if opening:
+            pool = [j for j in in_zone if not self.state.is_open[j]]
+            if not pool:
+                raise ValueError(f"No closed station left in '{ref}'")
+            return max(pool, key=self.state.marginal_gain)
+        pool = [j for j in in_zone if self.state.is_open[j]]
+        if not pool:
+            raise ValueError(f"No open station in '{ref}'")
+        # Smallest loss = fewest nodes covered only by this station
+        return min(pool, key=lambda j: self._sole_cover_weight(j))
+
+    def _sole_cover_weight(self, j: int) -> float:
+        nodes = self.state._station_nodes[j]
+        return float(self.state.weights[nodes[self.state.cover_count[nodes] == 1]].sum())
+
+    def open_station_ids(self) -> list:
+        return [int(s) for s in self.stations.station_id.values[self.state.is_open]]
+
+    @staticmethod
+    def _validate_what_if(body) -> None:
+        """Reject bodies that are not {"open": [...], "close": [...], "swap": [[out, in], ...]}."""
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        for key in ("open", "close", "swap"):
+            if not isinstance(body.get(key, []), list):
+                raise ValueError(f"'{key}' must be a list")
+        for pair in body.get("swap", []):
+            if not isinstance(pair, list) or len(pair) != 2:
+                raise ValueError(f"Each swap must be a [close, open] pair, got {json.dumps(pair)}")
+
+    def what_if(self, body: dict) -> dict:
+        t0 = time.perf_counter()
+        self._validate_what_if(body)
+        close_idx = [self._resolve(ref, opening=False) for ref in body.get("close", [])]
+        open_idx = [self._resolve(ref, opening=True) for ref in body.get("open", [])]
+        for out_ref, in_ref in body.get("swap", []):
+            close_idx.append(self._resolve(out_ref, opening=False))
+            open_idx.append(self._resolve(in_ref, opening=True))
+
+        result = self.state.what_if(open_idx, close_idx, commit=bool(body.get("commit", False)))
+        result["opened"] = [int(self.stations.station_id[j]) for j in open_idx]
+        result["closed"] = [int(self.stations.station_id[j]) for j in close_idx]
+        result["elapsed_ms"] = (time.perf_counter() - t0) * 1000
+        return result
+
+    def submit_optimization(self, body: dict) -> dict:
+        """Queue a full MCLP solve over the candidate stations."""
+        p_stations = int(body.get("p_stations", self.state.is_open.sum()))
+        future = asyncio.get_running_loop().run_in_executor(
+            self._pool, _solve_job, self.coverage_matrix[:, self._candidate_idx], self.demand_weights,
+            p_stations, int(body.get("p_vehicles", self.p_vehicles)), body.get("time_limit", self.time_limit),
+            self.solver_type
+        )
+        job_id = str(next(self._job_ids))
+        self._jobs[job_id] = future
+        return {"job_id": job_id, "status": "queued"}
+
+    def job_status(self, job_id: str) -> dict:
+        if job_id not in self._jobs:
+            raise KeyError(job_id)
+        future = self._jobs[job_id]
+        if not future.done():
+            return {"job_id": job_id, "status": "running"}
+        if future.exception() is not None:
+            return {"job_id": job_id, "status": "failed", "error": str(future.exception())}
+        result = dict(future.result())
+        # Candidate column indices -> station ids
+        result["open_station_ids"] = [int(self.stations.station_id[self._candidate_idx[j]])
+                                      for j in result["open_stations"]]
+        return {"job_id": job_id, "status": "done", "result": result}
+
+    def handle(self, method: str, path: str, body: dict):
+        """Route one request; returns (status_code, payload)."""
+        if method == "GET" and path == "/state":
+            return 200, {**self.state.metrics(), "open_station_ids": self.open_station_ids()}
+        if method == "POST" and path == "/whatif":
+            return 200, self.what_if(body)
+        if method == "POST" and path == "/optimize":
+            return 202, self.submit_optimization(body)
+        if method == "GET" and path.startswith("/jobs/"):
+            return 200, self.job_status(path[len("/jobs/"):])
+        return 404, {"error": f"No route for {method} {path}"}
+
+    async def _serve_client(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if len(request_line) < 2 or length > MAX_BODY_BYTES:
+                status, payload = 400, {"error": "Malformed request"}
+            else:
+                raw = await reader.readexactly(length) if length else b""
+                try:
+                    status, payload = self.handle(request_line[0], request_line[1], json.loads(raw) if raw else {})
+                except (ValueError, TypeError, AttributeError) as e:
+                    # Includes json.JSONDecodeError and bodies of the wrong shape
+                    status, payload = 400, {"error": str(e)}
+                except KeyError as e:
+                    status, payload = 404, {"error": f"Unknown job {e}"}
+
+            data = json.dumps(payload).encode()
+            reason = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found"}[status]
+            writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.warning(f"Dropped connection: {e}")
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await asyncio.start_server(self._serve_client, host, port)
+        logger.info(f"What-if service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+
+def load_service(config_path=None, initial="existing", n_workers=1) -> WhatIfService:
+    """
+    Load data and coverage structures once. `initial` selects the starting configuration:
+    "existing" (current network) or "optimized" (results/optimization_results.json).
+    """
+    params = {}
+    if config_path:
+        with open(config_path, "r") as f:
+            params = yaml.safe_load(f) or {}
+    opt_params = params.get("optimization", {})
+    threshold = opt_params.get("response_threshold_min", 8.0)
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = os.path.join(project_root, "data", "synthetic")
+    zones_gdf = gpd.read_file(os.path.join(data_dir, "zones.geojson"))
+    demand_gdf = gpd.read_file(os.path.join(data_dir, "demand_nodes.geojson"))
+    candidates_gdf = gpd.read_file(os.path.join(data_dir, "candidate_stations.geojson"))
+    existing_gdf = gpd.read_file(os.path.join(data_dir, "existing_stations.geojson"))
+
+    stations_gdf = pd.concat([existing_gdf, candidates_gdf.assign(is_existing=False)], ignore_index=True)
+    cov = build_coverage_matrix(compute_travel_time_matrix(demand_gdf, stations_gdf), threshold)
+
+    if initial == "optimized":
+        with open(os.path.join(project_root, "results", "optimization_results.json"), "r") as f:
+            open_ids = candidates_gdf.station_id.values[json.load(f)["open_stations"]]
+    else:
+        open_ids = existing_gdf.station_id.values
+
+    return WhatIfService(zones_gdf, demand_gdf, stations_gdf, cov, open_ids,
+                         p_vehicles=opt_params.get("p_vehicles", 24),
+                         time_limit=opt_params.get("time_limit_sec", 300), n_workers=n_workers,
+                         solver_type=opt_params.get("solver_type", "auto"))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description="Local what-if station configuration service")
+    parser.add_argument("--config", type=str, help="Path to config YAML")
+    parser.add_argument("--initial", choices=["existing", "optimized"], default="existing")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Processes for full re-optimization")
+    args = parser.parse_args()
+
+    service = load_service(args.config, args.initial, args.workers)
+    asyncio.run(service.serve(args.host, args.port))
@@ -0,0 +1,64 @@
+"""
+Startup-time benchmark: cold import cost of light modules vs. the full package APIs,
+and per-model solver detection cost.
+
+Usage: python scripts/benchmark_startup.py [--runs 5]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, statement) pairs timed in fresh interpreters
+IMPORT_CASES = [
+    ("optimization.constraints", "import optimization.constraints"),
+    ("optimization.mclp_model", "import optimization.mclp_model"),
+    ("spatial_analysis.equity_metrics", "import spatial_analysis.equity_metrics"),
+    ("optimization (all exports)", "import optimization as p; [getattr(p, n) for n in p.__all__]"),
+    ("spatial_analysis (all exports)", "import spatial_analysis as p; [getattr(p, n) for n in p.__all__]"),
+    ("visualization (all exports)", "import visualization as p; [getattr(p, n) for n in p.__all__]"),
+]
+
+DETECTION_SNIPPET = """
+import time, numpy as np
+from optimization.mclp_model import MCLPModel
+cov, w = np.eye(3), np.ones(3)
+t0 = time.perf_counter(); MCLPModel(cov, w, 1)
+t1 = time.perf_counter()
+for _ in range({n}): MCLPModel(cov, w, 1)
+t2 = time.perf_counter()
+print(t1 - t0, (t2 - t1) / {n})
+"""
+
+def _run(statement: str) -> float:
+    env = {**os.environ, "PYTHONPATH": PROJECT_ROOT}
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], cwd=PROJECT_ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start and solver detection benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per case")
+    parser.add_argument("--models", type=int, default=200, help="Models constructed after the first")
+    args = parser.parse_args()
+
+    baseline = statistics.median(_run("pass") for _ in range(args.runs))
+    print(f"{'import':<36}{'median sec':>12}   (interpreter start {baseline:.3f} sec subtracted)")
+    for label, statement in IMPORT_CASES:
+        elapsed = statistics.median(_run(statement) for _ in range(args.runs)) - baseline
+        print(f"{label:<36}{elapsed:>12.3f}")
+
+    env = {**os.environ, "PYTHONPATH": PROJECT_ROOT}
+    out = subprocess.run([sys.executable, "-c", DETECTION_SNIPPET.format(n=args.models)], cwd=PROJECT_ROOT,
+                         env=env, check=True, capture_output=True, text=True).stdout.split()
+    first, rest = float(out[0]), float(out[1])
+    print(f"\nMCLPModel construction: first {first * 1000:.1f} ms (solver detection), "
+          f"then {rest * 1000:.3f} ms each over {args.models} models (cached)")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,35 @@
-from .morans_i import compute_global_morans_i, compute_local_morans_i
-from .equity_metrics import weighted_gini, lorenz_curve
-from .coverage_analysis import compute_baseline_coverage, compute_optimized_coverage
-
-__all__ = [
-    "compute_global_morans_i", 
-    "compute_local_morans_i", 
-    "weighted_gini", 
-    "lorenz_curve",
-    "compute_baseline_coverage",
-    "compute_optimized_coverage"
-]
+import importlib
+
+# Public API -> defining submodule, imported lazily as in optimization/__init__.py
+_EXPORTS = {
+    "compute_global_morans_i": ".morans_i",
+    "compute_global_morans_i_batch": ".morans_i",
+    "compute_local_morans_i": ".morans_i",
+    "point_weights": ".point_autocorrelation",
+    "point_global_morans_i": ".point_autocorrelation",
+    "point_local_morans_i": ".point_autocorrelation",
+    "get_spatial_weights": ".spatial_weights",
+    "spatial_weights_from_config": ".spatial_weights",
+    "clear_weights_cache": ".spatial_weights",
+    "weighted_gini": ".equity_metrics",
+    "lorenz_curve": ".equity_metrics",
+    "gini_and_lorenz": ".equity_metrics",
+    "StreamingGini": ".equity_metrics",
+    "compute_baseline_coverage": ".coverage_analysis",
+    "compute_optimized_coverage": ".coverage_analysis",
+    "summarize_by_type": ".coverage_analysis",
+    "ZoneAggregator": ".coverage_analysis",
+    "ServiceAreaCache": ".service_areas",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
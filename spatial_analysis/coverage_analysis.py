@@ -1,45 +1,143 @@
 import numpy as np
 import geopandas as gpd
 import pandas as pd
+from scipy import sparse
 import logging
+import warnings
 
 logger = logging.getLogger(__name__)
 
-def aggregate_coverage_to_zones(zones_gdf: gpd.GeoDataFrame, demand_gdf: gpd.GeoDataFrame, y_binary: np.ndarray) -> gpd.GeoDataFrame:
+class ZoneAggregator:
+    """
+    Weighted demand-node -> zone aggregation, encoded once and reused across scenarios.
+    Builds a sparse (n_zones, n_demand) membership matrix holding each node's weight,
+    so coverage for a whole (n_demand, n_scenarios) matrix is one sparse product.
+    """
+    def __init__(self, zones_gdf: gpd.GeoDataFrame, demand_gdf: gpd.GeoDataFrame, weights: np.ndarray = None):
+        self.zone_ids = zones_gdf.zone_id.to_numpy()
+        self.n_zones = len(self.zone_ids)
+        self.n_demand = len(demand_gdf)
+
+        zone_index = pd.Index(self.zone_ids)
+        if not zone_index.is_unique:
+            duplicated = zone_index[zone_index.duplicated()].unique().tolist()
+            raise ValueError(f"zone_id must be unique in zones_gdf, found duplicates {duplicated[:10]}")
+        codes = zone_index.get_indexer(demand_gdf.zone_id.to_numpy())
+        if weights is None:
+            weights = demand_gdf.weight.to_numpy()
+        weights = np.asarray(weights, dtype=np.float64)
+
+        # Nodes whose zone is not in zones_gdf are ignored
+        valid = codes >= 0
+        self.membership = sparse.csr_matrix(
+            (weights[valid], (codes[valid], np.flatnonzero(valid))),
+            shape=(self.n_zones, self.n_demand)
+        )
+        self.zone_weight = np.asarray(self.membership.sum(axis=1)).ravel()
+
+    def coverage(self, y: np.ndarray) -> np.ndarray:
+        """
+        Weighted coverage share per zone.
+        y: (n_demand,) or (n_demand, n_scenarios) coverage indicators.
+        Returns (n_zones,) or (n_zones, n_scenarios); zones without demand get 0.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        covered = self.membership @ y
+        denom = self.zone_weight if y.ndim == 1 else self.zone_weight[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(denom > 0, covered / denom, 0.0)
+
+    def write_coverage(self, zones_gdf: gpd.GeoDataFrame, y: np.ndarray, columns: list = None) -> gpd.GeoDataFrame:
+        """
+        Add zone coverage columns to zones_gdf in place (nothing else is copied) and return it.
+        A 1-D y gives "coverage_pct"; a scenario matrix gives `columns`
+        (default coverage_pct_0, coverage_pct_1, ...). zones_gdf must list the zones this
+        aggregator was built from, in the same order.
+        """
+        if not np.array_equal(zones_gdf.zone_id.to_numpy(), self.zone_ids):
+            raise ValueError("zones_gdf does not match the zones this ZoneAggregator was built from")
+        zone_cov = self.coverage(y)
+        if zone_cov.ndim == 1:
+            zones_gdf["coverage_pct"] = zone_cov
+            return zones_gdf
+
+        if columns is None:
+            columns = [f"coverage_pct_{k}" for k in range(zone_cov.shape[1])]
+        if len(columns) != zone_cov.shape[1]:
+            raise ValueError(f"{len(columns)} column names for {zone_cov.shape[1]} scenarios")
+        # One insert per scenario column; pandas warns about block count, but consolidating
+        # would copy the frame this avoids copying
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+            for k, col in enumerate(columns):
+                zones_gdf[col] = zone_cov[:, k]
+        return zones_gdf
+
+def aggregate_coverage_to_zones(zones_gdf: gpd.GeoDataFrame, demand_gdf: gpd.GeoDataFrame, y_binary: np.ndarray,
+                                aggregator: ZoneAggregator = None, columns: list = None) -> gpd.GeoDataFrame:
     """
     Map binary coverage results from demand nodes back to the zone level.
-    y_binary: (n_demand,) binary array from optimization results.
+    y_binary: (n_demand,) binary array from optimization results, or an
+    (n_demand, n_scenarios) matrix giving one output column per scenario.
+    The coverage columns are written into zones_gdf in place, which is returned
+    (see ZoneAggregator.write_coverage); copy it first to keep the original.
+    Pass a prebuilt ZoneAggregator to skip re-encoding zones across calls.
     """
-    gdf = zones_gdf.copy()
-    demand = demand_gdf.copy()
-    demand["is_covered"] = y_binary
-    
-    # Calculate coverage pct per zone: sum(covered_weight) / sum(total_weight)
-    zone_stats = demand.groupby("zone_id").apply(
-        lambda x: (x.is_covered * x.weight).sum() / x.weight.sum()
-    )
-    
-    gdf["coverage_pct"] = gdf.zone_id.map(zone_stats).fillna(0)
-    return gdf
+    if aggregator is None:
+        aggregator = ZoneAggregator(zones_gdf, demand_gdf)
+    return aggregator.write_coverage(zones_gdf, y_binary, columns=columns)
 
-def compute_baseline_coverage(zones_gdf: gpd.GeoDataFrame, demand_gdf: gpd.GeoDataFrame, base_coverage_matrix: np.ndarray) -> gpd.GeoDataFrame:
+def compute_baseline_coverage(zones_gdf: gpd.GeoDataFrame, demand_gdf: gpd.GeoDataFrame, base_coverage_matrix: np.ndarray,
+                              aggregator: ZoneAggregator = None) -> gpd.GeoDataFrame:
     """
-    Compute zone-level coverage based on the baseline (existing) station matrix.
-    base_coverage_matrix: (n_demand, n_existing_stations) boolean matrix.
+    Compute zone-level coverage based on the baseline (existing) station matrix,
+    written into zones_gdf in place (see aggregate_coverage_to_zones).
+    base_coverage_matrix: (n_demand, n_existing_stations) boolean matrix (dense or scipy sparse).
     """
     # Demand node is baseline-covered if ANY existing station covers it
-    is_covered_base = np.any(base_coverage_matrix, axis=1).astype(int)
-    return aggregate_coverage_to_zones(zones_gdf, demand_gdf, is_covered_base)
+    if sparse.issparse(base_coverage_matrix):
+        is_covered_base = (np.asarray(base_coverage_matrix.sum(axis=1)).ravel() > 0).astype(int)
+    else:
+        is_covered_base = np.any(base_coverage_matrix, axis=1).astype(int)
+    return aggregate_coverage_to_zones(zones_gdf, demand_gdf, is_covered_base, aggregator=aggregator)
 
-def compute_optimized_coverage(zones_gdf: gpd.GeoDataFrame, demand_gdf: gpd.GeoDataFrame, y_optimized: np.ndarray) -> gpd.GeoDataFrame:
+def compute_optimized_coverage(zones_gdf: gpd.GeoDataFrame, demand_gdf: gpd.GeoDataFrame, y_optimized: np.ndarray,
+                               aggregator: ZoneAggregator = None, columns: list = None) -> gpd.GeoDataFrame:
     """
-    Compute zone-level coverage based on the optimized model output.
-    y_optimized: (n_demand,) binary array.
+    Compute zone-level coverage based on the optimized model output,
+    written into zones_gdf in place (see aggregate_coverage_to_zones).
+    y_optimized: (n_demand,) binary array, or (n_demand, n_scenarios) for a sweep.
     """
-    return aggregate_coverage_to_zones(zones_gdf, demand_gdf, y_optimized)
+    return aggregate_coverage_to_zones(zones_gdf, demand_gdf, y_optimized, aggregator=aggregator, columns=columns)
 
-def summarize_by_type(zones_gdf: gpd.GeoDataFrame, col: str) -> pd.DataFrame:
+def summarize_by_type(zones_gdf: gpd.GeoDataFrame, col) -> pd.DataFrame:
     """
     Group coverage statistics by zone type (Urban, Suburban, etc.).
+    col may be a single column or a list of scenario columns summarized together.
     """
-    return zones_gdf.groupby("zone_type")[col].agg(['mean', 'min', 'max']).round(4)
+    cols = [col] if isinstance(col, str) else list(col)
+    codes, types = pd.factorize(zones_gdf.zone_type, sort=True)
+    values = zones_gdf[cols].to_numpy(dtype=np.float64)
+    # Zones without a type (code -1) are left out, as groupby would
+    typed = codes >= 0
+    if not typed.all():
+        logger.warning(f"{int((~typed).sum())} zones without zone_type left out of the type summary")
+        codes, values = codes[typed], values[typed]
+
+    # Contiguous type groups -> one reduceat per statistic for all columns
+    order = np.argsort(codes, kind="stable")
+    sorted_vals = values[order]
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    counts = np.diff(np.r_[starts, len(order)])
+
+    stats = {
+        "mean": np.add.reduceat(sorted_vals, starts, axis=0) / counts[:, None],
+        "min": np.minimum.reduceat(sorted_vals, starts, axis=0),
+        "max": np.maximum.reduceat(sorted_vals, starts, axis=0),
+    }
+    index = pd.Index(types, name="zone_type")
+    if isinstance(col, str):
+        return pd.DataFrame({k: v[:, 0] for k, v in stats.items()}, index=index).round(4)
+
+    frame = {(c, k): stats[k][:, j] for j, c in enumerate(cols) for k in stats}
+    return pd.DataFrame(frame, index=index).round(4)
@@ -3,54 +3,178 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def weighted_gini(values: np.ndarray, weights: np.ndarray) -> float:
+def _lorenz_shares(values: np.ndarray, weights: np.ndarray):
     """
-    Compute the weighted Gini coefficient for a set of values.
-    0 = Perfect equality, 1 = Maximum inequality.
+    Sort by value and return cumulative (share_pop, share_val, total_val_weighted, batched).
+    Inputs may be (n,) or (n, n_scenarios); 1D values with 2D weights share a single sort.
     """
-    if len(values) == 0:
-        return 0.0
-        
+    values = np.asarray(values, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    batched = values.ndim == 2 or weights.ndim == 2
+
+    if batched:
+        if values.ndim == 1:
+            values = values[:, None]
+        values, weights = np.broadcast_arrays(values, weights if weights.ndim == 2 else weights[:, None])
+
     # Sort data by value
-    idx = np.argsort(values)
-    values = values[idx]
-    weights = weights[idx]
-    
+    idx = np.argsort(values, axis=0)
+    values = np.take_along_axis(values, idx, axis=0)
+    weights = np.take_along_axis(weights, idx, axis=0)
+
     # Calculate cumulative sums
-    cum_weights = np.cumsum(weights)
-    cum_val_weighted = np.cumsum(values * weights)
-    
+    cum_weights = np.cumsum(weights, axis=0)
+    cum_val_weighted = np.cumsum(values * weights, axis=0)
+
     total_weights = cum_weights[-1]
     total_val_weighted = cum_val_weighted[-1]
-    
-    if total_val_weighted == 0:
-        return 0.0
-        
+
     # Relative portions
-    share_pop = cum_weights / total_weights
-    share_val = cum_val_weighted / total_val_weighted
-    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share_pop = cum_weights / total_weights
+        share_val = cum_val_weighted / total_val_weighted
+
+    return share_pop, share_val, total_val_weighted, batched
+
+def _gini_from_shares(share_pop, share_val, total_val_weighted):
+    """Gini from cumulative Lorenz shares (without the leading origin point)."""
     # Gini formula using Lorenz area approach
     # Area under Lorenz curve (trapezoidal rule)
-    area = np.sum((share_val[1:] + share_val[:-1]) * (share_pop[1:] - share_pop[:-1])) / 2
+    area = np.sum((share_val[1:] + share_val[:-1]) * (share_pop[1:] - share_pop[:-1]), axis=0) / 2
     # Area between diagonal and Lorenz curve
     gini = 1 - 2 * (area + (share_val[0] * share_pop[0] / 2))
-    
-    return float(np.clip(gini, 0, 1))
+    return np.where(total_val_weighted == 0, 0.0, np.clip(gini, 0, 1))
+
+def weighted_gini(values: np.ndarray, weights: np.ndarray):
+    """
+    Compute the weighted Gini coefficient for a set of values.
+    0 = Perfect equality, 1 = Maximum inequality.
+
+    values and weights may also be (n, n_profiles) arrays (e.g. 24 hourly demand
+    profiles); every profile is then scored at once and an (n_profiles,) array is returned.
+    """
+    values = np.asarray(values)
+    weights = np.asarray(weights)
+    if len(values) == 0:
+        if values.ndim == 2 or weights.ndim == 2:
+            return np.zeros(weights.shape[1] if weights.ndim == 2 else values.shape[1])
+        return 0.0
+
+    share_pop, share_val, total_val_weighted, batched = _lorenz_shares(values, weights)
+    gini = _gini_from_shares(share_pop, share_val, total_val_weighted)
+
+    return gini if batched else float(gini)
+
+def downsample_lorenz(percent_pop: np.ndarray, percent_val: np.ndarray, n_points: int = 101) -> tuple:
+    """
+    Resample Lorenz coordinates onto n_points evenly spaced population shares.
+    The curve is piecewise linear, so interpolated points lie exactly on it.
+    Works column-wise for (n, n_scenarios) inputs.
+    """
+    grid = np.linspace(0.0, 1.0, n_points)
+    if percent_val.ndim == 1:
+        return grid, np.interp(grid, percent_pop, percent_val)
+    resampled = np.column_stack([
+        np.interp(grid, percent_pop[:, k], percent_val[:, k]) for k in range(percent_val.shape[1])
+    ])
+    return grid, resampled
 
-def lorenz_curve(values: np.ndarray, weights: np.ndarray) -> tuple:
+def lorenz_curve(values: np.ndarray, weights: np.ndarray, n_points: int = None) -> tuple:
     """
     Return coordinates for plotting a Lorenz curve.
     Returns (percent_pop, percent_val).
+
+    Batched (n, n_scenarios) inputs return (n + 1, n_scenarios) coordinates.
+    With n_points, the curve is downsampled to that many evenly spaced population shares
+    (percent_pop is then a shared (n_points,) grid).
     """
-    idx = np.argsort(values)
-    values = values[idx]
-    weights = weights[idx]
-    
-    cum_weights = np.cumsum(weights)
-    cum_val_weighted = np.cumsum(values * weights)
-    
-    percent_pop = np.insert(cum_weights / cum_weights[-1], 0, 0)
-    percent_val = np.insert(cum_val_weighted / cum_val_weighted[-1], 0, 0)
-    
+    share_pop, share_val, _, batched = _lorenz_shares(values, weights)
+
+    origin = np.zeros((1,) + share_pop.shape[1:])
+    percent_pop = np.concatenate([origin, share_pop])
+    percent_val = np.concatenate([origin, share_val])
+
+    if n_points is not None:
+        return downsample_lorenz(percent_pop, percent_val, n_points)
     return percent_pop, percent_val
+
+def gini_and_lorenz(values: np.ndarray, weights: np.ndarray, n_points: int = 101) -> tuple:
+    """
+    Gini coefficient(s) and downsampled Lorenz coordinates from a single sort.
+    Returns (gini, percent_pop, percent_val).
+    """
+    share_pop, share_val, total_val_weighted, batched = _lorenz_shares(values, weights)
+    gini = _gini_from_shares(share_pop, share_val, total_val_weighted)
+
+    origin = np.zeros((1,) + share_pop.shape[1:])
+    grid, percent_val = downsample_lorenz(
+        np.concatenate([origin, share_pop]), np.concatenate([origin, share_val]), n_points
+    )
+    return (gini if batched else float(gini)), grid, percent_val
+
+class StreamingGini:
+    """
+    Bounded-memory weighted Gini / Lorenz approximation for very large node sets.
+
+    Values are accumulated into n_bins equal-width bins over [lo, hi] (exact weight and
+    value-weighted sum per bin), for one or many scenarios at once. Pairs in different
+    bins contribute exactly to the mean-difference form of the Gini, so the binned
+    estimate only misses within-bin inequality:
+
+        G_binned <= G_true <= G_binned + h * sum_b (W_b / W)^2 / (2 * mean)
+
+    where h = (hi - lo) / n_bins, W_b is the weight in bin b and mean is the weighted mean.
+    Values outside [lo, hi] are clipped into the edge bins (the bound then no longer holds).
+    """
+    def __init__(self, n_bins: int = 1000, lo: float = 0.0, hi: float = 1.0, n_scenarios: int = None):
+        self.n_bins = n_bins
+        self.lo = lo
+        self.hi = hi
+        self.n_scenarios = n_scenarios
+        shape = (n_bins,) if n_scenarios is None else (n_bins, n_scenarios)
+        self.bin_weight = np.zeros(shape)
+        self.bin_value = np.zeros(shape)
+
+    @property
+    def bin_width(self) -> float:
+        return (self.hi - self.lo) / self.n_bins
+
+    def update(self, values: np.ndarray, weights: np.ndarray) -> None:
+        """Add a chunk of (n,) or (n, n_scenarios) values with (n,) or matching weights."""
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        if values.ndim == 2 and weights.ndim == 1:
+            weights = np.broadcast_to(weights[:, None], values.shape)
+
+        bins = np.clip(((values - self.lo) / self.bin_width).astype(np.int64), 0, self.n_bins - 1)
+        if values.ndim == 1:
+            self.bin_weight += np.bincount(bins, weights, minlength=self.n_bins)
+            self.bin_value += np.bincount(bins, values * weights, minlength=self.n_bins)
+            return
+
+        # Flat (bin, scenario) index -> one bincount for all scenarios
+        k = values.shape[1]
+        flat = (bins * k + np.arange(k)).ravel()
+        size = self.n_bins * k
+        self.bin_weight += np.bincount(flat, weights.ravel(), minlength=size).reshape(self.n_bins, k)
+        self.bin_value += np.bincount(flat, (values * weights).ravel(), minlength=size).reshape(self.n_bins, k)
+
+    def _bin_means(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.bin_weight > 0, self.bin_value / self.bin_weight, 0.0)
+
+    def gini(self):
+        """Binned Gini estimate (a lower bound on the exact value)."""
+        return weighted_gini(self._bin_means(), self.bin_weight)
+
+    def error_bound(self):
+        """Upper bound on (exact Gini - binned Gini)."""
+        total_w = self.bin_weight.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = self.bin_value.sum(axis=0) / total_w
+            bound = self.bin_width * ((self.bin_weight / total_w) ** 2).sum(axis=0) / (2 * mean)
+        return bound
+
+    def lorenz(self, n_points: int = 101) -> tuple:
+        """Downsampled Lorenz coordinates from the binned distribution."""
+        return lorenz_curve(self._bin_means(), self.bin_weight, n_points=n_points)
@@ -1,81 +1,169 @@
 import numpy as np
 import geopandas as gpd
 import logging
-from esda.moran import Moran, Moran_Local
-from libpysal.weights import Queen, KNN
+from scipy import sparse
+
+from .spatial_weights import get_spatial_weights, DEFAULT_KNN_K
+from .lisa_inference import conditional_permutation_pvalues
 
 logger = logging.getLogger(__name__)
 
-def compute_global_morans_i(zones_gdf: gpd.GeoDataFrame, attribute_col: str, permutations: int = 999) -> dict:
+# Upper bound on permuted values held at once during batched permutation inference
+MAX_PERMUTED_ELEMENTS = 8_000_000
+
+def _interpret_morans_i(i_val):
+    """Interpretation logic for a global Moran's I value."""
+    if i_val >= 0.8: return "Strong positive spatial autocorrelation (highly clustered)"
+    if i_val >= 0.5: return "Moderate positive spatial autocorrelation"
+    if i_val >= 0.2: return "Weak positive spatial autocorrelation"
+    if i_val >= -0.1: return "No significant spatial autocorrelation (near random)"
+    return "Dispersed/Negative spatial autocorrelation"
+
+def compute_global_morans_i(zones_gdf: gpd.GeoDataFrame, attribute_col: str, permutations: int = 999,
+                            w=None, knn_k: int = DEFAULT_KNN_K, cache_dir: str = None) -> dict:
     """
     Compute Global Moran's I for a given attribute.
-    Uses Queen weights with KNN(k=6) fallback for disconnected components.
+    Uses Queen weights with KNN(k=knn_k) fallback for disconnected components,
+    cached per geometry set; pass `w` to use a precomputed weights object.
     """
     # Ensure no empty geometries
-    gdf = zones_gdf[~zones_gdf.geometry.is_empty].copy()
-    
-    # Generate weights
-    try:
-        w = Queen.from_dataframe(gdf, use_index=False)
-        if w.n_components > 1:
-            k_val = min(8, len(gdf) - 1)
-            logger.warning(f"Disconnected components found in Queen weights. Falling back to KNN(k={k_val}).")
-            w = KNN.from_dataframe(gdf, k=k_val)
-    except Exception as e:
-        k_val = min(8, len(gdf) - 1)
-        logger.warning(f"Queen weights failed: {e}. Using KNN(k={k_val}).")
-        w = KNN.from_dataframe(gdf, k=k_val)
-
-    # Row-standardize weights
-    w.transform = 'r'
+    gdf = zones_gdf[~zones_gdf.geometry.is_empty]
     
+    if w is None:
+        w = get_spatial_weights(gdf, knn_k=knn_k, cache_dir=cache_dir)
+    
+    from esda.moran import Moran
     y = gdf[attribute_col].values
     moran = Moran(y, w, permutations=permutations)
     
-    # Interpretation logic
-    def _interpret(i_val):
-        if i_val >= 0.8: return "Strong positive spatial autocorrelation (highly clustered)"
-        if i_val >= 0.5: return "Moderate positive spatial autocorrelation"
-        if i_val >= 0.2: return "Weak positive spatial autocorrelation"
-        if i_val >= -0.1: return "No significant spatial autocorrelation (near random)"
-        return "Dispersed/Negative spatial autocorrelation"
-
     return {
         "I": float(moran.I),
         "p_sim": float(moran.p_sim),
         "z_sim": float(moran.z_sim),
-        "interpretation": _interpret(moran.I)
+        "interpretation": _interpret_morans_i(moran.I)
     }
 
-def compute_local_morans_i(zones_gdf: gpd.GeoDataFrame, attribute_col: str) -> gpd.GeoDataFrame:
+def batched_morans_i(values: np.ndarray, w, permutations: int = 999, seed: int = None,
+                     chunk_size: int = None) -> dict:
+    """
+    Global Moran's I for every column of a (n_units, n_attributes) matrix at once.
+    
+    All statistics come from one sparse weights product, and permutation inference
+    reuses the same permutation indices for every attribute, processed in chunks of
+    `chunk_size` permutations to bound memory (by default sized so a chunk holds at most
+    MAX_PERMUTED_ELEMENTS values). Permutations are drawn exactly as esda.Moran draws
+    them, so with the same seed the results match esda.
+    w: libpysal W (a row-standardized copy is used, as esda does; w is not modified) or a
+    scipy sparse weights matrix.
+    Returns (n_attributes,) arrays: I, p_sim, z_sim, EI_sim, seI_sim.
+    """
+    Y = np.asarray(values, dtype=np.float64)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    n, n_attr = Y.shape
+    
+    if sparse.issparse(w):
+        W = sparse.csr_matrix(w)
+        s0 = W.sum()
+    else:
+        # Row-standardize a copy, as esda.Moran does by default; w may be the shared cached
+        # object, so its transform is left untouched
+        W = sparse.csr_matrix(w.sparse, dtype=np.float64, copy=True)
+        row_sums = np.asarray(W.sum(axis=1)).ravel()
+        W = sparse.diags(np.divide(1.0, row_sums, out=np.zeros_like(row_sums), where=row_sums != 0)) @ W
+        s0 = W.sum()
+    
+    if chunk_size is None:
+        chunk_size = int(np.clip(MAX_PERMUTED_ELEMENTS // (n * n_attr), 1, 100))
+    
+    Z = Y - Y.mean(axis=0)
+    z2ss = (Z * Z).sum(axis=0)
+    I = n / s0 * np.einsum("ij,ij->j", Z, W @ Z) / z2ss
+    
+    results = {"I": I}
+    if not permutations:
+        return results
+    
+    rng = np.random.RandomState(seed) if seed is not None else np.random
+    sim = np.empty((permutations, n_attr))
+    for start in range(0, permutations, chunk_size):
+        n_chunk = min(chunk_size, permutations - start)
+        idx = np.stack([rng.permutation(n) for _ in range(n_chunk)], axis=1)  # (n, n_chunk)
+        
+        # Permuted attributes as one (n, n_chunk * n_attr) block -> one sparse product
+        Zp = Z[idx].reshape(n, n_chunk * n_attr)
+        lag = W @ Zp
+        sim[start:start + n_chunk] = (
+            n / s0 * (Zp * lag).sum(axis=0).reshape(n_chunk, n_attr) / z2ss
+        )
+    
+    # Pseudo p-values as in esda (folded to the smaller tail)
+    larger = (sim >= I).sum(axis=0)
+    larger = np.where(permutations - larger < larger, permutations - larger, larger)
+    EI_sim = sim.mean(axis=0)
+    seI_sim = sim.std(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_sim = (I - EI_sim) / seI_sim
+    
+    results.update({
+        "p_sim": (larger + 1.0) / (permutations + 1.0),
+        "z_sim": z_sim,
+        "EI_sim": EI_sim,
+        "seI_sim": seI_sim,
+    })
+    return results
+
+def compute_global_morans_i_batch(zones_gdf: gpd.GeoDataFrame, attribute_cols: list, permutations: int = 999,
+                                  seed: int = None, w=None, knn_k: int = DEFAULT_KNN_K, cache_dir: str = None) -> dict:
+    """
+    Compute Global Moran's I for several attributes (e.g. baseline, optimized and every
+    sensitivity scenario) in one batched pass. Returns {column: result dict} with the same
+    keys as compute_global_morans_i.
+    """
+    gdf = zones_gdf[~zones_gdf.geometry.is_empty]
+    
+    if w is None:
+        w = get_spatial_weights(gdf, knn_k=knn_k, cache_dir=cache_dir)
+    
+    res = batched_morans_i(gdf[list(attribute_cols)].values, w, permutations=permutations, seed=seed)
+    
+    out = {}
+    for k, col in enumerate(attribute_cols):
+        out[col] = {"I": float(res["I"][k]), "interpretation": _interpret_morans_i(res["I"][k])}
+        if permutations:
+            out[col]["p_sim"] = float(res["p_sim"][k])
+            out[col]["z_sim"] = float(res["z_sim"][k])
+    return out
+
+def compute_local_morans_i(zones_gdf: gpd.GeoDataFrame, attribute_col: str, permutations: int = 999,
+                           n_jobs: int = 1, seed: int = None,
+                           w=None, knn_k: int = DEFAULT_KNN_K, cache_dir: str = None) -> gpd.GeoDataFrame:
     """
     Compute Local Moran's I (LISA) and attach cluster labels to the GeoDataFrame.
+    Weights are shared with compute_global_morans_i through the spatial weights cache.
+    Conditional permutation inference runs in chunks across n_jobs processes with
+    per-chunk seeded streams (see lisa_inference), so results are reproducible for a seed.
     """
     gdf = zones_gdf.copy()
     
-    # Weights with fallback
-    try:
-        w = Queen.from_dataframe(gdf, use_index=False)
-        if w.n_components > 1:
-            k_val = min(8, len(gdf) - 1)
-            w = KNN.from_dataframe(gdf, k=k_val)
-    except Exception:
-        k_val = min(8, len(gdf) - 1)
-        w = KNN.from_dataframe(gdf, k=k_val)
-        
-    w.transform = 'r'
+    if w is None:
+        w = get_spatial_weights(gdf, knn_k=knn_k, cache_dir=cache_dir)
     
     y = gdf[attribute_col].values
-    lisa = Moran_Local(y, w, permutations=999)
+    from esda.moran import Moran_Local
+    lisa = Moran_Local(y, w, permutations=0)
+    p_sim = conditional_permutation_pvalues(
+        lisa.z, lisa.w, lisa.Is, permutations=permutations, n_jobs=n_jobs, seed=seed
+    )
     
     # Quadrant labels: 1=HH, 2=LH, 3=LL, 4=HL
     labels = {1: "HH", 2: "LH", 3: "LL", 4: "HL"}
     
     gdf["lisa_I"] = lisa.Is
-    gdf["lisa_p"] = lisa.p_sim
+    gdf["lisa_p"] = p_sim
     gdf["lisa_cluster"] = [
         labels.get(q, "NS") if p < 0.05 else "NS" 
-        for q, p in zip(lisa.q, lisa.p_sim)
+        for q, p in zip(lisa.q, p_sim)
     ]
     
     return gdf
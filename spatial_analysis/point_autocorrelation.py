@@ -0,0 +1,108 @@
+import numpy as np
+import geopandas as gpd
+import logging
+from scipy import sparse, stats
+from scipy.spatial import cKDTree
+
+from .morans_i import batched_morans_i
+from .lisa_inference import conditional_permutation_pvalues
+
+logger = logging.getLogger(__name__)
+
+def point_coordinates(points) -> np.ndarray:
+    """(n, 2) UTM Zone 40N coordinates in meters from a point GeoDataFrame (or pass-through array)."""
+    if isinstance(points, gpd.GeoDataFrame) or isinstance(points, gpd.GeoSeries):
+        utm = points.to_crs("EPSG:32640")
+        return np.column_stack([utm.geometry.x.values, utm.geometry.y.values])
+    return np.asarray(points, dtype=np.float64)
+
+def point_weights(points, k: int = 8, distance_band: float = None) -> sparse.csr_matrix:
+    """
+    Row-standardized sparse spatial weights built directly from point coordinates.
+    Uses the k nearest neighbours, or all neighbours within `distance_band` meters
+    if given. Points with no neighbours (islands) get an empty row.
+    Build once and reuse across every scenario evaluated on the same demand nodes.
+    """
+    coords = point_coordinates(points)
+    n = len(coords)
+    tree = cKDTree(coords)
+
+    if distance_band is not None:
+        pairs = tree.query_pairs(distance_band, output_type="ndarray")
+        rows = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        cols = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    else:
+        k = min(k, n - 1)
+        # k + 1 because each point is its own nearest neighbour
+        _, idx = tree.query(coords, k=k + 1, workers=-1)
+        rows = np.repeat(np.arange(n), k)
+        cols = idx[:, 1:].ravel()
+
+    W = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    W.sum_duplicates()
+
+    row_sums = np.asarray(W.sum(axis=1)).ravel()
+    n_islands = int((row_sums == 0).sum())
+    if n_islands:
+        logger.warning(f"{n_islands} points have no neighbours within the distance band.")
+
+    inv = np.divide(1.0, row_sums, out=np.zeros(n), where=row_sums > 0)
+    return sparse.diags(inv) @ W
+
+def point_global_morans_i(W: sparse.csr_matrix, values: np.ndarray, permutations: int = 0,
+                          seed: int = None) -> dict:
+    """
+    Global Moran's I at demand-node level for one or many scenarios ((n,) or (n, n_scenarios)).
+    Inference uses the analytical normal approximation (no permutations needed at
+    this scale); pass permutations > 0 to add batched permutation inference.
+    """
+    Y = np.asarray(values, dtype=np.float64)
+    results = batched_morans_i(Y, W, permutations=permutations, seed=seed)
+
+    # Moments under normality (Cliff & Ord), as in esda.Moran
+    n = W.shape[0]
+    s0 = W.sum()
+    s1 = 0.5 * (W + W.T).power(2).sum()
+    s2 = ((np.asarray(W.sum(axis=1)).ravel() + np.asarray(W.sum(axis=0)).ravel()) ** 2).sum()
+    EI = -1.0 / (n - 1)
+    VI = (n * n * s1 - n * s2 + 3 * s0 * s0) / ((n - 1) * (n + 1) * s0 * s0) - EI * EI
+
+    z_norm = (results["I"] - EI) / np.sqrt(VI)
+    results.update({
+        "EI": EI,
+        "z_norm": z_norm,
+        "p_norm": 2.0 * stats.norm.sf(np.abs(z_norm)),
+    })
+    if Y.ndim == 1:
+        results = {key: (float(np.squeeze(val)) if np.ndim(val) <= 1 else val) for key, val in results.items()}
+    return results
+
+def point_local_morans_i(W: sparse.csr_matrix, values: np.ndarray, permutations: int = 0,
+                         n_jobs: int = 1, seed: int = None) -> dict:
+    """
+    Local Moran's I for every demand node with one sparse product.
+    Returns Is and quadrant q (1=HH, 2=LH, 3=LL, 4=HL); with permutations > 0,
+    also conditional-permutation p_sim (chunked and optionally parallel).
+    """
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+
+    # Same standardization as esda.Moran_Local
+    z = y - y.mean()
+    sy = y.std()
+    z = z / sy if sy > 0 else z
+    den = (z * z).sum()
+
+    lag = W @ z
+    Is = (n - 1) * z * lag / den if den > 0 else np.zeros(n)
+    q = np.select(
+        [(z > 0) & (lag > 0), (z <= 0) & (lag > 0), (z <= 0) & (lag <= 0)],
+        [1, 2, 3], default=4
+    )
+
+    results = {"Is": Is, "q": q}
+    if permutations:
+        results["p_sim"] = conditional_permutation_pvalues(
+            z, W, Is, permutations=permutations, n_jobs=n_jobs, seed=seed
+        )
+    return results
@@ -0,0 +1,78 @@
+import os
+import pickle
+import hashlib
+import logging
+import numpy as np
+import geopandas as gpd
+import shapely
+
+from .point_autocorrelation import point_coordinates
+
+logger = logging.getLogger(__name__)
+
+# Simplification tolerances (meters) for different map zoom levels; 0 = full detail
+DEFAULT_TOLERANCES = (0.0, 250.0, 1000.0)
+
+class ServiceAreaCache:
+    """
+    Per-candidate coverage footprints derived from the coverage matrix.
+
+    Each candidate's footprint is the convex hull of the station and the demand nodes
+    it actually covers, buffered by `cell_radius_m` so small footprints stay polygons.
+    Footprints are computed once (UTM), simplified for each zoom tolerance and can be
+    persisted to `cache_dir`; maps then only union the open stations' footprints.
+    """
+    def __init__(self, demand_gdf: gpd.GeoDataFrame, candidates_gdf: gpd.GeoDataFrame, coverage_matrix: np.ndarray,
+                 cell_radius_m: float = 500.0, tolerances=DEFAULT_TOLERANCES, cache_dir: str = None):
+        demand_xy = point_coordinates(demand_gdf)
+        station_xy = point_coordinates(candidates_gdf)
+        if hasattr(coverage_matrix, "toarray"):
+            coverage_matrix = coverage_matrix.toarray()
+        coverage_matrix = np.asarray(coverage_matrix, dtype=bool)
+
+        h = hashlib.sha1()
+        for arr in (demand_xy, station_xy, np.packbits(coverage_matrix)):
+            h.update(np.ascontiguousarray(arr).tobytes())
+        h.update(repr((coverage_matrix.shape, cell_radius_m, tuple(tolerances))).encode())
+        self.key = h.hexdigest()
+        self.tolerances = tuple(tolerances)
+
+        cache_path = os.path.join(cache_dir, f"service_areas_{self.key}.pkl") if cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                self.footprints = {tol: shapely.from_wkb(wkb) for tol, wkb in pickle.load(f).items()}
+            logger.info(f"Loaded service areas from {cache_path}")
+        else:
+            full = self._compute_footprints(demand_xy, station_xy, coverage_matrix, cell_radius_m)
+            self.footprints = {tol: (shapely.simplify(full, tol) if tol > 0 else full) for tol in self.tolerances}
+            if cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(cache_path, "wb") as f:
+                    pickle.dump({tol: shapely.to_wkb(g) for tol, g in self.footprints.items()}, f)
+
+    @staticmethod
+    def _compute_footprints(demand_xy, station_xy, coverage_matrix, cell_radius_m) -> np.ndarray:
+        footprints = np.empty(len(station_xy), dtype=object)
+        for j in range(len(station_xy)):
+            pts = np.vstack([station_xy[j:j + 1], demand_xy[coverage_matrix[:, j]]])
+            footprints[j] = shapely.convex_hull(shapely.multipoints(pts))
+        return shapely.buffer(footprints, cell_radius_m)
+
+    def _tolerance(self, tolerance):
+        if tolerance is None:
+            return self.tolerances[0]
+        if tolerance not in self.footprints:
+            raise ValueError(f"Tolerance {tolerance} not cached, expected one of {self.tolerances}")
+        return tolerance
+
+    def footprints_gdf(self, station_idx=None, tolerance=None) -> gpd.GeoDataFrame:
+        """Individual footprints (WGS84) for the given stations (default: all candidates)."""
+        geoms = self.footprints[self._tolerance(tolerance)]
+        idx = np.arange(len(geoms)) if station_idx is None else np.asarray(station_idx, dtype=int)
+        return gpd.GeoDataFrame({"station_idx": idx}, geometry=list(geoms[idx]), crs="EPSG:32640").to_crs("EPSG:4326")
+
+    def union(self, station_idx, tolerance=None) -> gpd.GeoSeries:
+        """Combined service area (WGS84) of the given open stations."""
+        geoms = self.footprints[self._tolerance(tolerance)]
+        merged = shapely.union_all(geoms[np.asarray(station_idx, dtype=int)])
+        return gpd.GeoSeries([merged], crs="EPSG:32640").to_crs("EPSG:4326")
@@ -0,0 +1,78 @@
+import os
+import pickle
+import hashlib
+import logging
+import geopandas as gpd
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from libpysal.weights import W
+
+logger = logging.getLogger(__name__)
+
+# Matches spatial_analysis.knn_k in configs/base.yaml
+DEFAULT_KNN_K = 6
+
+# In-memory cache: key -> libpysal W (zone geometries never change between calls)
+_WEIGHTS_CACHE = {}
+
+def geometry_hash(gdf: gpd.GeoDataFrame) -> str:
+    """Stable hash of a GeoDataFrame's geometries (WKB, in row order)."""
+    h = hashlib.sha1()
+    for wkb in gdf.geometry.to_wkb().values:
+        h.update(wkb)
+    return h.hexdigest()
+
+def build_spatial_weights(gdf: gpd.GeoDataFrame, knn_k: int = DEFAULT_KNN_K) -> "W":
+    """
+    Build row-standardized Queen contiguity weights,
+    falling back to KNN(k=knn_k) when Queen weights are disconnected (e.g. islands).
+    """
+    from libpysal.weights import Queen, KNN
+
+    k_val = min(knn_k, len(gdf) - 1)
+    try:
+        w = Queen.from_dataframe(gdf, use_index=False)
+        if w.n_components > 1:
+            logger.warning(f"Disconnected components found in Queen weights. Falling back to KNN(k={k_val}).")
+            w = KNN.from_dataframe(gdf, k=k_val)
+    except Exception as e:
+        logger.warning(f"Queen weights failed: {e}. Using KNN(k={k_val}).")
+        w = KNN.from_dataframe(gdf, k=k_val)
+
+    # Row-standardize weights
+    w.transform = 'r'
+    return w
+
+def get_spatial_weights(gdf: gpd.GeoDataFrame, knn_k: int = DEFAULT_KNN_K, cache_dir: str = None) -> "W":
+    """
+    Return cached spatial weights for these geometries and weight specification.
+    Looks in memory first, then in cache_dir (if given), and builds them only on a miss.
+    """
+    key = f"{geometry_hash(gdf)}_queen_knn{knn_k}"
+    if key in _WEIGHTS_CACHE:
+        return _WEIGHTS_CACHE[key]
+
+    cache_path = os.path.join(cache_dir, f"{key}.pkl") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, "rb") as f:
+            w = pickle.load(f)
+        logger.info(f"Loaded spatial weights from {cache_path}")
+    else:
+        w = build_spatial_weights(gdf, knn_k=knn_k)
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, "wb") as f:
+                pickle.dump(w, f)
+
+    _WEIGHTS_CACHE[key] = w
+    return w
+
+def spatial_weights_from_config(gdf: gpd.GeoDataFrame, params: dict, cache_dir: str = None) -> "W":
+    """Get spatial weights using the `spatial_analysis` section of a loaded YAML config."""
+    knn_k = params.get("spatial_analysis", {}).get("knn_k", DEFAULT_KNN_K)
+    return get_spatial_weights(gdf, knn_k=knn_k, cache_dir=cache_dir)
+
+def clear_weights_cache() -> None:
+    """Drop all in-memory cached weights."""
+    _WEIGHTS_CACHE.clear()
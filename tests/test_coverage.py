@@ -34,3 +34,103 @@ def test_no_improvement():
     """Test closure when no progress is made."""
     res = compute_gap_closure(0.6, 0.6)
     assert res["pct_closed"] == 0.0
+
+def test_incremental_coverage_state_matches_recompute():
+    """Open/close updates of per-node cover counts match a full recomputation."""
+    import numpy as np
+    from optimization.whatif_service import CoverageState
+    
+    rng = np.random.default_rng(3)
+    cov = rng.random((60, 15)) < 0.2
+    weights = rng.uniform(1, 10, 60)
+    zones = rng.integers(0, 4, 60)
+    state = CoverageState(cov, weights, zones, {z: 1.0 for z in range(4)}, open_idx=[0, 3, 7])
+    
+    preview = state.what_if(open_idx=[5], close_idx=[3])
+    assert state.is_open[3] and not state.is_open[5]  # reverted
+    
+    state.what_if(open_idx=[5], close_idx=[3], commit=True)
+    expected = cov[:, [0, 5, 7]].any(axis=1)
+    assert np.isclose(state.metrics()["coverage_pct"], weights[expected].sum() / weights.sum())
+    assert np.isclose(preview["coverage_pct"], state.metrics()["coverage_pct"])
+    assert np.array_equal(state.cover_count, cov[:, [0, 5, 7]].sum(axis=1))
+    
+    # Failed requests leave the configuration untouched
+    with pytest.raises(ValueError):
+        state.apply(open_idx=[1, 5])
+    assert not state.is_open[1]
+
+def _shared_coverage_worker(station_idx):
+    from optimization.shared_arrays import worker_arrays
+    from optimization.coverage_matrix import baseline_coverage_stats
+    
+    arrays = worker_arrays()
+    dense = baseline_coverage_stats(station_idx, arrays["coverage"], arrays["weights"])["coverage_pct"]
+    csr = baseline_coverage_stats(station_idx, arrays["coverage_csr"], arrays["weights"])["coverage_pct"]
+    return dense, csr, arrays["coverage"].flags.writeable
+
+def test_shared_arrays_attach_in_workers_and_release():
+    """Workers attach published dense and CSR matrices zero-copy; closing unlinks the memory."""
+    import numpy as np
+    from scipy import sparse
+    from multiprocessing import shared_memory
+    from concurrent.futures import ProcessPoolExecutor
+    from optimization.shared_arrays import SharedArrays, init_worker
+    from optimization.mclp_model import MCLPModel
+    
+    rng = np.random.default_rng(4)
+    cov = rng.random((200, 30)) < 0.1
+    weights = rng.uniform(1, 10, 200)
+    
+    with SharedArrays({"coverage": cov, "coverage_csr": sparse.csr_matrix(cov), "weights": weights}) as shared:
+        names = [p["shm"] for entry in shared.spec.values() for p in entry["parts"].values()]
+        with ProcessPoolExecutor(2, initializer=init_worker, initargs=(shared.spec,)) as pool:
+            results = list(pool.map(_shared_coverage_worker, [[0, 1, 2], [5, 6]]))
+    
+    for (dense, csr, writeable), idx in zip(results, [[0, 1, 2], [5, 6]]):
+        expected = weights[cov[:, idx].any(axis=1)].sum() / weights.sum()
+        assert dense == pytest.approx(expected) and csr == pytest.approx(expected)
+        assert not writeable
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=names[0])
+    
+    # The model accepts sparse coverage directly
+    dense_res = MCLPModel(cov, weights, p_stations=3, p_vehicles=0).solve()
+    sparse_res = MCLPModel(sparse.csr_matrix(cov), weights, p_stations=3, p_vehicles=0).solve()
+    assert sparse_res["obj_value"] == pytest.approx(dense_res["obj_value"])
+
+def test_whatif_service_rejects_malformed_bodies():
+    """Malformed what-if bodies get a 400 response instead of a dropped connection."""
+    import asyncio
+    import json
+    import numpy as np
+    import geopandas as gpd
+    from shapely.geometry import Point
+    from optimization.whatif_service import WhatIfService
+    
+    zones = gpd.GeoDataFrame({"zone_id": [0, 1], "population": [10.0, 20.0]}, geometry=[Point(0, 0), Point(1, 0)])
+    demand = gpd.GeoDataFrame({"zone_id": [0, 1, 1], "weight": [1.0, 2.0, 3.0]}, geometry=[Point(0, 0)] * 3)
+    stations = gpd.GeoDataFrame({"station_id": [10, 11, 12], "zone_name": ["a", "b", "b"]}, geometry=[Point(0, 0)] * 3)
+    cov = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=bool)
+    service = WhatIfService(zones, demand, stations, cov, open_station_ids=[10])
+    
+    async def request(body: bytes):
+        server = await asyncio.start_server(service._serve_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"POST /whatif HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(payload)
+    
+    try:
+        for body in ({"swap": [10]}, {"swap": [[10]]}, {"swap": 10}, {"open": "b"}, [10], "swap"):
+            status, payload = asyncio.run(request(json.dumps(body).encode()))
+            assert status == 400 and payload["error"]
+        status, payload = asyncio.run(request(json.dumps({"swap": [[10, 11]]}).encode()))
+        assert status == 200 and payload["opened"] == [11] and payload["closed"] == [10]
+    finally:
+        service._pool.shutdown()
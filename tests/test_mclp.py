@@ -44,3 +44,418 @@ def test_mclp_solver_consistency():
     
     if os.environ.get("USE_PULP") == "1":
         assert model.solver_type == "pulp"
+
+def test_mclp_worst_profile_objective():
+    """Worst-profile objective protects the profile the weighted objective sacrifices."""
+    # Node 0: daytime demand (industrial), node 1: night-time demand (residential)
+    cov = np.array([[1, 0], [0, 1]])
+    profiles = np.array([[100.0, 1.0], [50.0, 9.0]])  # columns: day, night
+    
+    weighted = MCLPModel(cov, profiles, p_stations=1, p_vehicles=1)
+    res_w = weighted.solve()
+    assert res_w["open_stations"] == [0]
+    assert len(res_w["profile_coverage_pct"]) == 2
+    
+    worst = MCLPModel(cov, profiles, p_stations=1, p_vehicles=1, objective="worst_profile")
+    res_m = worst.solve()
+    # Station 0 -> (0.67 day, 0.1 night); station 1 -> (0.33 day, 0.9 night)
+    assert res_m["open_stations"] == [1]
+    assert abs(res_m["coverage_pct"] - 1 / 3) < 1e-6
+
+def test_coverage_equity_frontier_single_build():
+    """Epsilon sweep trades total coverage for zone-type equity on one built model."""
+    from optimization.pareto import coverage_equity_frontier
+    
+    # Urban nodes 0-2 share one candidate; the peripheral node needs its own station
+    cov = np.array([
+        [1, 0, 0],
+        [1, 0, 0],
+        [0, 1, 0],
+        [0, 0, 1],
+    ])
+    weights = np.array([50.0, 50.0, 40.0, 10.0])
+    types = np.array(["urban", "urban", "urban", "peripheral"])
+    
+    builds = []
+    original_build = MCLPModel.build
+    MCLPModel.build = lambda self: (builds.append(1), original_build(self))
+    try:
+        frontier = coverage_equity_frontier(cov, weights, types, p_stations=2, p_vehicles=None,
+                                            epsilons=[0.0, 0.5, 0.8, 1.0])
+    finally:
+        MCLPModel.build = original_build
+    
+    assert len(builds) == 1
+    # eps=0.8 would need all three stations -> infeasible, sweep stops there
+    assert frontier.epsilon.tolist() == [0.0, 0.5]
+    assert abs(frontier.coverage_pct.iloc[0] - 140 / 150) < 1e-6
+    assert frontier.coverage_peripheral.iloc[-1] == 1.0
+    assert abs(frontier.coverage_pct.iloc[-1] - 110 / 150) < 1e-6
+    assert frontier.coverage_pct.is_monotonic_decreasing
+    
+    # A time limit without incumbent is not infeasibility: the point is recorded and the sweep goes on
+    original_solve = MCLPModel.solve
+    def solve(self, *args, **kwargs):
+        res = original_solve(self, *args, **kwargs)
+        if self._type_min == 0.5:
+            res.update(status="Not Solved", obj_value=float("nan"))
+        return res
+    MCLPModel.solve = solve
+    try:
+        frontier = coverage_equity_frontier(cov, weights, types, p_stations=2, p_vehicles=None,
+                                            epsilons=[0.0, 0.5, 0.6, 0.8])
+    finally:
+        MCLPModel.solve = original_solve
+    assert frontier.epsilon.tolist() == [0.0, 0.5, 0.6]
+    assert frontier.coverage_pct.isna().tolist() == [False, True, False]
+
+def test_relocation_restores_coverage_within_travel_limit():
+    """Idle units move up to uncovered stations, but only along arcs within the travel limit."""
+    from optimization.relocation import RelocationModel
+    
+    # 3 stations, each covering its own demand node; station 2 is far from station 0
+    cov = np.eye(3, dtype=bool)
+    weights = np.array([10.0, 50.0, 40.0])
+    tt = np.array([[0, 5, 30], [5, 0, 6], [30, 6, 0]], dtype=float)
+    for solver_type in ("auto", "highs"):
+        model = RelocationModel(cov, weights, tt, max_relocation_min=10, solver_type=solver_type)
+        
+        # Units 0,1 at station 0, unit 2 at station 1 (busy): station 1 and 2 uncovered
+        res = model.recommend([0, 0, 1], busy=[2])
+        assert res["coverage_before"] == pytest.approx(0.1)
+        assert res["coverage_after"] == pytest.approx(0.6)
+        assert [(m["from"], m["to"]) for m in res["moves"]] == [(0, 1)]
+        
+        # Nothing to gain: nobody moves
+        res = model.recommend([0, 1, 2])
+        assert res["n_moves"] == 0 and res["coverage_after"] == pytest.approx(1.0)
+
+def test_solver_backend_registry_caches_detection(monkeypatch):
+    """Backends register a probe that runs once per process; solver_type can force a backend."""
+    from optimization import backends
+    
+    monkeypatch.delenv("USE_PULP", raising=False)
+    monkeypatch.setattr(backends, "_BACKENDS", dict(backends._BACKENDS))
+    monkeypatch.setattr(backends, "_AVAILABLE", {"gurobi": False})
+    calls = []
+    
+    @backends.register_backend("fake_fast", priority=100)
+    def _probe():
+        calls.append(1)
+        return True
+    
+    assert backends.detect_solver() == "fake_fast"
+    assert backends.detect_solver("auto") == "fake_fast"
+    assert backends.detect_solver("pulp") == "pulp"
+    assert len(calls) == 1
+    
+    # An unavailable forced backend falls back to automatic detection
+    assert backends.detect_solver("gurobi") == "fake_fast"
+    with pytest.raises(ValueError):
+        backends.detect_solver("no_such_backend")
+    
+    # USE_PULP=1 (CI) only changes "auto"; an explicitly requested backend is kept
+    monkeypatch.setenv("USE_PULP", "1")
+    assert backends.detect_solver() == "pulp"
+    assert backends.detect_solver("fake_fast") == "fake_fast"
+
+def test_incremental_updates_match_fresh_build():
+    """Budget, threshold and weight updates on a built model give the same optimum as rebuilding."""
+    rng = np.random.default_rng(11)
+    times = rng.uniform(0, 20, (40, 12))
+    weights = rng.uniform(1, 100, 40)
+    
+    model = MCLPModel(times <= 8, weights, p_stations=2, p_vehicles=0)
+    model.solve()
+    
+    model.set_station_budget(4)
+    assert model.set_threshold(times, 10) == int(((times > 8) & (times <= 10)).sum())
+    new_weights = weights[::-1].copy()
+    model.set_demand_weights(new_weights)
+    res = model.solve(warm_start=True)
+    
+    fresh = MCLPModel(times <= 10, new_weights, p_stations=4, p_vehicles=0).solve()
+    assert res["obj_value"] == pytest.approx(fresh["obj_value"])
+    
+    # Tightening the threshold removes coverage terms again
+    model.set_threshold(times, 8)
+    res = model.solve(warm_start=True)
+    fresh = MCLPModel(times <= 8, new_weights, p_stations=4, p_vehicles=0).solve()
+    assert res["obj_value"] == pytest.approx(fresh["obj_value"])
+    
+    with pytest.raises(ValueError):
+        model.set_vehicle_budget(10)
+
+def test_cvar_saa_protects_worst_scenarios():
+    """CVaR over demand scenarios favors the station robust to a demand shift; out-of-sample agrees."""
+    from optimization.stochastic import solve_saa, out_of_sample_coverage
+    
+    # Station 0 covers the usually-large node 0, station 1 covers nodes 1-2 whose demand is volatile
+    cov = np.array([[1, 0], [0, 1], [0, 1]])
+    scenarios = np.array([[10, 10, 10, 1], [1, 1, 1, 5], [1, 1, 1, 5]], dtype=float)
+    
+    mean = solve_saa(cov, scenarios, p_stations=1, p_vehicles=0)
+    assert list(mean["open_stations"]) == [0]
+    
+    # With 4 equiprobable scenarios, CVaR at 25% is the worst scenario's coverage
+    cvar = solve_saa(cov, scenarios, p_stations=1, p_vehicles=0, objective="cvar", cvar_alpha=0.25)
+    assert list(cvar["open_stations"]) == [1]
+    assert cvar["coverage_pct"] == pytest.approx(2 / 12)
+    
+    stats = out_of_sample_coverage(cov, {"good": [0], "none": []}, scenarios[:, 0], n_scenarios=500,
+                                   chunk_size=128, seed=0)
+    assert stats.loc["good", "mean"] > stats.loc["none", "mean"] == 0
+    assert stats.loc["good", "min"] <= stats.loc["good", "p05"] <= stats.loc["good", "mean"]
+
+def test_run_registry_reuses_identical_runs(tmp_path):
+    """Runs are keyed by data, parameters and code; identical keys are served from the registry."""
+    from optimization.run_registry import RunRegistry
+    
+    data = tmp_path / "demand.geojson"
+    data.write_text('{"type": "FeatureCollection", "features": []}')
+    registry = RunRegistry(str(tmp_path / "runs.sqlite"))
+    key = registry.make_key([str(data)], {"p_stations": 2, "threshold_min": 8.0})
+    assert registry.lookup(key) is None
+    
+    result = {"status": "Optimal", "solver": "pulp", "coverage_pct": 0.9, "solve_time_sec": 1.0, "open_stations": [1, 4]}
+    run_id = registry.record(key, result, {"total_sec": 2.0})
+    assert registry.lookup(key)["result"]["open_stations"] == [1, 4]
+    registry.record(key, result, cached_from=run_id)
+    
+    # Parameter order does not matter, values and data contents do
+    assert registry.make_key([str(data)], {"threshold_min": 8.0, "p_stations": 2})["run_key"] == key["run_key"]
+    assert registry.lookup(registry.make_key([str(data)], {"p_stations": 3, "threshold_min": 8.0})) is None
+    data.write_text('{"type": "FeatureCollection", "features": [], "name": "v2"}')
+    key2 = registry.make_key([str(data)], {"p_stations": 2, "threshold_min": 8.0})
+    assert key2["run_key"] != key["run_key"]
+    
+    # Unsolved runs are recorded but never reused
+    registry.record(key2, {**result, "status": "Infeasible"})
+    assert registry.lookup(key2) is None
+    
+    history = registry.history()
+    assert list(history["id"]) == [1, 3]
+    assert list(history["param_p_stations"]) == [2, 2]
+    assert len(registry.history(include_cached=True)) == 3
+    
+    registry.record(key, {**result, "solve_time_sec": 5.0})
+    slow = registry.solve_time_regressions(factor=2.0)
+    assert list(slow["id"]) == [4]
+    assert slow.loc[0, "slowdown"] == pytest.approx(5.0)
+
+def test_checkpoint_resume_and_mismatch(tmp_path):
+    """Solves checkpoint their incumbent; resuming needs the same inputs and accumulates time."""
+    import json
+    rng = np.random.default_rng(5)
+    cov = rng.random((60, 15)) < 0.2
+    weights = rng.uniform(1, 100, 60)
+    path = str(tmp_path / "ckpt.json")
+    
+    res = MCLPModel(cov, weights, p_stations=3, p_vehicles=6).solve(checkpoint_path=path)
+    checkpoint = json.load(open(path))
+    assert checkpoint["open_stations"] == res["open_stations"]
+    assert checkpoint["obj_value"] == pytest.approx(res["obj_value"])
+    
+    resumed_model = MCLPModel(cov, weights, p_stations=3, p_vehicles=6)
+    assert resumed_model.input_hash() == checkpoint["input_hash"]
+    resumed = resumed_model.solve(checkpoint_path=path, resume=True)
+    assert resumed["obj_value"] == pytest.approx(res["obj_value"])
+    assert json.load(open(path))["elapsed_sec"] >= checkpoint["elapsed_sec"]
+    
+    with pytest.raises(ValueError):
+        MCLPModel(cov, weights, p_stations=4, p_vehicles=6).solve(checkpoint_path=path, resume=True)
+
+def test_time_limited_runs_reused_only_without_checkpoint(tmp_path):
+    """TIME_LIMIT runs are reusable by default, but not when the lookup asks for proven runs only."""
+    from optimization.run_registry import RunRegistry, PROVEN_STATUSES
+    
+    data = tmp_path / "demand.geojson"
+    data.write_text('{"type": "FeatureCollection", "features": []}')
+    registry = RunRegistry(str(tmp_path / "runs.sqlite"))
+    key = registry.make_key([str(data)], {"p_stations": 2, "threshold_min": 8.0})
+    registry.record(key, {"status": "TIME_LIMIT", "solver": "pulp", "coverage_pct": 0.8, "solve_time_sec": 1.0})
+    assert registry.lookup(key)["status"] == "TIME_LIMIT"
+    assert registry.lookup(key, PROVEN_STATUSES) is None
+
+def test_pulp_checkpoint_slices_start_from_greedy(tmp_path, monkeypatch):
+    """A cold checkpointed CBC solve is seeded with the greedy solution, so its first slice is short."""
+    import pulp
+    calls = []
+    real_cmd = pulp.PULP_CBC_CMD
+    
+    def spy(**kwargs):
+        if "timeLimit" in kwargs:  # not the availability probe
+            calls.append(kwargs)
+        return real_cmd(**kwargs)
+    
+    monkeypatch.setattr(pulp, "PULP_CBC_CMD", spy)
+    rng = np.random.default_rng(5)
+    cov = rng.random((60, 15)) < 0.2
+    weights = rng.uniform(1, 100, 60)
+    path = str(tmp_path / "ckpt.json")
+    
+    res = MCLPModel(cov, weights, p_stations=3, p_vehicles=6, solver_type="pulp").solve(
+        time_limit=60, checkpoint_path=path, checkpoint_interval=5, checkpoint_slices=True)
+    assert calls[0]["warmStart"] and calls[0]["timeLimit"] == 5
+    assert res["status"] == "Optimal" and os.path.exists(path)
+    
+    # Without checkpoint_slices CBC gets the whole time limit in one search
+    calls.clear()
+    MCLPModel(cov, weights, p_stations=3, p_vehicles=6, solver_type="pulp").solve(
+        time_limit=60, checkpoint_path=path, checkpoint_interval=5)
+    assert len(calls) == 1 and calls[0]["timeLimit"] == 60 and not calls[0]["warmStart"]
+
+def test_cbc_checkpoint_stores_best_bound(tmp_path):
+    """A time-limited CBC solve records the bound from its log, not just the incumbent."""
+    import json
+    from optimization.portfolio import greedy_mclp
+    rng = np.random.default_rng(0)
+    cov = rng.random((1500, 200)) < 0.03
+    weights = rng.uniform(1, 100, 1500)
+    path = str(tmp_path / "ckpt.json")
+    
+    model = MCLPModel(cov, weights, p_stations=20, p_vehicles=40, solver_type="pulp")
+    model.set_solution(*greedy_mclp(cov, weights, 20, 40))
+    res = model.solve(time_limit=3, warm_start=True, checkpoint_path=path)
+    checkpoint = json.load(open(path))
+    assert checkpoint["obj_bound"] is not None and checkpoint["obj_bound"] >= checkpoint["obj_value"] - 1e-6
+    if res["status"] == "TIME_LIMIT":
+        assert res["optimality_gap"] == pytest.approx(
+            (checkpoint["obj_bound"] - checkpoint["obj_value"]) / checkpoint["obj_value"])
+
+def test_portfolio_race_matches_single_solve():
+    """The portfolio returns a proven optimum and reports every strategy; greedy alone can prove it."""
+    from optimization.portfolio import solve_portfolio, greedy_mclp
+    rng = np.random.default_rng(2)
+    cov = rng.random((80, 20)) < 0.15
+    weights = rng.uniform(1, 100, 80)
+    
+    single = MCLPModel(cov, weights, p_stations=4, p_vehicles=8).solve()
+    res = solve_portfolio(cov, weights, p_stations=4, p_vehicles=8, time_limit=30, core_budget=2)
+    assert res["status"] in ("OPTIMAL", "Optimal")
+    assert res["obj_value"] == pytest.approx(single["obj_value"])
+    assert res["portfolio"][0]["strategy"] == "greedy"
+    assert sum(res["vehicles_per_station"].values()) <= 8
+    
+    x, v = greedy_mclp(cov, weights, p_stations=4, p_vehicles=6)
+    assert x.sum() == 4 and v.sum() == 6 and np.all(v[x == 0] == 0)
+    
+    # Enough stations to cover everything: the greedy incumbent is provably optimal
+    res = solve_portfolio(cov, weights, p_stations=20, p_vehicles=0, time_limit=30)
+    assert res["strategy"] == "greedy" and res["status"] == "OPTIMAL"
+
+def test_decomposition_matches_monolithic_optimum():
+    """Independent coverage components solved per budget and combined by DP give the monolithic optimum."""
+    from itertools import product
+    from scipy import sparse
+    from optimization.decomposition import coverage_components, combine_budget_curves, solve_decomposed
+    rng = np.random.default_rng(4)
+    blocks = [rng.random((30, 6)) < 0.4 for _ in range(3)] + [np.ones((5, 1), dtype=bool)]
+    cov = sparse.block_diag(blocks).toarray()
+    perm_d, perm_c = rng.permutation(cov.shape[0]), rng.permutation(cov.shape[1])
+    cov = cov[perm_d][:, perm_c]
+    weights = rng.uniform(1, 100, cov.shape[0])
+    
+    components = coverage_components(cov)
+    assert sorted(len(c) for _, c in components) == [1, 6, 6, 6]
+    
+    for p_stations, p_vehicles in ((5, 10), (7, 4)):
+        mono = MCLPModel(cov, weights, p_stations, p_vehicles).solve()
+        dec = solve_decomposed(cov, weights, p_stations, p_vehicles)
+        assert dec["status"] == "OPTIMAL"
+        assert dec["obj_value"] == pytest.approx(mono["obj_value"])
+        assert dec["n_stations_used"] <= min(p_stations, p_vehicles)
+        assert sum(dec["vehicles_per_station"].values()) <= p_vehicles
+        assert sum(c["budget"] for c in dec["components"]) == dec["n_stations_used"]
+    
+    # Exact split for non-concave curves, checked by enumeration
+    curves = [[0, 1, 9, 10], [0, 4, 5], [0, 3, 3.5, 8]]
+    value, split = combine_budget_curves(curves, 4)
+    best = max(sum(c[k] for c, k in zip(curves, ks))
+               for ks in product(*(range(len(c)) for c in curves)) if sum(ks) <= 4)
+    assert value == best == sum(c[k] for c, k in zip(curves, split))
+
+def test_pmedian_k_nearest_grows_to_exact_optimum():
+    """Restricted k-nearest assignment grows k where needed and matches brute-force p-median."""
+    from itertools import combinations
+    from scipy.spatial.distance import cdist
+    from optimization.pmedian import PMedianModel, KNearest
+    rng = np.random.default_rng(5)
+    demand_xy, station_xy = rng.uniform(0, 20000, (40, 2)), rng.uniform(0, 20000, (10, 2))
+    times = cdist(demand_xy, station_xy) / 1000.0  # minutes at 60 km/h
+    weights = rng.uniform(1, 100, 40)
+    
+    best = min(weights @ times[:, list(s)].min(axis=1) for s in combinations(range(10), 3))
+    res = PMedianModel(times, weights, p_stations=3, p_vehicles=6, k=1, threshold_min=8.0).solve()
+    assert res["obj_value"] == pytest.approx(best)
+    assert res["k_rounds"] > 1 and res["k_max"] > 1
+    assert res["mean_response_time_min"] == pytest.approx(best / weights.sum())
+    assert sum(res["vehicles_per_station"].values()) <= 6
+    
+    # KD-tree queries on coordinates give the same solution without the dense matrix
+    nearest = KNearest(demand_xy=demand_xy, station_xy=station_xy, speed_kmh=60.0)
+    kd = PMedianModel(nearest, weights, p_stations=3, p_vehicles=6, k=1, threshold_min=8.0).solve()
+    assert kd["obj_value"] == pytest.approx(best)
+    assert kd["coverage_pct"] == pytest.approx(res["coverage_pct"])
+    
+    # Stopping while the boundary option is still in use is not a proof of optimality
+    capped = PMedianModel(times, weights, p_stations=3, p_vehicles=6, k=1).solve(max_rounds=1)
+    assert capped["status"] == "FEASIBLE" and capped["k_rounds"] == 1
+    assert capped["obj_value"] >= best - 1e-6 and capped["optimality_gap"] >= 0
+    
+    highs = PMedianModel(times, weights, p_stations=3, p_vehicles=6, k=1, solver_type="highs").solve()
+    assert highs["solver"] == "highs" and highs["status"] == "OPTIMAL"
+    assert highs["obj_value"] == pytest.approx(best) and highs["k_rounds"] > 1
+    assert sum(highs["vehicles_per_station"].values()) <= 6
+
+def test_marginal_vehicle_allocation_matches_enumeration():
+    """Greedy marginal analysis on Erlang-loss availability is optimal and follows station workload."""
+    from itertools import product
+    from optimization.vehicle_allocation import allocate_vehicles, erlang_b
+    assert erlang_b(2, [1.0])[0] == pytest.approx([1.0, 0.5, 0.2])
+    
+    rng = np.random.default_rng(6)
+    cov = rng.random((60, 8)) < 0.3
+    weights = rng.uniform(1e3, 4e4, 60)
+    open_stations = [0, 2, 3, 5, 7]
+    res = allocate_vehicles(cov, weights, open_stations, p_vehicles=11, calls_per_1000_per_year=2000)
+    assert sum(res["vehicles_per_station"].values()) == 11
+    assert all(1 <= c <= 4 for c in res["vehicles_per_station"].values())
+    
+    # Brute force over every feasible allocation of the same fleet
+    busy = {j: erlang_b(4, [res["offered_load"][j]])[0] for j in open_stations}
+    value = lambda units: sum(w * (1 - busy[j][c]) for (j, w), c in zip(res["covered_workload"].items(), units))
+    best = max(value(u) for u in product(range(1, 5), repeat=5) if sum(u) == 11)
+    assert value(list(res["vehicles_per_station"].values())) == pytest.approx(best)
+    
+    busiest = max(res["offered_load"], key=res["offered_load"].get)
+    assert res["vehicles_per_station"][busiest] == max(res["vehicles_per_station"].values())
+
+def test_highs_backend_matches_pulp():
+    """The in-memory HiGHS backend reaches the CBC optimum for each objective and supports in-place updates."""
+    rng = np.random.default_rng(7)
+    cov = rng.random((60, 15)) < 0.15
+    weights = rng.uniform(1, 100, 60)
+    profiles = rng.uniform(1, 100, (60, 4))
+    
+    for objective, demand in (("weighted", weights), ("worst_profile", profiles), ("cvar", profiles)):
+        highs = MCLPModel(cov, demand, 4, 8, objective=objective, solver_type="highs").solve()
+        cbc = MCLPModel(cov, demand, 4, 8, objective=objective, solver_type="pulp").solve()
+        assert highs["solver"] == "highs" and highs["status"] == "OPTIMAL"
+        assert highs["obj_value"] == pytest.approx(cbc["obj_value"])
+        assert highs["optimality_gap"] < 1e-3
+        assert sum(highs["vehicles_per_station"].values()) <= 8
+    
+    # Budget, coverage, weight and zone-type updates match a fresh build
+    zone_types = rng.integers(0, 3, 60)
+    cov2, weights2 = rng.random((60, 15)) < 0.15, rng.uniform(1, 100, 60)
+    model = MCLPModel(cov, weights, 4, 8, solver_type="highs")
+    model.add_zone_type_constraints(zone_types, 0.2)
+    model.solve()
+    model.set_station_budget(6)
+    model.set_coverage_matrix(cov2)
+    model.set_demand_weights(weights2)
+    model.set_zone_type_minimum(0.3)
+    fresh = MCLPModel(cov2, weights2, 6, 8, solver_type="pulp")
+    fresh.add_zone_type_constraints(zone_types, 0.3)
+    assert model.solve()["obj_value"] == pytest.approx(fresh.solve()["obj_value"])
@@ -2,6 +2,7 @@ import pytest
 import numpy as np
 import geopandas as gpd
 from shapely.geometry import Point, box
+import shapely
 import os
 import sys
 
@@ -39,3 +40,206 @@ def test_morans_i_range():
     
     results = compute_global_morans_i(gdf, "val")
     assert -1.0 <= results["I"] <= 1.0
+
+def test_weighted_gini_profiles_match_loop():
+    """Scoring (n, n_profiles) weights at once matches one call per profile."""
+    from spatial_analysis.equity_metrics import weighted_gini
+    
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 1, 50)
+    profiles = rng.uniform(1, 100, (50, 24)).astype(np.float32)
+    
+    batched = weighted_gini(values, profiles)
+    assert batched.shape == (24,)
+    for k in range(24):
+        assert abs(batched[k] - weighted_gini(values, profiles[:, k])) < 1e-9
+
+def test_spatial_weights_cached_and_knn_k(tmp_path):
+    """Weights are built once per geometry set and the KNN fallback honours knn_k."""
+    from spatial_analysis.spatial_weights import get_spatial_weights, clear_weights_cache
+    
+    # Five isolated squares -> Queen weights disconnected -> KNN fallback
+    geoms = [box(10 * i, 0, 10 * i + 1, 1) for i in range(5)]
+    gdf = gpd.GeoDataFrame({'geometry': geoms, 'val': [1.0, 2.0, 3.0, 2.0, 1.0]})
+    
+    clear_weights_cache()
+    w = get_spatial_weights(gdf, knn_k=3, cache_dir=str(tmp_path))
+    assert all(len(nbrs) == 3 for nbrs in w.neighbors.values())
+    assert get_spatial_weights(gdf.copy(), knn_k=3) is w
+    assert get_spatial_weights(gdf, knn_k=2) is not w
+    
+    # Persisted copy is picked up after the in-memory cache is cleared
+    clear_weights_cache()
+    w_disk = get_spatial_weights(gdf, knn_k=3, cache_dir=str(tmp_path))
+    assert w_disk.neighbors == w.neighbors
+    
+    # Precomputed weights can be passed straight through
+    res = compute_global_morans_i(gdf, "val", w=w)
+    assert -1.0 <= res["I"] <= 1.0
+
+def test_batched_morans_i_matches_esda():
+    """Batched Moran's I reproduces esda's I and permutation inference for the same seed."""
+    from esda.moran import Moran
+    from spatial_analysis.morans_i import batched_morans_i
+    from spatial_analysis.spatial_weights import get_spatial_weights
+    
+    # 6x6 lattice of unit squares
+    geoms = [box(i, j, i + 1, j + 1) for i in range(6) for j in range(6)]
+    gdf = gpd.GeoDataFrame({'geometry': geoms})
+    rng = np.random.default_rng(1)
+    Y = rng.uniform(0, 1, (36, 4))
+    Y[:, 0] = np.repeat(np.arange(6), 6)  # strongly clustered column
+    
+    w = get_spatial_weights(gdf)
+    w.transform = "b"
+    batch = batched_morans_i(Y, w, permutations=199, seed=7)
+    assert w.transform == "B"  # the (possibly shared) weights object is not modified
+    
+    for k in range(Y.shape[1]):
+        np.random.seed(7)
+        ref = Moran(Y[:, k], w, permutations=199)
+        assert abs(batch["I"][k] - ref.I) < 1e-10
+        assert batch["p_sim"][k] == ref.p_sim
+        assert abs(batch["z_sim"][k] - ref.z_sim) < 1e-8
+
+def test_local_morans_i_seeded_parallel():
+    """LISA p-values are reproducible for a seed and do not depend on n_jobs."""
+    from spatial_analysis.morans_i import compute_local_morans_i
+    from spatial_analysis import lisa_inference
+    
+    geoms = [box(i, j, i + 1, j + 1) for i in range(10) for j in range(10)]
+    rng = np.random.default_rng(3)
+    vals = rng.uniform(0, 1, 100)
+    vals[:30] += 2.0  # low-x columns form a high-value cluster
+    gdf = gpd.GeoDataFrame({'geometry': geoms, 'val': vals})
+    
+    # Force several chunks so the parallel path is exercised
+    old = lisa_inference.MAX_CHUNK_ELEMENTS
+    lisa_inference.MAX_CHUNK_ELEMENTS = 99 * 8 * 10
+    try:
+        serial = compute_local_morans_i(gdf, "val", permutations=99, seed=11)
+        parallel = compute_local_morans_i(gdf, "val", permutations=99, seed=11, n_jobs=2)
+    finally:
+        lisa_inference.MAX_CHUNK_ELEMENTS = old
+    
+    assert np.array_equal(serial.lisa_p.values, parallel.lisa_p.values)
+    assert (serial.lisa_cluster.iloc[:30] == "HH").sum() > 10
+    
+    # No permutations: local I without inference, p-values undefined
+    no_perm = compute_local_morans_i(gdf, "val", permutations=0)
+    assert np.allclose(no_perm.lisa_I.values, serial.lisa_I.values)
+    assert no_perm.lisa_p.isna().all()
+
+def test_zone_aggregation_multi_scenario():
+    """Aggregating a (n_demand, n_scenarios) matrix matches one weighted mean per zone and scenario."""
+    from spatial_analysis.coverage_analysis import ZoneAggregator, aggregate_coverage_to_zones, summarize_by_type
+    
+    zones = gpd.GeoDataFrame({
+        'zone_id': [0, 1, 2],
+        'zone_type': ['urban_core', 'suburban', 'urban_core'],
+        'geometry': [box(0, 0, 1, 1), box(1, 0, 2, 1), box(2, 0, 3, 1)]
+    })
+    demand = gpd.GeoDataFrame({
+        'zone_id': [0, 0, 1, 1, 1],
+        'weight': [3.0, 1.0, 1.0, 1.0, 2.0],
+        'geometry': [Point(0.5, 0.5)] * 5
+    })
+    Y = np.array([[1, 0], [0, 1], [1, 1], [0, 1], [1, 0]])
+    
+    agg = ZoneAggregator(zones, demand)
+    out = aggregate_coverage_to_zones(zones, demand, Y, aggregator=agg, columns=["a", "b"])
+    assert np.allclose(out["a"], [0.75, 0.75, 0.0])  # zone 2 has no demand
+    assert np.allclose(out["b"], [0.25, 0.5, 0.0])
+    assert out is zones  # columns are written in place, the frame is not copied
+    
+    single = aggregate_coverage_to_zones(zones, demand, Y[:, 0], aggregator=agg)
+    assert np.allclose(single.coverage_pct, out["a"])
+    
+    # Duplicate zone ids cannot be aggregated unambiguously
+    with pytest.raises(ValueError):
+        ZoneAggregator(zones.iloc[[0, 1, 2, 0]], demand)
+    with pytest.raises(ValueError):
+        agg.write_coverage(zones.iloc[::-1], Y[:, 0])
+    
+    summary = summarize_by_type(out, "a")
+    assert summary.loc["urban_core", "mean"] == 0.375
+    assert summary.loc["suburban", "max"] == 0.75
+    
+    # A zone without a type is left out rather than counted under another type
+    out.loc[0, "zone_type"] = None
+    summary = summarize_by_type(out, "a")
+    assert list(summary.index) == ["suburban", "urban_core"]
+    assert summary.loc["urban_core", "mean"] == 0.0
+
+def test_streaming_gini_within_error_bound():
+    """Binned streaming Gini brackets the exact batched Gini within its documented bound."""
+    from spatial_analysis.equity_metrics import weighted_gini, lorenz_curve, StreamingGini
+    
+    rng = np.random.default_rng(5)
+    values = rng.beta(2, 3, (20000, 3))
+    weights = rng.uniform(1, 50, 20000)
+    exact = weighted_gini(values, weights)
+    
+    sketch = StreamingGini(n_bins=200, n_scenarios=3)
+    for start in range(0, 20000, 5000):
+        sketch.update(values[start:start + 5000], weights[start:start + 5000])
+    approx = sketch.gini()
+    
+    assert np.all(approx <= exact + 1e-12)
+    assert np.all(exact <= approx + sketch.error_bound())
+    
+    # Downsampled Lorenz curves have a fixed number of points on the exact curve
+    pop, val = lorenz_curve(values, weights, n_points=51)
+    assert pop.shape == (51,) and val.shape == (51, 3)
+    full_pop, full_val = lorenz_curve(values[:, 0], weights)
+    assert np.allclose(val[:, 0], np.interp(pop, full_pop, full_val))
+
+def test_point_level_morans_i_matches_esda():
+    """KD-tree point weights reproduce esda's global and local Moran's I on KNN weights."""
+    import libpysal
+    from esda.moran import Moran, Moran_Local
+    from spatial_analysis.point_autocorrelation import point_weights, point_global_morans_i, point_local_morans_i
+    
+    rng = np.random.default_rng(2)
+    coords = rng.uniform(0, 5000, (300, 2))
+    vals = coords[:, 0] / 5000 + rng.normal(0, 0.3, 300)
+    
+    W = point_weights(coords, k=6)
+    w_ref = libpysal.weights.KNN.from_array(coords, k=6)
+    w_ref.transform = 'r'
+    
+    ref = Moran(vals, w_ref, permutations=0)
+    res = point_global_morans_i(W, vals)
+    assert abs(res["I"] - ref.I) < 1e-10
+    assert abs(res["z_norm"] - ref.z_norm) < 1e-8
+    
+    # Weights are reused across scenarios: batched columns match single calls
+    both = point_global_morans_i(W, np.column_stack([vals, vals[::-1]]))
+    assert abs(both["I"][0] - res["I"]) < 1e-12
+    
+    local = point_local_morans_i(W, vals)
+    ref_local = Moran_Local(vals, w_ref, permutations=0)
+    assert np.allclose(local["Is"], ref_local.Is)
+    assert np.array_equal(local["q"], ref_local.q)
+
+def test_service_area_footprints_cached(tmp_path):
+    """Footprints contain the covered demand nodes, are persisted and unioned per solution."""
+    from spatial_analysis.service_areas import ServiceAreaCache
+    
+    demand = gpd.GeoDataFrame(geometry=[Point(54.40 + 0.01 * i, 24.45) for i in range(6)], crs="EPSG:4326")
+    stations = gpd.GeoDataFrame(geometry=[Point(54.41, 24.45), Point(54.44, 24.45)], crs="EPSG:4326")
+    cov = np.array([[1, 0], [1, 0], [1, 0], [0, 1], [0, 1], [0, 1]], dtype=bool)
+    
+    areas = ServiceAreaCache(demand, stations, cov, cell_radius_m=200, cache_dir=str(tmp_path))
+    fp = areas.footprints_gdf()
+    assert fp.geometry.iloc[0].contains(demand.geometry.iloc[2])
+    assert not fp.geometry.iloc[0].contains(demand.geometry.iloc[4])
+    
+    reloaded = ServiceAreaCache(demand, stations, cov, cell_radius_m=200, cache_dir=str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+    assert reloaded.footprints[250.0][1].equals(areas.footprints[250.0][1])
+    
+    merged = areas.union([0, 1], tolerance=250.0)
+    assert merged.iloc[0].contains(shapely.union_all(demand.geometry.values))
+    with pytest.raises(ValueError):
+        areas.union([0], tolerance=10.0)
@@ -0,0 +1,121 @@
+import pytest
+import numpy as np
+import geopandas as gpd
+from shapely.geometry import Point, box
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visualization.batch_render import render_batch, MANIFEST_NAME
+
+def _lorenz_job(name, gini):
+    pop = np.linspace(0, 1, 11)
+    return {"name": name, "plot": "lorenz_curve",
+            "kwargs": {"baseline_coords": (pop, pop ** 2), "optimized_coords": (pop, pop ** 1.5),
+                       "baseline_gini": gini, "optimized_gini": gini / 2}}
+
+def test_render_batch_skips_unchanged_figures(tmp_path):
+    """Serial batches render every figure once, skip unchanged ones and keep the caller's backend."""
+    import matplotlib
+    jobs = [_lorenz_job("a.png", 0.4), _lorenz_job("b.png", 0.3)]
+
+    backend = matplotlib.get_backend()
+    matplotlib.use("pdf")
+    try:
+        first = render_batch(jobs, str(tmp_path), n_jobs=1)
+        assert matplotlib.get_backend() == "pdf"
+    finally:
+        matplotlib.use(backend)
+    assert sorted(os.path.basename(p) for p in first["rendered"]) == ["a.png", "b.png"]
+    assert all(os.path.getsize(p) > 0 for p in first["rendered"])
+    assert os.path.exists(tmp_path / MANIFEST_NAME)
+
+    again = render_batch(jobs, str(tmp_path), n_jobs=1)
+    assert again["rendered"] == [] and len(again["skipped"]) == 2
+
+    # Only the figure whose inputs changed (or whose file is gone) is re-rendered
+    jobs[1] = _lorenz_job("b.png", 0.35)
+    changed = render_batch(jobs, str(tmp_path), n_jobs=1)
+    assert [os.path.basename(p) for p in changed["rendered"]] == ["b.png"]
+    os.remove(tmp_path / "a.png")
+    assert [os.path.basename(p) for p in render_batch(jobs, str(tmp_path), n_jobs=1)["rendered"]] == ["a.png"]
+
+    with pytest.raises(ValueError):
+        render_batch([{"name": "x.png", "plot": "unknown", "kwargs": {}}], str(tmp_path))
+
+def test_render_batch_parallel_matches_serial(tmp_path):
+    """The process pool renders the same files and manifest as the serial path."""
+    jobs = [_lorenz_job(f"{k}.png", 0.1 * (k + 1)) for k in range(3)]
+    serial = render_batch(jobs, str(tmp_path / "serial"), n_jobs=1)
+    parallel = render_batch(jobs, str(tmp_path / "parallel"), n_jobs=2)
+
+    assert [os.path.basename(p) for p in parallel["rendered"]] == [os.path.basename(p) for p in serial["rendered"]]
+    assert all(os.path.exists(p) for p in parallel["rendered"])
+    with open(tmp_path / "serial" / MANIFEST_NAME) as a, open(tmp_path / "parallel" / MANIFEST_NAME) as b:
+        assert a.read() == b.read()
+
+def test_zone_base_layer_cached_per_geometry_and_style():
+    """The zone layer is rendered once per geometry set and style, and redrawn from the cache."""
+    from visualization import base_layer
+    zones = gpd.GeoDataFrame({"geometry": [box(54.0, 24.0, 54.5, 24.5), box(54.5, 24.0, 55.0, 24.5)]},
+                             crs="EPSG:4326")
+
+    layer = base_layer.zone_base_layer(zones, dpi=20, figsize=(2, 2))
+    img, extent = layer
+    assert img.shape == (40, 40, 4) and extent == (54.0, 55.0, 24.0, 24.5)
+    assert base_layer.zone_base_layer(zones.copy(), dpi=20, figsize=(2, 2)) is layer
+    assert base_layer.zone_base_layer(zones, color="red", dpi=20, figsize=(2, 2)) is not layer
+
+    moved = zones.copy()
+    moved.geometry = [box(54.0, 24.0, 54.4, 24.5), box(54.5, 24.0, 55.0, 24.5)]
+    assert base_layer.content_hash(moved.geometry) != base_layer.content_hash(zones.geometry)
+    assert base_layer.zone_base_layer(moved, dpi=20, figsize=(2, 2)) is not layer
+
+def _tile_zones(coverage):
+    geoms = [box(54.0 + 0.5 * i, 24.0, 54.3 + 0.5 * i, 24.3) for i in range(len(coverage))]
+    return gpd.GeoDataFrame({"zone_id": np.arange(len(coverage)), "coverage_pct": coverage, "geometry": geoms},
+                            crs="EPSG:4326")
+
+def test_tile_export_incremental_and_quantized(tmp_path):
+    """Re-exports skip unchanged tiles, rewrite only tiles touched by changed zones and quantize coverage."""
+    import json
+    from visualization.tile_export import export_coverage_tiles, _tile_range
+    coverage = np.array([0.90, 0.40, 0.65, 0.10])
+    zooms = (8, 10)
+
+    first = export_coverage_tiles({"zones": _tile_zones(coverage)}, str(tmp_path), zooms=zooms)
+    assert first["unchanged"] == [] and first["removed"] == []
+    assert sum(k.startswith("10/") for k in first["written"]) >= 4  # zones fall in separate z10 tiles
+
+    again = export_coverage_tiles({"zones": _tile_zones(coverage)}, str(tmp_path), zooms=zooms)
+    assert again["written"] == [] and sorted(again["unchanged"]) == sorted(first["written"])
+
+    # Changes below the quantization step do not touch any tile
+    below = export_coverage_tiles({"zones": _tile_zones(coverage + 0.01)}, str(tmp_path), zooms=zooms)
+    assert below["written"] == []
+
+    # A changed zone rewrites exactly the tiles it intersects
+    changed = coverage.copy()
+    changed[3] = 0.8
+    zones = _tile_zones(changed)
+    bounds = zones.iloc[[3]].to_crs("EPSG:3857").total_bounds
+    expected = {f"{z}/{x}/{y}" for z in zooms for xs, ys in [_tile_range(bounds, z)] for x in xs for y in ys}
+    res = export_coverage_tiles({"zones": zones}, str(tmp_path), zooms=zooms)
+    assert set(res["written"]) == expected
+
+    # Stored coverage is on the 1/20 grid, within half a step of the input
+    stored = {}
+    for key in first["written"]:
+        with open(tmp_path / f"{key}.json") as f:
+            for feature in json.load(f)["zones"]["features"]:
+                stored[feature["properties"]["zone_id"]] = feature["properties"]["coverage_pct"]
+    values = np.array([stored[i] for i in range(4)])
+    assert np.allclose(values * 20, np.round(values * 20))
+    assert np.all(np.abs(values - changed) <= 0.025 + 1e-12)
+
+    # Tiles left empty by the next scenario are removed
+    res = export_coverage_tiles({"zones": zones.iloc[:3]}, str(tmp_path), zooms=zooms)
+    assert res["removed"] and set(res["removed"]) <= expected
+    assert all(not os.path.exists(tmp_path / f"{k}.json") for k in res["removed"])
@@ -1,12 +1,25 @@
-from .coverage_maps import plot_coverage_choropleth, plot_station_locations
-from .equity_plots import plot_lorenz_curve, plot_zone_type_coverage, plot_coverage_distribution
-from .solution_plots import plot_mip_solution
-
-__all__ = [
-    "plot_coverage_choropleth",
-    "plot_station_locations",
-    "plot_lorenz_curve",
-    "plot_zone_type_coverage",
-    "plot_coverage_distribution",
-    "plot_mip_solution"
-]
+import importlib
+
+# Public API -> defining submodule, imported lazily as in optimization/__init__.py
+_EXPORTS = {
+    "plot_coverage_choropleth": ".coverage_maps",
+    "plot_station_locations": ".coverage_maps",
+    "plot_lorenz_curve": ".equity_plots",
+    "plot_zone_type_coverage": ".equity_plots",
+    "plot_coverage_distribution": ".equity_plots",
+    "plot_mip_solution": ".solution_plots",
+    "render_batch": ".batch_render",
+    "export_coverage_tiles": ".tile_export",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,80 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Pre-rendered zone layers, keyed by geometry hash and style (one render per process)
+_BASE_LAYER_CACHE = {}
+
+def content_hash(obj) -> str:
+    """
+    Stable content hash of plot inputs (GeoDataFrames, DataFrames, arrays, scalars,
+    objects with a content `key` and nested lists/dicts of them), used to skip re-rendering figures whose inputs are unchanged.
+    """
+    h = hashlib.sha1()
+    _update_hash(h, obj)
+    return h.hexdigest()
+
+def _update_hash(h, obj):
+    if isinstance(obj, gpd.GeoDataFrame) or isinstance(obj, gpd.GeoSeries):
+        h.update(b"geo")
+        for wkb in obj.geometry.to_wkb().values:
+            h.update(wkb)
+        if isinstance(obj, gpd.GeoDataFrame):
+            attrs = obj.drop(columns=obj.geometry.name)
+            h.update(repr(list(attrs.columns)).encode())
+            h.update(pd.util.hash_pandas_object(attrs, index=True).values.tobytes())
+    elif isinstance(obj, (pd.DataFrame, pd.Series)):
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"{obj.dtype}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        for key in sorted(obj):
+            h.update(repr(key).encode())
+            _update_hash(h, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for item in obj:
+            _update_hash(h, item)
+        h.update(b"]")
+    elif isinstance(getattr(obj, "key", None), str):
+        # Precomputed caches (e.g. ServiceAreaCache) carry their own content key
+        h.update(f"{type(obj).__name__}:{obj.key}".encode())
+    else:
+        h.update(repr(obj).encode())
+
+def zone_base_layer(zones_gdf: gpd.GeoDataFrame, color: str = 'lightgray', edgecolor: str = 'white',
+                    linewidth: float = 0.5, dpi: int = 200, figsize=(12, 10)) -> tuple:
+    """
+    Render the zone polygons once (off-screen, Agg) to an RGBA image.
+    Returns (image, extent); draw it with draw_base_layer() instead of re-plotting every polygon.
+    """
+    key = (content_hash(zones_gdf.geometry), color, edgecolor, linewidth, dpi, tuple(figsize))
+    if key in _BASE_LAYER_CACHE:
+        return _BASE_LAYER_CACHE[key]
+
+    minx, miny, maxx, maxy = zones_gdf.total_bounds
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    zones_gdf.plot(ax=ax, color=color, edgecolor=edgecolor, linewidth=linewidth)
+    ax.set_aspect("auto")
+    ax.set_xlim(minx, maxx)
+    ax.set_ylim(miny, maxy)
+    fig.patch.set_alpha(0)
+    canvas.draw()
+
+    layer = (np.asarray(canvas.buffer_rgba()).copy(), (minx, maxx, miny, maxy))
+    _BASE_LAYER_CACHE[key] = layer
+    return layer
+
+def draw_base_layer(ax, base_layer: tuple) -> None:
+    """Draw a pre-rendered zone layer, keeping the geographic aspect ratio of WGS84 maps."""
+    img, extent = base_layer
+    ax.imshow(img, extent=extent, zorder=0, interpolation="antialiased")
+    mean_lat = (extent[2] + extent[3]) / 2
+    ax.set_aspect(1.0 / np.cos(np.radians(mean_lat)))
@@ -0,0 +1,94 @@
+import os
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Plot types available to batch jobs (resolved by name inside worker processes)
+PLOT_TYPES = {
+    "coverage_choropleth": ("visualization.coverage_maps", "plot_coverage_choropleth"),
+    "station_locations": ("visualization.coverage_maps", "plot_station_locations"),
+    "lorenz_curve": ("visualization.equity_plots", "plot_lorenz_curve"),
+    "zone_type_coverage": ("visualization.equity_plots", "plot_zone_type_coverage"),
+    "coverage_distribution": ("visualization.equity_plots", "plot_coverage_distribution"),
+    "mip_solution": ("visualization.solution_plots", "plot_mip_solution"),
+}
+
+# Map plot types whose zone background can come from a shared pre-rendered layer
+BASE_LAYER_STYLES = {
+    "station_locations": {"color": 'lightgray', "edgecolor": 'white'},
+    "mip_solution": {"color": '#f0f0f0', "edgecolor": 'white'},
+}
+
+MANIFEST_NAME = "render_manifest.json"
+
+def _init_worker():
+    """Force the off-screen Agg backend in every pool worker process (never in the caller's)."""
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+def _render_job(job: dict) -> str:
+    """Render one figure to job['path'] and close it."""
+    import importlib
+    import matplotlib.pyplot as plt
+    from .base_layer import zone_base_layer
+
+    module_name, func_name = PLOT_TYPES[job["plot"]]
+    plot_func = getattr(importlib.import_module(module_name), func_name)
+
+    kwargs = dict(job["kwargs"])
+    if job["plot"] in BASE_LAYER_STYLES and "zones_gdf" in kwargs and "base_layer" not in kwargs:
+        # Rendered once per worker process, then reused for every map it draws
+        kwargs["base_layer"] = zone_base_layer(kwargs["zones_gdf"], **BASE_LAYER_STYLES[job["plot"]])
+
+    fig = plot_func(**kwargs, save_path=job["path"])
+    plt.close(fig)
+    return job["path"]
+
+def render_batch(jobs: list, output_dir: str, n_jobs: int = None, force: bool = False) -> dict:
+    """
+    Render a batch of report figures off-screen, in parallel, skipping unchanged figures.
+
+    jobs: list of {"name": "<file name>", "plot": <key of PLOT_TYPES>, "kwargs": {...}},
+          where kwargs are the plot function's arguments (without save_path).
+    A content hash of each job's plot type and inputs is stored in a manifest in
+    output_dir; figures whose hash and file are unchanged are not re-rendered.
+    Returns {"rendered": [...], "skipped": [...]} lists of file paths.
+    """
+    from .base_layer import content_hash
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+    pending, skipped, hashes = [], [], {}
+    for job in jobs:
+        if job["plot"] not in PLOT_TYPES:
+            raise ValueError(f"Unknown plot type '{job['plot']}', expected one of {sorted(PLOT_TYPES)}")
+        path = os.path.join(output_dir, job["name"])
+        digest = content_hash([job["plot"], job["kwargs"]])
+        hashes[job["name"]] = digest
+        if not force and manifest.get(job["name"]) == digest and os.path.exists(path):
+            skipped.append(path)
+        else:
+            pending.append({**job, "path": path})
+
+    logger.info(f"Rendering {len(pending)} figures ({len(skipped)} unchanged)...")
+    if n_jobs == 1 or len(pending) <= 1:
+        # In the caller's process: keep its backend (e.g. a notebook's), just don't show anything
+        import matplotlib.pyplot as plt
+        with plt.ioff():
+            rendered = [_render_job(job) for job in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker) as pool:
+            rendered = list(pool.map(_render_job, pending))
+
+    manifest.update({job["name"]: hashes[job["name"]] for job in pending})
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    return {"rendered": rendered, "skipped": skipped}
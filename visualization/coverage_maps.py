@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import geopandas as gpd
 import logging
 
+from .base_layer import draw_base_layer
+
 logger = logging.getLogger(__name__)
 
 def plot_coverage_choropleth(zones_gdf: gpd.GeoDataFrame, coverage_col: str, title: str, save_path: str = None) -> plt.Figure:
@@ -23,10 +25,11 @@ def plot_coverage_choropleth(zones_gdf: gpd.GeoDataFrame, coverage_col: str, tit
         linewidth=0.5
     )
     
-    # Add labels for major zones
-    for x, y, label in zip(zones_gdf.geometry.centroid.x, zones_gdf.geometry.centroid.y, zones_gdf.zone_name):
-        if zones_gdf.geometry.area.loc[zones_gdf.zone_name == label].values[0] > 0.005:  # Simple filter for large zones
-            ax.text(x, y, label, fontsize=6, ha='center', alpha=0.7)
+    # Add labels for major zones (centroids and areas computed once, not per label)
+    large = (zones_gdf.geometry.area > 0.005).values  # Simple filter for large zones
+    centroids = zones_gdf.geometry.centroid[large]
+    for x, y, label in zip(centroids.x, centroids.y, zones_gdf.zone_name[large]):
+        ax.text(x, y, label, fontsize=6, ha='center', alpha=0.7)
 
     ax.set_title(title, fontsize=14, fontweight='bold')
     ax.axis('off')
@@ -38,17 +41,22 @@ def plot_coverage_choropleth(zones_gdf: gpd.GeoDataFrame, coverage_col: str, tit
     return fig
 
 def plot_station_locations(zones_gdf: gpd.GeoDataFrame, stations_gdf: gpd.GeoDataFrame, 
-                             highlight_idx=None, title="Station Locations", save_path=None) -> plt.Figure:
+                             highlight_idx=None, title="Station Locations", save_path=None,
+                             base_layer=None) -> plt.Figure:
     """
     Plot station locations overlaid on zone polygons.
+    base_layer: optional pre-rendered zones from base_layer.zone_base_layer().
     """
     fig, ax = plt.subplots(1, 1, figsize=(12, 10))
     
     # Background: zones
-    zones_gdf.plot(ax=ax, color='lightgray', edgecolor='white', linewidth=0.5)
+    if base_layer is not None:
+        draw_base_layer(ax, base_layer)
+    else:
+        zones_gdf.plot(ax=ax, color='lightgray', edgecolor='white', linewidth=0.5)
     
     # Points: stations
-    stations_gdf.plot(ax=ax, marker='o', color='blue', markersize=20, label="Potential Stations", alpha=0.5)
+    stations_gdf.plot(ax=ax, marker='o', color='blue', markersize=20, label="Potential Stations", alpha=0.5, rasterized=True)
     
     # Highlight specific indices (e.g., optimized selection)
     if highlight_idx is not None:
@@ -1,13 +1,25 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import geopandas as gpd
 import logging
 
+from spatial_analysis.equity_metrics import downsample_lorenz
+
 logger = logging.getLogger(__name__)
 
-def plot_lorenz_curve(baseline_coords, optimized_coords, baseline_gini, optimized_gini, save_path=None) -> plt.Figure:
+def _limit_points(pop, val, max_points):
+    """Downsample Lorenz coordinates that are denser than max_points."""
+    pop, val = np.asarray(pop), np.asarray(val)
+    if len(pop) > max_points:
+        return downsample_lorenz(pop, val, max_points)
+    return pop, val
+
+def plot_lorenz_curve(baseline_coords, optimized_coords, baseline_gini, optimized_gini, save_path=None,
+                      max_points: int = 201) -> plt.Figure:
     """
     Plot Lorenz curves comparing baseline and optimized coverage distributions.
+    Curves with more than max_points coordinates are downsampled before plotting.
     """
     fig, ax = plt.subplots(figsize=(8, 8))
     
@@ -15,11 +27,11 @@ def plot_lorenz_curve(baseline_coords, optimized_coords, baseline_gini, optimize
     ax.plot([0, 1], [0, 1], 'k--', alpha=0.5, label="Perfect Equality")
     
     # Baseline
-    pop_b, val_b = baseline_coords
+    pop_b, val_b = _limit_points(*baseline_coords, max_points)
     ax.plot(pop_b, val_b, 'r-', label=f"Baseline (Gini: {baseline_gini:.2f})")
     
     # Optimized
-    pop_o, val_o = optimized_coords
+    pop_o, val_o = _limit_points(*optimized_coords, max_points)
     ax.plot(pop_o, val_o, 'g-', label=f"Optimized (Gini: {optimized_gini:.2f})")
     
     ax.set_title("Lorenz Curve: Ambulance Coverage Distribution", fontsize=14, fontweight='bold')
@@ -3,36 +3,55 @@ import geopandas as gpd
 from shapely.geometry import Point
 import logging
 
+from optimization.coverage_matrix import AVERAGE_SPEED_KMH
+from .base_layer import draw_base_layer
+
 logger = logging.getLogger(__name__)
 
 def plot_mip_solution(zones_gdf: gpd.GeoDataFrame, candidates_gdf: gpd.GeoDataFrame, 
-                      open_stations_idx: list, coverage_radius_m: float = 8000, 
-                      demand_gdf: gpd.GeoDataFrame = None, save_path: str = None) -> plt.Figure:
+                      open_stations_idx: list, coverage_radius_m: float = None, 
+                      demand_gdf: gpd.GeoDataFrame = None, save_path: str = None,
+                      base_layer=None, service_areas=None, tolerance: float = None,
+                      threshold_min: float = 8.0) -> plt.Figure:
     """
     Comprehensive map showing the optimization solution.
+    base_layer: optional pre-rendered zones from base_layer.zone_base_layer().
+    service_areas: optional spatial_analysis.service_areas.ServiceAreaCache; the service
+        range is then the union of the open stations' precomputed coverage footprints
+        (at simplification `tolerance`) instead of fixed coverage_radius_m circles.
+    coverage_radius_m: circle radius without service_areas; by default the distance driven
+        in threshold_min minutes at the coverage model's AVERAGE_SPEED_KMH (8 min: ~8667 m).
     """
+    if coverage_radius_m is None:
+        coverage_radius_m = threshold_min / 60.0 * AVERAGE_SPEED_KMH * 1000.0
     fig, ax = plt.subplots(1, 1, figsize=(15, 12))
     
     # Base: Zones
-    zones_gdf.plot(ax=ax, color='#f0f0f0', edgecolor='white', linewidth=0.5)
+    if base_layer is not None:
+        draw_base_layer(ax, base_layer)
+    else:
+        zones_gdf.plot(ax=ax, color='#f0f0f0', edgecolor='white', linewidth=0.5)
     
     # Candidate Stations (all)
-    candidates_gdf.plot(ax=ax, marker='o', color='gray', markersize=5, alpha=0.3, label="Potential Sites")
+    candidates_gdf.plot(ax=ax, marker='o', color='gray', markersize=5, alpha=0.3, label="Potential Sites", rasterized=True)
     
     # Selected Stations
     selected = candidates_gdf.iloc[open_stations_idx]
     
-    # Coverage Radii (approx circle in meters - requires UTM projection)
-    selected_utm = selected.to_crs("EPSG:32640")
-    buffers_utm = selected_utm.geometry.buffer(coverage_radius_m)
-    buffers = gpd.GeoSeries(buffers_utm, crs="EPSG:32640").to_crs("EPSG:4326")
+    if service_areas is not None:
+        buffers = service_areas.union(open_stations_idx, tolerance=tolerance)
+    else:
+        # Coverage Radii (approx circle in meters - requires UTM projection)
+        selected_utm = selected.to_crs("EPSG:32640")
+        buffers_utm = selected_utm.geometry.buffer(coverage_radius_m)
+        buffers = gpd.GeoSeries(buffers_utm, crs="EPSG:32640").to_crs("EPSG:4326")
     
-    buffers.plot(ax=ax, color='green', alpha=0.1, edgecolor='green', linewidth=1, label="8-min Service Range")
+    buffers.plot(ax=ax, color='green', alpha=0.1, edgecolor='green', linewidth=1, label=f"{threshold_min:g}-min Service Range")
     selected.plot(ax=ax, marker='^', color='orange', markersize=100, edgecolor='black', label="Optimized Station Sites", zorder=5)
     
     # Optional: Demand nodes (if provided)
     if demand_gdf is not None:
-        demand_gdf.plot(ax=ax, color='red', markersize=1, alpha=0.2, label="Demand Centers")
+        demand_gdf.plot(ax=ax, color='red', markersize=1, alpha=0.2, label="Demand Centers", rasterized=True)
 
     ax.set_title("Optimized Ambulance Infrastructure Network", fontsize=16, fontweight='bold')
     ax.set_xlabel("Longitude")
@@ -0,0 +1,146 @@
+import os
+import json
+import math
+import hashlib
+import logging
+import numpy as np
+import geopandas as gpd
+import shapely
+
+logger = logging.getLogger(__name__)
+
+# Zoom levels exported for the dashboard (region-wide to neighbourhood scale)
+DEFAULT_ZOOMS = (6, 8, 10, 12)
+# Coordinate grid per tile side, as in Mapbox Vector Tiles
+TILE_EXTENT = 4096
+# Coverage attributes are quantized to 1/COVERAGE_LEVELS steps
+COVERAGE_LEVELS = 20
+MANIFEST_NAME = "tiles_manifest.json"
+
+# Half the Web Mercator (EPSG:3857) world width in meters
+_ORIGIN = 20037508.342789244
+
+def _tile_size(z: int) -> float:
+    return 2 * _ORIGIN / (1 << z)
+
+def _tile_range(bounds, z: int):
+    """Inclusive x and y tile index ranges (XYZ scheme, y down) covering mercator bounds."""
+    size = _tile_size(z)
+    n = (1 << z) - 1
+    minx, miny, maxx, maxy = bounds
+    x0 = min(max(int(math.floor((minx + _ORIGIN) / size)), 0), n)
+    x1 = min(max(int(math.floor((maxx + _ORIGIN) / size)), 0), n)
+    y0 = min(max(int(math.floor((_ORIGIN - maxy) / size)), 0), n)
+    y1 = min(max(int(math.floor((_ORIGIN - miny) / size)), 0), n)
+    return range(x0, x1 + 1), range(y0, y1 + 1)
+
+def _tile_bounds(x: int, y: int, z: int) -> tuple:
+    size = _tile_size(z)
+    minx = -_ORIGIN + x * size
+    maxy = _ORIGIN - y * size
+    return minx, maxy - size, minx + size, maxy
+
+def _quantize_attributes(df, quantize_cols, levels):
+    out = df.copy()
+    for col in quantize_cols:
+        if col in out.columns:
+            out[col] = np.round(out[col].astype(float) * levels) / levels
+    return out
+
+def _prepare_layer(gdf: gpd.GeoDataFrame, z: int, quantize_cols, levels) -> gpd.GeoDataFrame:
+    """Project to Web Mercator, simplify to about one tile pixel and quantize attributes."""
+    merc = gdf.to_crs("EPSG:3857")
+    pixel = _tile_size(z) / TILE_EXTENT
+    geoms = shapely.simplify(merc.geometry.values, pixel, preserve_topology=True)
+    merc = _quantize_attributes(merc, quantize_cols, levels)
+    return merc.set_geometry(gpd.GeoSeries(geoms, index=merc.index, crs="EPSG:3857"))
+
+def _layer_features(layer: gpd.GeoDataFrame, idx, bounds, grid) -> list:
+    """Features of `layer` rows `idx` clipped to the tile and snapped to the tile grid (WGS84)."""
+    part = layer.iloc[idx]
+    geoms = shapely.clip_by_rect(part.geometry.values, *bounds)
+    geoms = shapely.set_precision(geoms, grid)
+    keep = ~(shapely.is_empty(geoms) | shapely.is_missing(geoms))
+    if not keep.any():
+        return []
+    part = part[keep].set_geometry(gpd.GeoSeries(geoms[keep], index=part.index[keep], crs="EPSG:3857"))
+    return json.loads(part.to_crs("EPSG:4326").to_json(drop_id=True))["features"]
+
+def export_coverage_tiles(layers: dict, output_dir: str, zooms=DEFAULT_ZOOMS, quantize_cols=None,
+                          levels: int = COVERAGE_LEVELS) -> dict:
+    """
+    Export coverage results as pre-simplified, multi-resolution tiles for the dashboard.
+
+    layers: {"zones": zones_gdf, "demand": demand_gdf, "stations": open_stations_gdf,
+             "service_areas": service_area_gdf, ...} in any CRS.
+    Writes output_dir/{z}/{x}/{y}.json, each holding {layer_name: FeatureCollection}
+    for the features intersecting that tile. Geometry is simplified and snapped to a
+    TILE_EXTENT grid per zoom level; columns in quantize_cols (default: every float
+    column with values in [0, 1]) are rounded to 1/levels. Export is incremental:
+    tile content hashes are kept in a manifest and only changed tiles are rewritten,
+    so exporting the next scenario into the same directory only touches tiles whose
+    coverage changed.
+    Returns {"written": [...], "unchanged": [...], "removed": [...]} tile keys "z/x/y".
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+    if quantize_cols is None:
+        # Coverage-like attributes: float columns with all values in [0, 1]
+        quantize_cols = sorted({col for gdf in layers.values() for col in gdf.columns
+                                if col != gdf.geometry.name and gdf[col].dtype.kind == "f"
+                                and gdf[col].between(0, 1).all()})
+
+    written, unchanged, hashes = [], [], {}
+    for z in zooms:
+        prepared = {name: _prepare_layer(gdf, z, quantize_cols, levels) for name, gdf in layers.items() if len(gdf)}
+        grid = _tile_size(z) / TILE_EXTENT
+
+        # Candidate tiles from every layer's extent; features located per tile via the spatial index
+        tiles = set()
+        for layer in prepared.values():
+            xs, ys = _tile_range(layer.total_bounds, z)
+            tiles.update((x, y) for x in xs for y in ys)
+
+        for x, y in sorted(tiles):
+            bounds = _tile_bounds(x, y, z)
+            content = {}
+            for name, layer in prepared.items():
+                idx = layer.sindex.query(shapely.box(*bounds), predicate="intersects")
+                if len(idx):
+                    features = _layer_features(layer, np.sort(idx), bounds, grid)
+                    if features:
+                        content[name] = {"type": "FeatureCollection", "features": features}
+            if not content:
+                continue
+
+            key = f"{z}/{x}/{y}"
+            payload = json.dumps(content, separators=(",", ":"), sort_keys=True).encode()
+            digest = hashlib.sha1(payload).hexdigest()
+            hashes[key] = digest
+            path = os.path.join(output_dir, str(z), str(x), f"{y}.json")
+            if manifest.get(key) == digest and os.path.exists(path):
+                unchanged.append(key)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(payload)
+            written.append(key)
+
+    # Tiles that were exported before but are empty for this scenario
+    removed = sorted(set(manifest) - set(hashes))
+    for key in removed:
+        z, x, y = key.split("/")
+        path = os.path.join(output_dir, z, x, f"{y}.json")
+        if os.path.exists(path):
+            os.remove(path)
+
+    with open(manifest_path, "w") as f:
+        json.dump(hashes, f, indent=4, sort_keys=True)
+
+    logger.info(f"Tiles: {len(written)} written, {len(unchanged)} unchanged, {len(removed)} removed.")
+    return {"written": written, "unchanged": unchanged, "removed": removed}